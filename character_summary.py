@@ -0,0 +1,167 @@
+"""
+Character Summary - キャラクター一覧用の小さな要約（エクスポートごとの副ファイル）
+
+キャラクター一覧にエクスポート日時・メインジョブ・アイテム数・バッグごとの空き枠を
+表示するために全キャラクターのJSONを読み込むのは重いため、エクスポートを読み込むたびに
+キャラクターごとの要約を data/summaries/<キャラ名>.json に書き出しておく。
+起動時は要約ファイルとエクスポートの更新時刻だけを読み、JSON本体は読まない。
+
+- エクスポートの更新時刻・サイズを要約にも記録し、要約より新しいエクスポートは「未読込」として扱う
+- エクスポート日時からの経過時間が STALE_AFTER を超えたキャラクターは「古いデータ」として扱う
+"""
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from live_data import CharacterSnapshot
+
+# 要約の保存先
+DEFAULT_SUMMARY_DIR = Path(__file__).parent / "data" / "summaries"
+
+# エクスポートからこれ以上経ったデータは古いとみなす
+STALE_AFTER = timedelta(days=7)
+
+# 空き枠を一覧に表示するバッグ
+PRIMARY_BAG = "Inventory"
+
+
+@dataclass(frozen=True)
+class CharacterSummary:
+    """1キャラクター分の要約"""
+    char_name: str
+    source_mtime_ns: int
+    source_size: int
+    export_time: Optional[str] = None
+    main_job: Optional[str] = None
+    main_job_level: Optional[int] = None
+    sub_job: Optional[str] = None
+    sub_job_level: Optional[int] = None
+    total_items: int = 0                                    # 使用している枠数（全バッグの合計）
+    total_count: int = 0                                    # 個数の合計
+    free_slots: Dict[str, int] = field(default_factory=dict)  # バッグ -> 空き枠（枠数の分かるバッグのみ）
+    updated_at: float = 0.0
+
+    @property
+    def exported_at(self) -> datetime:
+        """エクスポート日時（読めなければファイルの更新時刻）"""
+        if self.export_time:
+            try:
+                return datetime.strptime(self.export_time, "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                pass
+        return datetime.fromtimestamp(self.source_mtime_ns / 1e9)
+
+    def age(self, now: Optional[datetime] = None) -> timedelta:
+        return (now or datetime.now()) - self.exported_at
+
+    def is_stale(self, now: Optional[datetime] = None) -> bool:
+        return self.age(now) > STALE_AFTER
+
+    @property
+    def job_label(self) -> str:
+        """"COR99/NIN49" 形式のジョブ表記（不明なら空文字）"""
+        if not self.main_job:
+            return ""
+        label = f"{self.main_job}{self.main_job_level or ''}"
+        if self.sub_job:
+            label += f"/{self.sub_job}{self.sub_job_level or ''}"
+        return label
+
+
+def summarize_snapshot(snapshot: CharacterSnapshot) -> CharacterSummary:
+    """スナップショットから要約を作る"""
+    used: Dict[str, int] = {}
+    total_count = 0
+    for item in snapshot.items:
+        used[item.storage] = used.get(item.storage, 0) + 1
+        total_count += item.count
+    player = snapshot.player or {}
+    return CharacterSummary(
+        char_name=snapshot.char_name,
+        source_mtime_ns=snapshot.source_mtime_ns,
+        source_size=snapshot.source_size,
+        export_time=snapshot.export_time,
+        main_job=player.get("main_job"),
+        main_job_level=player.get("main_job_level"),
+        sub_job=player.get("sub_job"),
+        sub_job_level=player.get("sub_job_level"),
+        total_items=len(snapshot.items),
+        total_count=total_count,
+        free_slots={
+            storage: max(0, capacity - used.get(storage, 0))
+            for storage, capacity in snapshot.capacities.items()
+            if capacity > 0
+        },
+        updated_at=time.time(),
+    )
+
+
+def format_age(age: timedelta) -> str:
+    """経過時間の短い表記（"5分前" / "3時間前" / "2日前"）"""
+    seconds = max(0, int(age.total_seconds()))
+    if seconds < 3600:
+        return f"{seconds // 60}分前"
+    if seconds < 86400:
+        return f"{seconds // 3600}時間前"
+    return f"{seconds // 86400}日前"
+
+
+class CharacterSummaryStore:
+    """キャラクターごとの要約ファイル"""
+
+    def __init__(self, summary_dir: Optional[Path] = None):
+        self.summary_dir = Path(summary_dir or DEFAULT_SUMMARY_DIR)
+
+    def _path(self, char_name: str) -> Path:
+        return self.summary_dir / f"{char_name}.json"
+
+    def update(self, snapshot: CharacterSnapshot) -> Optional[CharacterSummary]:
+        """エクスポートのスナップショットから要約を書き出す（.dat から読んだものは対象外）"""
+        if snapshot.source != "export":
+            return None
+        summary = summarize_snapshot(snapshot)
+        path = self._path(summary.char_name)
+        try:
+            self.summary_dir.mkdir(parents=True, exist_ok=True)
+            # 書きかけのファイルを読まないよう、一時ファイルに書いてから置き換える
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(asdict(summary), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Failed to write summary of {summary.char_name}: {e}")
+        return summary
+
+    def load(self, char_name: str) -> Optional[CharacterSummary]:
+        try:
+            with open(self._path(char_name), "r", encoding="utf-8") as f:
+                return CharacterSummary(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def load_all(self) -> Dict[str, CharacterSummary]:
+        """保存済みの全要約（キャラクター名 -> 要約）"""
+        result: Dict[str, CharacterSummary] = {}
+        if not self.summary_dir.exists():
+            return result
+        for path in self.summary_dir.glob("*.json"):
+            summary = self.load(path.stem)
+            if summary is not None:
+                result[summary.char_name] = summary
+        return result
+
+    def remove(self, char_name: str):
+        try:
+            self._path(char_name).unlink()
+        except OSError:
+            pass
+
+    @staticmethod
+    def is_current(summary: CharacterSummary, state: Optional[Tuple[int, int]]) -> bool:
+        """要約がエクスポートの状態 (更新時刻, サイズ) と一致するか"""
+        return state is not None and (summary.source_mtime_ns, summary.source_size) == tuple(state)
@@ -0,0 +1,234 @@
+"""
+Equipset Index - アイテムID → ゲーム内装備セットの逆引きインデックス
+
+「このアイテムをどのキャラのどのセットで使っているか」を、装備の移動や処分の前に
+すぐ調べられるようにする。USERフォルダ以下の es*.dat を解析した結果を
+data/equipset_index.json に保存し、次回以降は更新されたファイルだけを再解析する。
+"""
+
+import configparser
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import tools.parse_equipset as parse_equipset
+
+# インデックスの保存先
+DEFAULT_INDEX_PATH = Path(__file__).parent / "data" / "equipset_index.json"
+INDEX_VERSION = 1
+
+# FFXIのUSERフォルダの候補
+DEFAULT_USER_PATHS = [
+    Path(r"C:\Program Files (x86)\PlayOnline\SquareEnix\FINAL FANTASY XI\USER"),
+    Path(os.path.expanduser("~")) / "Documents" / "My Games" / "FINAL FANTASY XI" / "USER",
+]
+
+
+def find_default_user_path() -> Optional[Path]:
+    """FFXIのUSERフォルダを自動検索"""
+    for path in DEFAULT_USER_PATHS:
+        if path.exists():
+            return path
+    return None
+
+
+class CharacterNameMapper:
+    """キャラフォルダIDと表示名のマッピングを管理(names.ini)"""
+    def __init__(self, ini_path: Path):
+        self.ini_path = ini_path
+        self.config = configparser.ConfigParser()
+        self.section = "DisplayNames"
+        self.load()
+
+    def load(self):
+        if self.ini_path.exists():
+            try:
+                self.config.read(self.ini_path, encoding="utf-8")
+            except Exception as e:
+                print(f"Warning: Failed to load {self.ini_path}: {e}")
+        
+        if self.section not in self.config:
+            self.config[self.section] = {}
+
+    def get_name(self, folder_id: str) -> str:
+        return self.config[self.section].get(folder_id, folder_id)
+
+    def set_name(self, folder_id: str, display_name: str):
+        self.config[self.section][folder_id] = display_name
+        self.save()
+
+    def save(self):
+        try:
+            with open(self.ini_path, "w", encoding="utf-8") as f:
+                self.config.write(f)
+        except Exception as e:
+            print(f"Warning: Failed to save {self.ini_path}: {e}")
+
+
+@dataclass(frozen=True)
+class EquipsetRef:
+    """アイテムを使用しているゲーム内装備セットのスロット"""
+    folder: str         # キャラフォルダのパス
+    global_index: int   # セットの通し番号（1～200）
+    set_name: str
+    slot: str           # スロットキー（main, ring1 など）
+
+    @property
+    def folder_id(self) -> str:
+        """キャラフォルダ名（names.ini のキー）"""
+        return Path(self.folder).name
+
+    @property
+    def slot_name_jp(self) -> str:
+        return parse_equipset.SLOT_NAMES_JP.get(self.slot, self.slot)
+
+
+class EquipsetReverseIndex:
+    """アイテムID → 装備セット参照 の逆引きインデックス（ファイル単位で差分更新）"""
+
+    def __init__(self, index_path: Optional[Path] = None):
+        self.index_path = index_path or DEFAULT_INDEX_PATH
+        self.user_path: Optional[Path] = None
+        # es*.datのパス -> ((サイズ, 更新時刻), [(アイテムID, 通し番号, セット名, スロット), ...])
+        self._files: Dict[str, Tuple[Tuple[int, int], List[Tuple[int, int, str, str]]]] = {}
+        # アイテムID -> 参照一覧
+        self._by_item: Dict[int, List[EquipsetRef]] = {}
+        self._load()
+        if self.user_path is None:
+            self.user_path = find_default_user_path()
+
+    def _load(self):
+        """保存済みのインデックスを読み込み"""
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Warning: Failed to load {self.index_path}: {e}")
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        if data.get("user_path"):
+            self.user_path = Path(data["user_path"])
+        for path, entry in data.get("files", {}).items():
+            refs = [tuple(ref) for ref in entry.get("refs", [])]
+            self._files[path] = ((entry.get("size", -1), entry.get("mtime_ns", -1)), refs)
+        self._rebuild()
+
+    def save(self):
+        """インデックスを保存"""
+        data = {
+            "version": INDEX_VERSION,
+            "user_path": str(self.user_path) if self.user_path else None,
+            "files": {
+                path: {"size": key[0], "mtime_ns": key[1], "refs": refs}
+                for path, (key, refs) in self._files.items()
+            },
+        }
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"Warning: Failed to save {self.index_path}: {e}")
+
+    def set_user_path(self, user_path: Path):
+        """USERフォルダを変更（別のフォルダのインデックスは破棄）"""
+        user_path = Path(user_path)
+        if user_path == self.user_path:
+            return
+        self.user_path = user_path
+        self._files.clear()
+        self._by_item.clear()
+
+    def refresh(self) -> bool:
+        """USERフォルダ以下を確認し、追加・更新・削除されたes*.datだけを反映
+
+        Returns:
+            インデックスが変わった場合 True
+        """
+        if not self.user_path or not self.user_path.exists():
+            return False
+
+        changed = False
+        seen = set()
+        for folder in parse_equipset.find_character_folders(self.user_path):
+            for i in range(10):
+                filepath = folder / f"es{i}.dat"
+                try:
+                    st = filepath.stat()
+                except OSError:
+                    continue
+                path = str(filepath)
+                seen.add(path)
+                if self._refresh_file(path, i, (st.st_size, st.st_mtime_ns)):
+                    changed = True
+
+        for path in [p for p in self._files if p not in seen]:
+            del self._files[path]
+            changed = True
+
+        if changed:
+            self._rebuild()
+            self.save()
+        return changed
+
+    def refresh_file(self, filepath: Path) -> bool:
+        """1ファイル分だけを反映（ファイル監視からの通知用）"""
+        filepath = Path(filepath)
+        path = str(filepath)
+        try:
+            st = filepath.stat()
+        except OSError:
+            if self._files.pop(path, None) is None:
+                return False
+            changed = True
+        else:
+            stem = filepath.stem
+            if not (stem.startswith("es") and stem[2:].isdigit()):
+                return False
+            changed = self._refresh_file(path, int(stem[2:]), (st.st_size, st.st_mtime_ns))
+        if changed:
+            self._rebuild()
+            self.save()
+        return changed
+
+    def _refresh_file(self, path: str, file_index: int, key: Tuple[int, int]) -> bool:
+        """ファイルが更新されていれば再解析（インデックスは再構築しない）"""
+        entry = self._files.get(path)
+        if entry is not None and entry[0] == key:
+            return False
+        compact = parse_equipset.parse_equipset_file_compact(Path(path), file_index)
+        refs = []
+        if compact is not None:
+            for set_idx in range(compact.set_count):
+                base = set_idx * parse_equipset.SLOT_COUNT
+                for slot_no, slot_key in enumerate(parse_equipset.EQUIPMENT_SLOTS):
+                    item_id = compact.item_ids[base + slot_no]
+                    if item_id:
+                        refs.append((item_id, compact.global_index(set_idx), compact.names[set_idx], slot_key))
+        self._files[path] = (key, refs)
+        return True
+
+    def _rebuild(self):
+        """ファイル単位の参照からアイテムIDの逆引きを作り直す"""
+        by_item: Dict[int, List[EquipsetRef]] = {}
+        for path in sorted(self._files):
+            folder = str(Path(path).parent)
+            for item_id, global_index, set_name, slot_key in self._files[path][1]:
+                by_item.setdefault(item_id, []).append(EquipsetRef(folder, global_index, set_name, slot_key))
+        for refs in by_item.values():
+            refs.sort(key=lambda ref: (ref.folder, ref.global_index))
+        self._by_item = by_item
+
+    def lookup(self, item_id: int) -> List[EquipsetRef]:
+        """アイテムを使用しているセットの一覧（キャラフォルダ・通し番号順）"""
+        return list(self._by_item.get(item_id, ()))
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._by_item
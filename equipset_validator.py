@@ -0,0 +1,233 @@
+"""
+Equipset Validator - ゲーム内装備セットの所在チェック
+
+ゲーム内の装備セットはアイテムを (ストレージID, バッグ内インデックス) で参照するため、
+アイテムを移動すると参照が古くなる。全セットの全スロットを所持品のインデックスと
+照合し、スロットごとに次のいずれかを判定する。
+
+- その場所にある（in_place）
+- 同じキャラの別の場所に移動している（moved）
+- 別のキャラが持っている（other_character）
+- どこにもない（missing）
+
+照合はすべて辞書引きで、es*.dat は配列形式（CompactEquipsetFile）のまま読むため、
+200セット × 複数キャラでも1秒かからない。
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+import tools.parse_equipset as parse_equipset
+from live_data import LiveItem
+
+# ストレージ名のマッピング (parse_equipset -> VanaExport)
+EQUIPSET_STORAGE_MAP = {
+    "Inventory": "Inventory",
+    "Wardrobe 1": "Wardrobe",
+    "Wardrobe 2": "Wardrobe 2",
+    "Wardrobe 3": "Wardrobe 3",
+    "Wardrobe 4": "Wardrobe 4",
+    "Wardrobe 5": "Wardrobe 5",
+    "Wardrobe 6": "Wardrobe 6",
+    "Wardrobe 7": "Wardrobe 7",
+    "Wardrobe 8": "Wardrobe 8",
+    "Safe": "Safe",
+    "Safe 2": "Safe 2",
+    "Storage": "Storage",
+    "Locker": "Locker",
+    "Satchel": "Satchel",
+    "Sack": "Sack",
+    "Case": "Case",
+}
+
+
+def _item_value(item: Union[Dict[str, Any], LiveItem], key: str) -> Any:
+    """LiveItem / 辞書のどちらからでも属性値を取得"""
+    if isinstance(item, dict):
+        return item.get(key)
+    return getattr(item, key, None)
+
+
+class InventoryItemIndex:
+    """ゲーム内装備セットのスロット参照から所持品を引くハッシュインデックス
+
+    GearSet Builder を開いたときに一度だけ作成し、セットの取り込みや
+    一括チェックはスロットごとの辞書引きだけで済ませる。
+    """
+
+    def __init__(self, items: Iterable[Union[Dict[str, Any], LiveItem]]):
+        # (アイテムID, ストレージ名, バッグ内スロット) -> アイテム
+        self.by_location: Dict[Tuple[int, str, int], Union[Dict[str, Any], LiveItem]] = {}
+        # アイテムID -> アイテム（場所が一致しない場合の予備）
+        self.by_id: Dict[int, Union[Dict[str, Any], LiveItem]] = {}
+        for item in items:
+            item_id = _item_value(item, "id")
+            key = (item_id, _item_value(item, "storage"), _item_value(item, "slot"))
+            # 同じキーが複数ある場合は先に見つかったもの（従来の線形探索と同じ）を優先
+            self.by_location.setdefault(key, item)
+            self.by_id.setdefault(item_id, item)
+
+    @staticmethod
+    def map_storage(storage_name_raw: str) -> str:
+        """parse_equipset のストレージ名を VanaExport のストレージ名に変換"""
+        # ( +0x20 ) などを除去
+        storage_name = (storage_name_raw or "").split(" (")[0]
+        return EQUIPSET_STORAGE_MAP.get(storage_name, storage_name)
+
+    def find_at(self, item_id: int, storage: str,
+                bag_index: Optional[int]) -> Optional[Union[Dict[str, Any], LiveItem]]:
+        """ID + ストレージ + バッグ内インデックスで厳密に検索"""
+        if bag_index is None:
+            return None
+        # VanaExportの 'slot' と parse_equipset の 'bag_index'（1ベース）は
+        # エクスポート環境によって1ずれることがあるため両方を試す
+        item = self.by_location.get((item_id, storage, bag_index))
+        if item is None:
+            item = self.by_location.get((item_id, storage, bag_index - 1))
+        return item
+
+    def find(self, item_id: int, storage: str,
+             bag_index: Optional[int]) -> Optional[Union[Dict[str, Any], LiveItem]]:
+        """厳密に一致するアイテム、なければ同じIDのアイテムを返す"""
+        item = self.find_at(item_id, storage, bag_index)
+        if item is None:
+            item = self.by_id.get(item_id)
+        return item
+
+
+class SlotStatus:
+    """スロットの判定結果"""
+    IN_PLACE = "in_place"
+    MOVED = "moved"
+    OTHER_CHARACTER = "other_character"
+    MISSING = "missing"
+
+    LABELS = {
+        IN_PLACE: "OK",
+        MOVED: "移動済み",
+        OTHER_CHARACTER: "別キャラが所持",
+        MISSING: "見つからない",
+    }
+
+
+@dataclass(frozen=True)
+class SlotCheck:
+    """1スロット分の判定結果"""
+    global_index: int
+    set_name: str
+    slot: str
+    item_id: int
+    storage: str              # セットが参照しているストレージ（VanaExport名）
+    bag_index: int
+    status: str
+    found_storage: Optional[str] = None   # 実際にあった場所（MOVED / OTHER_CHARACTER のとき）
+    found_slot: Optional[int] = None
+    found_character: Optional[str] = None
+
+
+@dataclass
+class ValidationReport:
+    """1キャラ分（キャラフォルダ1つ分）のチェック結果"""
+    character: str
+    folder: str
+    checks: List[SlotCheck] = field(default_factory=list)
+    set_count: int = 0
+
+    def summary(self) -> Counter:
+        """判定ごとのスロット数"""
+        return Counter(check.status for check in self.checks)
+
+    def problems(self) -> List[SlotCheck]:
+        """その場所にないスロット"""
+        return [check for check in self.checks if check.status != SlotStatus.IN_PLACE]
+
+
+def validate_equipsets(compact_files: Iterable["parse_equipset.CompactEquipsetFile"],
+                       own_index: InventoryItemIndex,
+                       other_indexes: Optional[Mapping[str, InventoryItemIndex]] = None,
+                       character: str = "", folder: str = "") -> ValidationReport:
+    """キャラフォルダの全セットを所持品のインデックスと照合
+
+    Args:
+        compact_files: EquipsetCache.load() などで得た es*.dat の解析結果
+        own_index: そのキャラの所持品のインデックス
+        other_indexes: 他のキャラ名 -> 所持品のインデックス（別キャラ所持の判定用）
+    """
+    other_indexes = other_indexes or {}
+    report = ValidationReport(character=character, folder=folder)
+    # ストレージID -> VanaExportのストレージ名（IDの種類は少ないので一度だけ変換）
+    storage_names: Dict[int, str] = {}
+    slot_keys = parse_equipset.EQUIPMENT_SLOTS
+    slot_count = parse_equipset.SLOT_COUNT
+
+    for compact in compact_files:
+        storage_ids = compact.storage_ids
+        bag_indexes = compact.bag_indexes
+        item_ids = compact.item_ids
+        for set_idx in range(compact.set_count):
+            base = set_idx * slot_count
+            global_index = compact.global_index(set_idx)
+            set_name = compact.names[set_idx]
+            has_items = False
+            for slot_no in range(slot_count):
+                item_id = item_ids[base + slot_no]
+                if not item_id:
+                    continue
+                has_items = True
+                storage_id = storage_ids[base + slot_no]
+                storage = storage_names.get(storage_id)
+                if storage is None:
+                    storage = InventoryItemIndex.map_storage(parse_equipset.get_storage_name(storage_id))
+                    storage_names[storage_id] = storage
+                bag_index = bag_indexes[base + slot_no]
+
+                found_storage = found_slot = found_character = None
+                if own_index.find_at(item_id, storage, bag_index) is not None:
+                    status = SlotStatus.IN_PLACE
+                else:
+                    item = own_index.by_id.get(item_id)
+                    if item is not None:
+                        status = SlotStatus.MOVED
+                        found_storage = _item_value(item, "storage")
+                        found_slot = _item_value(item, "slot")
+                    else:
+                        status = SlotStatus.MISSING
+                        for other_name, other_index in other_indexes.items():
+                            item = other_index.by_id.get(item_id)
+                            if item is not None:
+                                status = SlotStatus.OTHER_CHARACTER
+                                found_character = other_name
+                                found_storage = _item_value(item, "storage")
+                                found_slot = _item_value(item, "slot")
+                                break
+
+                report.checks.append(SlotCheck(
+                    global_index, set_name, slot_keys[slot_no], item_id, storage, bag_index,
+                    status, found_storage, found_slot, found_character,
+                ))
+            if has_items:
+                report.set_count += 1
+    return report
+
+
+def validate_all_characters(folders: Mapping[Any, str],
+                            equipset_cache: "parse_equipset.EquipsetCache",
+                            indexes: Mapping[str, InventoryItemIndex]) -> List[ValidationReport]:
+    """複数キャラの全セットをまとめて照合
+
+    Args:
+        folders: キャラフォルダのパス（str / Path） -> キャラ名（VanaExportのキャラ名）
+        equipset_cache: es*.dat の解析結果キャッシュ
+        indexes: キャラ名 -> 所持品のインデックス（全キャラ分、各キャラで一度だけ作る）
+    """
+    reports = []
+    for folder, character in folders.items():
+        own_index = indexes.get(character)
+        if own_index is None:
+            continue
+        others = {name: index for name, index in indexes.items() if name != character}
+        reports.append(validate_equipsets(
+            equipset_cache.load(folder), own_index, others, character=character, folder=str(folder),
+        ))
+    return reports
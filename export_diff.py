@@ -0,0 +1,187 @@
+"""
+Export Diff - 同じキャラクターの2つのスナップショットの差分と変更通知
+
+所持品を (保管場所, アイテムID, extdata) -> 個数 の多重集合（辞書）にして比較するため、
+比較の計算量はアイテム数に比例する。差分は次の4種類に分類する。
+
+- added:   新しく増えたアイテム（以前はどの保管場所にもなかった分）
+- removed: なくなったアイテム（どの保管場所にも移っていない分）
+- moved:   ある保管場所で減り、別の保管場所で同じだけ増えたアイテム（同じID・extdata）
+- count:   同じ保管場所にあったまま個数だけが変わったアイテム
+
+LiveDataLoader はスナップショットを読み直すたびに前回との差分を ChangeFeed に流し、
+メインウィンドウや Search All は全体を作り直す代わりに、変化のあった分だけを反映する。
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+
+from inventory_history import StateKey, diff_states, snapshot_state
+
+if TYPE_CHECKING:
+    # live_data が差分の通知にこのモジュールを使うため、実行時には読み込まない
+    from live_data import CharacterSnapshot
+
+# キャラクターごとに保持する差分の件数
+FEED_HISTORY_SIZE = 8
+
+
+@dataclass(frozen=True)
+class ItemChange:
+    """1件の変化"""
+    kind: str                       # "added" / "removed" / "moved" / "count"
+    item_id: int
+    name: str
+    extdata: Optional[str]
+    from_storage: Optional[str]     # added では None
+    to_storage: Optional[str]       # removed では None
+    old_count: int                  # moved では移動した個数
+    new_count: int
+
+    @property
+    def amount(self) -> int:
+        """増減した（移動した）個数"""
+        if self.kind == "moved":
+            return self.old_count
+        return abs(self.new_count - self.old_count)
+
+
+@dataclass(frozen=True)
+class SnapshotDiff:
+    """1キャラクター分の差分"""
+    char_name: str
+    old_export_time: Optional[str]
+    new_export_time: Optional[str]
+    changes: Tuple[ItemChange, ...]
+    created_at: datetime = field(default_factory=datetime.now)
+
+    def __bool__(self) -> bool:
+        return bool(self.changes)
+
+    def counts(self) -> Dict[str, int]:
+        """種類ごとの件数"""
+        result = {"added": 0, "removed": 0, "moved": 0, "count": 0}
+        for change in self.changes:
+            result[change.kind] += 1
+        return result
+
+    def affected_keys(self) -> Set[Tuple[str, int]]:
+        """変化のあった (保管場所, アイテムID)"""
+        keys = set()
+        for change in self.changes:
+            if change.from_storage is not None:
+                keys.add((change.from_storage, change.item_id))
+            if change.to_storage is not None:
+                keys.add((change.to_storage, change.item_id))
+        return keys
+
+    def summary(self) -> str:
+        """一覧表示用の短い要約（例: "+3 / -1 / 移動2 / 個数4"）"""
+        counts = self.counts()
+        return f"+{counts['added']} / -{counts['removed']} / 移動{counts['moved']} / 個数{counts['count']}"
+
+
+def diff_snapshots(old: "CharacterSnapshot", new: "CharacterSnapshot") -> SnapshotDiff:
+    """2つのスナップショットの差分を求める"""
+    old_state = snapshot_state(old)
+    new_state = snapshot_state(new)
+    delta = diff_states(old_state, new_state)
+
+    names: Dict[int, str] = {}
+    for snapshot in (old, new):
+        for item in snapshot.items:
+            names.setdefault(item.id, item.name)
+
+    # 同じ (ID, extdata) の減少と増加を組にして移動とみなす
+    decreases: Dict[Tuple[int, Optional[str]], List[List]] = {}
+    increases: Dict[Tuple[int, Optional[str]], List[List]] = {}
+    for (storage, item_id, extdata), change in delta.items():
+        target = increases if change > 0 else decreases
+        target.setdefault((item_id, extdata), []).append([storage, abs(change)])
+
+    changes: List[ItemChange] = []
+    remaining: Dict[StateKey, int] = dict(delta)
+    for ident, outs in decreases.items():
+        ins = increases.get(ident)
+        if not ins:
+            continue
+        item_id, extdata = ident
+        for out in outs:
+            for entry in ins:
+                if not out[1]:
+                    break
+                moved = min(out[1], entry[1])
+                if not moved:
+                    continue
+                changes.append(ItemChange("moved", item_id, names.get(item_id, ""), extdata,
+                                          out[0], entry[0], moved, moved))
+                out[1] -= moved
+                entry[1] -= moved
+                remaining[(out[0], item_id, extdata)] += moved
+                remaining[(entry[0], item_id, extdata)] -= moved
+
+    for key, change in remaining.items():
+        if not change:
+            continue
+        storage, item_id, extdata = key
+        old_count = old_state.get(key, 0)
+        new_count = old_count + change
+        name = names.get(item_id, "")
+        if old_count and new_count:
+            changes.append(ItemChange("count", item_id, name, extdata, storage, storage, old_count, new_count))
+        elif change > 0:
+            changes.append(ItemChange("added", item_id, name, extdata, None, storage, old_count, new_count))
+        else:
+            changes.append(ItemChange("removed", item_id, name, extdata, storage, None, old_count, new_count))
+
+    changes.sort(key=lambda c: (c.kind, c.from_storage or c.to_storage or "", c.item_id))
+    return SnapshotDiff(old.char_name, old.export_time, new.export_time, tuple(changes))
+
+
+class ChangeFeed:
+    """スナップショットの差分の通知
+
+    publish() した差分は登録された関数に順に渡し、キャラクターごとに直近の数件を保持する。
+    スナップショットは別スレッドで読み込まれることもあるため、受け取る側は
+    GUIを直接操作せず、差分を記録するだけにすること。
+    """
+
+    def __init__(self, history_size: int = FEED_HISTORY_SIZE):
+        self._subscribers: List[Callable[[SnapshotDiff], None]] = []
+        self._recent: Dict[str, Deque[SnapshotDiff]] = {}
+        self._history_size = history_size
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[SnapshotDiff], None]):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[SnapshotDiff], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, diff: SnapshotDiff):
+        with self._lock:
+            self._recent.setdefault(diff.char_name, deque(maxlen=self._history_size)).append(diff)
+        for callback in list(self._subscribers):
+            try:
+                callback(diff)
+            except Exception as e:
+                print(f"Warning: change feed subscriber failed: {e}")
+
+    def latest(self, char_name: str) -> Optional[SnapshotDiff]:
+        """キャラクターの直近の差分"""
+        with self._lock:
+            recent = self._recent.get(char_name)
+            return recent[-1] if recent else None
+
+    def recent(self, char_name: str) -> List[SnapshotDiff]:
+        """キャラクターの直近の差分（古い順）"""
+        with self._lock:
+            return list(self._recent.get(char_name, ()))
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
@@ -0,0 +1,207 @@
+"""
+GearSet Store - GearSet Builder の保存済みセットのライブラリ（SQLite）
+
+保存済みセットをキャラクター・ジョブごとに data/gearsets.db に保持する。
+セットの保存・削除はそのセットの行だけを書き換え、ビルダーを開いたときの読み込み、
+セット一覧、「このアイテムを使っている保存済みセット」の検索はインデックスを引くだけで済む。
+"""
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from live_data import LiveItem
+
+# ライブラリの保存先
+DEFAULT_STORE_PATH = Path(__file__).parent / "data" / "gearsets.db"
+
+# 全ジョブ共通のセット（GearSetPanel の job_id=None）はジョブID 0 として保存する
+ALL_JOBS_ID = 0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gear_sets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    character TEXT NOT NULL,
+    job_id INTEGER NOT NULL,
+    set_name TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (character, job_id, set_name)
+);
+CREATE TABLE IF NOT EXISTS gear_set_items (
+    set_id INTEGER NOT NULL REFERENCES gear_sets(id) ON DELETE CASCADE,
+    slot_key TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    name TEXT,
+    storage TEXT,
+    bag_slot INTEGER,
+    augments TEXT,
+    PRIMARY KEY (set_id, slot_key)
+);
+CREATE INDEX IF NOT EXISTS idx_gear_sets_job ON gear_sets(job_id);
+CREATE INDEX IF NOT EXISTS idx_gear_set_items_item ON gear_set_items(item_id);
+"""
+
+Item = Union[Dict[str, Any], LiveItem]
+
+
+def _value(item: Item, key: str) -> Any:
+    if isinstance(item, dict):
+        return item.get(key)
+    return getattr(item, key, None)
+
+
+@dataclass(frozen=True)
+class SavedSetRef:
+    """アイテムを使用している保存済みセットのスロット"""
+    character: str
+    job_id: Optional[int]   # None = 全ジョブ共通
+    set_name: str
+    slot: str               # スロットキー（main, ring1 など）
+
+
+class GearSetStore:
+    """保存済みセットのライブラリ"""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path or DEFAULT_STORE_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _job_key(job_id: Optional[int]) -> int:
+        return job_id or ALL_JOBS_ID
+
+    def save_set(self, character: str, job_id: Optional[int], set_name: str, slots: Mapping[str, Item]) -> bool:
+        """1セットを保存（同名のセットは置き換え）"""
+        rows = []
+        for slot_key, item in slots.items():
+            augments = _value(item, "augments")
+            rows.append((
+                slot_key,
+                _value(item, "id") or 0,
+                _value(item, "name"),
+                _value(item, "storage"),
+                _value(item, "slot"),
+                json.dumps(list(augments), ensure_ascii=False) if augments else None,
+            ))
+        key = (character, self._job_key(job_id), set_name)
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO gear_sets (character, job_id, set_name, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (character, job_id, set_name) DO UPDATE SET updated_at = excluded.updated_at",
+                    key + (time.time(),),
+                )
+                set_id = self.conn.execute(
+                    "SELECT id FROM gear_sets WHERE character = ? AND job_id = ? AND set_name = ?", key
+                ).fetchone()[0]
+                self.conn.execute("DELETE FROM gear_set_items WHERE set_id = ?", (set_id,))
+                self.conn.executemany(
+                    "INSERT INTO gear_set_items (set_id, slot_key, item_id, name, storage, bag_slot, augments) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(set_id,) + row for row in rows],
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to save gear set '{set_name}': {e}")
+            return False
+        return True
+
+    def delete_set(self, character: str, job_id: Optional[int], set_name: str) -> bool:
+        """1セットを削除（スロットの行も連鎖して削除）"""
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM gear_sets WHERE character = ? AND job_id = ? AND set_name = ?",
+                    (character, self._job_key(job_id), set_name),
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to delete gear set '{set_name}': {e}")
+            return False
+        return True
+
+    def list_sets(self, character: str, job_id: Optional[int]) -> List[str]:
+        """キャラクター・ジョブのセット名一覧（名前順）"""
+        cur = self.conn.execute(
+            "SELECT set_name FROM gear_sets WHERE character = ? AND job_id = ? ORDER BY set_name",
+            (character, self._job_key(job_id)),
+        )
+        return [row[0] for row in cur]
+
+    def load_character(self, character: str,
+                       inventory_items: Optional[Iterable[Item]] = None
+                       ) -> Dict[Optional[int], Dict[str, Dict[str, Item]]]:
+        """キャラクターの全セットを GearSetPanel.gear_sets_by_job の形式で読み込む
+
+        inventory_items を渡すと、保存時と同じ装備（場所・ID一致、次にID・オーグメント一致）を
+        所持品から探して差し替える。見つからない装備は保存時の情報の辞書のまま返す。
+        移動された装備は、同じIDの装備のうち他の保存位置に割り当てていないものを1個ずつ割り当てる
+        （保存時の位置が同じなら、どのセットでも同じ装備）。
+        """
+        by_key: Dict[Tuple[Any, Any, int], Item] = {}
+        by_id: Dict[int, List[Item]] = {}
+        for item in inventory_items or ():
+            item_id = _value(item, "id") or 0
+            key = (_value(item, "storage"), _value(item, "slot"), item_id)
+            if key not in by_key:
+                by_key[key] = item
+                by_id.setdefault(item_id, []).append(item)
+
+        rows = self.conn.execute(
+            "SELECT s.job_id, s.set_name, i.slot_key, i.item_id, i.name, i.storage, i.bag_slot, i.augments "
+            "FROM gear_sets s JOIN gear_set_items i ON i.set_id = s.id "
+            "WHERE s.character = ? ORDER BY s.job_id, s.id",
+            (character,),
+        ).fetchall()
+        # 保存位置にそのままある装備は、移動された装備の候補にしない
+        taken = {id(by_key[key]) for key in {(row[5], row[6], row[3]) for row in rows} if key in by_key}
+        relocated: Dict[Tuple[Any, Any, int], Optional[Item]] = {}
+
+        result: Dict[Optional[int], Dict[str, Dict[str, Item]]] = {}
+        for job_id, set_name, slot_key, item_id, name, storage, bag_slot, augments_json in rows:
+            augments = json.loads(augments_json) if augments_json else None
+            saved_key = (storage, bag_slot, item_id)
+            item = by_key.get(saved_key)
+            if item is None and by_id.get(item_id):
+                if saved_key not in relocated:
+                    found = next(
+                        (c for c in by_id[item_id]
+                         if id(c) not in taken and (_value(c, "augments") or None) == augments),
+                        None,
+                    )
+                    if found is not None:
+                        taken.add(id(found))
+                    relocated[saved_key] = found
+                item = relocated[saved_key]
+            if item is None:
+                item = {
+                    "id": item_id, "name": name or f"ID:{item_id}", "storage": storage,
+                    "slot": bag_slot, "augments": augments,
+                }
+            job_key = job_id if job_id != ALL_JOBS_ID else None
+            result.setdefault(job_key, {}).setdefault(set_name, {})[slot_key] = item
+        return result
+
+    def find_sets_using(self, item_id: int, character: Optional[str] = None) -> List[SavedSetRef]:
+        """アイテムを使用している保存済みセット（キャラクター・ジョブ・セット名順）"""
+        sql = (
+            "SELECT s.character, s.job_id, s.set_name, i.slot_key "
+            "FROM gear_set_items i JOIN gear_sets s ON s.id = i.set_id WHERE i.item_id = ?"
+        )
+        params: List[Any] = [item_id]
+        if character is not None:
+            sql += " AND s.character = ?"
+            params.append(character)
+        sql += " ORDER BY s.character, s.job_id, s.set_name"
+        return [
+            SavedSetRef(char, job_id if job_id != ALL_JOBS_ID else None, set_name, slot_key)
+            for char, job_id, set_name, slot_key in self.conn.execute(sql, params)
+        ]
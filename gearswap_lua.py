@@ -0,0 +1,195 @@
+"""
+GearSwap Lua - 装備セットからGearSwap形式のLuaコードを生成
+
+GearSet Builder とコマンドラインツールの共通部分（Qtに依存しない）。
+セットごとのLua断片はキャッシュし、変更されたセットだけを作り直す。
+出力全体は断片を順に返すジェネレータで組み立て、ファイルにはそのまま逐次書き込める。
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
+
+# GearSwap Lua出力用のスロット名マッピング
+LUA_SLOT_MAP = {
+    "main": "main",
+    "sub": "sub",
+    "range": "range",
+    "ammo": "ammo",
+    "head": "head",
+    "body": "body",
+    "hands": "hands",
+    "legs": "legs",
+    "feet": "feet",
+    "neck": "neck",
+    "waist": "waist",
+    "ear1": "left_ear",
+    "ear2": "right_ear",
+    "ring1": "left_ring",
+    "ring2": "right_ring",
+    "back": "back",
+}
+
+# GearSwap Lua出力用の標準的な並び順
+LUA_SLOT_ORDER = [
+    "main", "sub", "range", "ammo",
+    "head", "body", "hands", "legs", "feet",
+    "neck", "waist", "ear1", "ear2", "ring1", "ring2", "back"
+]
+
+# get_sets() の後ろに出力する定型部分
+GEARSWAP_FOOTER = "\n".join([
+    "    return sets",
+    "end",
+    "",
+    "-- Precast",
+    "function precast(spell)",
+    "    -- FastCast装備などを設定",
+    "    -- if spell.action_type == 'Magic' then",
+    "    --     equip(sets.FastCast)",
+    "    -- end",
+    "end",
+    "",
+    "-- Midcast",
+    "function midcast(spell)",
+    "    -- 詠唱完了時の装備を設定",
+    "end",
+    "",
+    "-- Aftercast",
+    "function aftercast(spell)",
+    "    -- 待機装備に戻す",
+    "    -- equip(sets.Idle)",
+    "end",
+])
+
+
+def get_item_lua_info(item: Any) -> Tuple[str, str]:
+    """アイテムからLua出力用の情報を取得
+
+    Returns:
+        (item_name, augments_str)
+    """
+    # LiveItemかDictかを判定
+    if hasattr(item, 'name'):
+        # LiveItem - 日本語名を使用
+        item_name = item.name
+        augments = item.augments if hasattr(item, 'augments') else None
+    else:
+        # Dict
+        item_name = item.get("name", "Unknown")
+        augments = item.get("augments")
+
+    # 特殊文字のエスケープ（ダブルクォートのみ）
+    item_name = item_name.replace('"', '\\"')
+
+    # オーグメント文字列を生成
+    aug_str = ""
+    if augments and len(augments) > 0:
+        # GearSwapで一般的なシングルクォート形式を使用し、最後にカンマを含めるのがGearSwap流
+        aug_str = ",".join(f"'{aug}'" for aug in augments) + ","
+
+    return item_name, aug_str
+
+
+def render_set(set_name: str, slots: Mapping[str, Any], indent: str = "", comment: bool = False) -> str:
+    """1セット分のLuaコード（最終行の後に改行なし）
+
+    Args:
+        indent: sets[...] 行のインデント（スロット行はさらに4文字下げる）
+        comment: セット名のコメント行を先頭に付ける
+    """
+    lines = []
+    if comment:
+        lines.append(f"{indent}-- {set_name}")
+    lines.append(f"{indent}sets['{set_name}'] = {{")
+    # 定義された順序に従って出力
+    for slot_key in LUA_SLOT_ORDER:
+        if slot_key not in slots:
+            continue
+        lua_slot = LUA_SLOT_MAP.get(slot_key, slot_key)
+        item_name, augments = get_item_lua_info(slots[slot_key])
+        if augments:
+            # オーグメント付き
+            lines.append(f"{indent}    {lua_slot}={{name=\"{item_name}\", augments={{{augments}}}}},")
+        else:
+            lines.append(f"{indent}    {lua_slot}=\"{item_name}\",")
+    lines.append(f"{indent}}}")
+    return "\n".join(lines)
+
+
+def gearswap_header(now: Optional[datetime] = None) -> str:
+    """GearSwapファイルの先頭（get_sets() の開始まで、末尾改行付き）"""
+    now = now or datetime.now()
+    return "\n".join([
+        "---------------------------------------------------",
+        "-- GearSwap Lua - Generated by VanaInventory",
+        f"-- Date: {now.strftime('%Y-%m-%d %H:%M:%S')}",
+        "---------------------------------------------------",
+        "",
+        "function get_sets()",
+        "    sets = {}",
+        "",
+    ]) + "\n"
+
+
+class LuaFragmentCache:
+    """保存済みセットごとのLua断片のキャッシュ
+
+    キーは (ジョブID, セット名)。セットを保存・削除したときに invalidate() を呼ぶと、
+    そのセットの断片だけが次回作り直される。
+    """
+
+    def __init__(self):
+        self._fragments: Dict[Tuple[Any, str], str] = {}
+
+    def get(self, job_id: Any, set_name: str, slots: Mapping[str, Any]) -> str:
+        """GearSwapファイル内の1セット分（コメント行・空行付き、末尾改行付き）"""
+        key = (job_id, set_name)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            fragment = render_set(set_name, slots, indent="    ", comment=True) + "\n\n"
+            self._fragments[key] = fragment
+        return fragment
+
+    def invalidate(self, job_id: Any, set_name: Optional[str] = None):
+        """セット（set_name 省略時はジョブの全セット）の断片を破棄"""
+        if set_name is not None:
+            self._fragments.pop((job_id, set_name), None)
+        else:
+            for key in [k for k in self._fragments if k[0] == job_id]:
+                del self._fragments[key]
+
+    def clear(self):
+        self._fragments.clear()
+
+
+def iter_gearswap_lua(sets_by_job: Mapping[Any, Mapping[str, Mapping[str, Any]]],
+                      job_label: Callable[[Any], str],
+                      cache: Optional[LuaFragmentCache] = None,
+                      extra_set: Optional[Tuple[str, Mapping[str, Any]]] = None,
+                      now: Optional[datetime] = None) -> Iterator[str]:
+    """GearSwap完全版のLuaコードを断片ごとに返す
+
+    Args:
+        sets_by_job: ジョブID -> セット名 -> {スロット: 装備}
+        job_label: ジョブIDからコメント用のラベルを返す関数
+        cache: セットごとの断片キャッシュ（省略時は毎回生成）
+        extra_set: 未保存のセット (セット名, {スロット: 装備})
+    """
+    cache = cache or LuaFragmentCache()
+    yield gearswap_header(now)
+    # 全ジョブの保存済みセットを出力
+    for job_id, sets in sets_by_job.items():
+        yield f"    -- Job: {job_label(job_id)}\n"
+        for set_name, slots in sets.items():
+            yield cache.get(job_id, set_name, slots)
+    if extra_set is not None:
+        set_name, slots = extra_set
+        yield render_set(set_name, slots, indent="    ") + "\n\n"
+    yield GEARSWAP_FOOTER
+
+
+def write_gearswap_lua(path, chunks: Iterator[str]):
+    """断片を順にファイルへ書き込む（全体を文字列に組み立てない）"""
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(chunk)
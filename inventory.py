@@ -1,15 +1,144 @@
+import operator
+import os
+import sys
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from itertools import compress
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterable, Optional, List, Tuple
 import struct
 import binascii
 import json
-import csv
 import sqlite3
 
+import report_export
+
 # アイテム辞書DBのデフォルトパス（プロジェクト内の data/items.db）
 # このファイルがなくてもアプリケーションは動作します（アイテム名が表示されないだけ）
 DEFAULT_DB_PATH = Path(__file__).parent / "data" / "items.db"
 
+# ストレージファイル (*.dat) の構造: ヘッダー16バイト + 8バイトのレコードの並び
+# レコード: アイテムID(<H) + パラメータ1(<H、スロット番号) + パラメータ2(<I)
+STORAGE_HEADER_SIZE = 16
+STORAGE_RECORD = struct.Struct("<HHI")
+# 空き枠・無効レコードのアイテムID
+INVALID_ITEM_IDS = (0, 0xFFFF)
+_is_invalid_id = frozenset(INVALID_ITEM_IDS).__contains__
+# param1 をスロット番号とみなす上限
+MAX_SLOT_ID = 80
+# 全キャラクタースキャンの並列数
+SCAN_WORKERS = 8
+
+
+class CompactStorageFile:
+    """1ストレージファイル分の有効なレコード（列ごとの配列で保持）
+
+    アイテム名や辞書は保持せず、item() / to_items() で取り出すときに作る。
+    """
+
+    __slots__ = ("filename", "indexes", "ids", "param1s", "param2s")
+
+    def __init__(self, filename: str, indexes: array, ids: array, param1s: array, param2s: array):
+        self.filename = filename
+        self.indexes = indexes    # ファイル内のレコード番号
+        self.ids = ids
+        self.param1s = param1s
+        self.param2s = param2s
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def slot(self, i: int) -> int:
+        """スロット番号（param1 が範囲外なら -1）"""
+        param1 = self.param1s[i]
+        return param1 if param1 <= MAX_SLOT_ID else -1
+
+    def slot_order(self) -> List[int]:
+        """スロット順の並び（スロット番号が無効なものは後ろへ）"""
+        keys = [param1 if 0 < param1 <= MAX_SLOT_ID else 9999 for param1 in self.param1s]
+        return sorted(range(len(keys)), key=keys.__getitem__)
+
+    def reordered(self, order: List[int]) -> "CompactStorageFile":
+        """order の順に並べ替えた配列（同じ順なら自身）"""
+        if order == list(range(len(self.ids))):
+            return self
+        return CompactStorageFile(
+            self.filename,
+            array("I", [self.indexes[i] for i in order]),
+            array("H", [self.ids[i] for i in order]),
+            array("H", [self.param1s[i] for i in order]),
+            array("I", [self.param2s[i] for i in order]),
+        )
+
+    def item(self, i: int, item_dict: Dict[int, str]) -> Dict[str, Any]:
+        """i 番目のレコードを parse_file() と同じ辞書形式で取得"""
+        item_id = self.ids[i]
+        return {
+            "index": self.indexes[i],
+            "id": item_id,
+            "hex_id": f"0x{item_id:04X}",
+            "name": item_dict.get(item_id, f"Unknown Item ({item_id})"),
+            "param1": self.param1s[i],
+            "slot": self.slot(i),
+            "param2": self.param2s[i],
+        }
+
+    def to_items(self, item_dict: Dict[int, str], order: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        if order is not None:
+            return [self.item(i, item_dict) for i in order]
+        get_name = item_dict.get
+        return [
+            {
+                "index": index,
+                "id": item_id,
+                "hex_id": f"0x{item_id:04X}",
+                "name": get_name(item_id, f"Unknown Item ({item_id})"),
+                "param1": param1,
+                "slot": param1 if param1 <= MAX_SLOT_ID else -1,
+                "param2": param2,
+            }
+            for index, item_id, param1, param2 in zip(self.indexes, self.ids, self.param1s, self.param2s)
+        ]
+
+
+def parse_storage_file_compact(file_path: Path) -> Optional[CompactStorageFile]:
+    """ストレージファイルを列ごとの配列に一括で読み込む
+
+    レコード部分を uint16 / uint32 の配列としてまとめて読み、ストライド付きスライスで
+    列に分ける（レコードごとの unpack をしない）。無効なアイテムIDの行は、有効な行の
+    選択子（bytes）を作って itertools.compress で各列からまとめて除く。
+    """
+    try:
+        data = file_path.read_bytes()
+    except OSError:
+        return None
+
+    count = max(0, (len(data) - STORAGE_HEADER_SIZE) // STORAGE_RECORD.size)
+    body = memoryview(data)[STORAGE_HEADER_SIZE:STORAGE_HEADER_SIZE + count * STORAGE_RECORD.size]
+    words = array("H")
+    words.frombytes(body)
+    dwords = array("I")
+    dwords.frombytes(body)
+    if sys.byteorder != "little":
+        words.byteswap()
+        dwords.byteswap()
+    ids = words[0::4]
+    param1s = words[1::4]
+    param2s = dwords[1::2]
+
+    invalid_count = sum(ids.count(item_id) for item_id in INVALID_ITEM_IDS)
+    if not invalid_count:
+        indexes = array("I", range(count))
+    else:
+        valid = bytes(map(operator.not_, map(_is_invalid_id, ids)))
+        indexes = array("I", compress(range(count), valid))
+        ids = array("H", compress(ids, valid))
+        param1s = array("H", compress(param1s, valid))
+        param2s = array("I", compress(param2s, valid))
+    return CompactStorageFile(file_path.name, indexes, ids, param1s, param2s)
+
+
 class InventoryParser:
     # 判明しているファイルマッピング
     # ユーザー情報と解析結果からの仮説を含む
@@ -33,11 +162,21 @@ class InventoryParser:
         "wr_8.dat": "Mog Wardrobe 8",
     }
 
-    def __init__(self, user_path: Optional[str] = None, db_path: Optional[str] = None):
+    def __init__(self, user_path: Optional[str] = None, db_path: Optional[str] = None,
+                 item_dict: Optional[Dict[int, str]] = None,
+                 category_dict: Optional[Dict[int, tuple]] = None):
+        """
+        Args:
+            item_dict / category_dict: 読み込み済みのアイテム情報（渡した場合はDBを読まない）
+        """
         self.user_path = Path(user_path) if user_path else None
         self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
-        self.item_dict = self._load_item_dictionary()
-        self.category_dict = self._load_item_categories()
+        self.item_dict = item_dict if item_dict is not None else self._load_item_dictionary()
+        self.category_dict = category_dict if category_dict is not None else self._load_item_categories()
+        # ファイルごとの解析結果: パス -> ((サイズ, 更新時刻), スロット順に並べた配列)
+        # アイテム名・辞書はキャッシュせず、取り出すたびに作る
+        self._file_cache: Dict[str, Tuple[Tuple[int, int], Optional[CompactStorageFile]]] = {}
+        self._cache_lock = threading.Lock()
 
     def _load_item_dictionary(self) -> Dict[int, str]:
         """アイテム辞書DBからアイテム名を読み込む（オプション機能）"""
@@ -100,46 +239,52 @@ class InventoryParser:
         .datファイルを読み込み、アイテムリストを返す。
         リストの要素: {'slot': int, 'id': int, 'hex_id': str, 'name': str}
         """
-        if not file_path.exists():
+        compact = parse_storage_file_compact(file_path)
+        if compact is None:
             return []
+        return compact.to_items(self.item_dict)
 
-        data = file_path.read_bytes()
-        header_size = 16
-        rec_size = 8
-        
-        items = []
-        count = (len(data) - header_size) // rec_size
-        
-        is_sort_file = file_path.name.lower() == "is.dat"
-        
-        for i in range(count): 
-            offset = header_size + i * rec_size
-            chunk = data[offset : offset + rec_size]
-            
-            item_id = struct.unpack_from('<H', chunk, 0)[0]
-            param1 = struct.unpack_from('<H', chunk, 2)[0]
-            param2 = struct.unpack_from('<I', chunk, 4)[0]
-            
-            # 有効なアイテムのみ抽出
-            if item_id != 0 and item_id != 0xFFFF:
-                # スロットIDの判定
-                # is.dat以外で、param1が80以下ならそれをスロット番号とみなす
-                slot_id = param1 if param1 <= 80 else -1
-                
-                # is.datの場合は全て出力、それ以外は有効なスロットのみ出力（オプション）
-                # ここでは解析のため全て出すが、ビューア表示時はslot_idでソートする
-                
-                items.append({
-                    "index": i,
-                    "id": item_id,
-                    "hex_id": f"0x{item_id:04X}",
-                    "name": self.get_item_name(item_id),
-                    "param1": param1,
-                    "slot": slot_id,
-                    "param2": param2
-                })
-                    
-        return items
+    def load_storage(self, file_path: Path) -> Optional[CompactStorageFile]:
+        """ストレージファイルの有効なレコード（スロット順、スロットIDが無効なものは後ろへ）
+
+        サイズ・更新時刻が変わっていなければ前回解析した配列を返す。
+        """
+        try:
+            st = file_path.stat()
+        except OSError:
+            return None
+        path = str(file_path)
+        key = (st.st_size, st.st_mtime_ns)
+        with self._cache_lock:
+            entry = self._file_cache.get(path)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        compact = parse_storage_file_compact(file_path)
+        if compact is not None:
+            compact = compact.reordered(compact.slot_order())
+        with self._cache_lock:
+            self._file_cache[path] = (key, compact)
+        return compact
+
+    def _load_storage_items(self, file_path: Path) -> List[Dict[str, Any]]:
+        """ストレージファイルのアイテム（スロット順の辞書、呼び出しごとに作る）"""
+        compact = self.load_storage(file_path)
+        return compact.to_items(self.item_dict) if compact else []
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._file_cache.clear()
+
+    def find_character_ids(self) -> List[str]:
+        """USERフォルダ直下で、ストレージファイルを含むキャラフォルダのID一覧"""
+        if not self.user_path or not self.user_path.exists():
+            return []
+        char_ids = []
+        with os.scandir(self.user_path) as entries:
+            for entry in entries:
+                if entry.is_dir() and any(os.path.exists(os.path.join(entry.path, f)) for f in self.FILE_MAPPING):
+                    char_ids.append(entry.name)
+        return sorted(char_ids)
 
     def scan_character(self, char_id: str) -> Dict[str, Any]:
         """指定キャラクターの全インベントリファイルをスキャンする"""
@@ -156,106 +301,80 @@ class InventoryParser:
         }
 
         for fname, label in self.FILE_MAPPING.items():
-            fpath = char_dir / fname
-            if fpath.exists():
-                items = self.parse_file(fpath)
-                if items:
-                    # Slot順にソート（スロットIDが無効なものは後ろへ）
-                    items.sort(key=lambda x: x['slot'] if x['slot'] > 0 else 9999)
-                    
-                    result["storages"][label] = {
-                        "filename": fname,
-                        "count": len(items),
-                        "items": items
-                    }
+            items = self._load_storage_items(char_dir / fname)
+            if items:
+                result["storages"][label] = {
+                    "filename": fname,
+                    "count": len(items),
+                    "items": items
+                }
                     
         return result
 
+    def scan_all_characters(self, char_ids: Optional[Iterable[str]] = None,
+                            workers: int = SCAN_WORKERS) -> Dict[str, Any]:
+        """USERフォルダ以下の全キャラクターを並列にスキャンする（ゲームを起動していなくても使える）
+
+        ファイルの解析結果はサイズ・更新時刻でキャッシュするため、2回目以降は
+        更新されたファイルだけを読み直す。
+
+        Returns:
+            {
+                "characters": {キャラID: scan_character() の結果},
+                "items_by_id": {アイテムID: [{"character_id", "storage", "slot"}, ...]},
+            }
+        """
+        char_ids = list(char_ids) if char_ids is not None else self.find_character_ids()
+        if len(char_ids) <= 1:
+            scans = [self.scan_character(char_id) for char_id in char_ids]
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                scans = list(executor.map(self.scan_character, char_ids))
+
+        characters: Dict[str, Dict[str, Any]] = {}
+        items_by_id: Dict[int, List[Dict[str, Any]]] = {}
+        for char_id, scan in zip(char_ids, scans):
+            if not scan:
+                continue
+            characters[char_id] = scan
+            # 全キャラ横断検索用にアイテムIDの索引を作る
+            for label, content in scan["storages"].items():
+                for item in content["items"]:
+                    items_by_id.setdefault(item["id"], []).append({
+                        "character_id": char_id,
+                        "storage": label,
+                        "slot": item["slot"],
+                    })
+        return {"characters": characters, "items_by_id": items_by_id}
+
     def export_to_html(self, data: Dict[str, Any], output_path: str):
-        """HTML形式でレポートを出力"""
+        """HTML形式でレポートを出力（出力先が .gz なら gzip 圧縮）"""
         char_id = data.get("character_id", "unknown")
-        
-        html = [
-            "<html><head>",
-            "<meta charset='utf-8'>",
-            "<style>",
-            "body { font-family: sans-serif; background: #f0f0f0; padding: 20px; }",
-            "h1 { color: #333; }",
-            ".storage-box { background: white; margin-bottom: 20px; padding: 15px; border-radius: 5px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }",
-            "h2 { border-bottom: 2px solid #eee; padding-bottom: 10px; color: #555; }",
-            "table { width: 100%; border-collapse: collapse; font-size: 14px; }",
-            "th, td { padding: 8px; text-align: left; border-bottom: 1px solid #ddd; }",
-            "th { background-color: #f8f9fa; }",
-            ".slot { width: 50px; font-weight: bold; color: #666; }",
-            ".id { width: 80px; color: #999; font-family: monospace; }",
-            ".name { font-weight: bold; color: #2c3e50; }",
-            "</style>",
-            f"<title>Inventory Report: {char_id}</title>",
-            "</head><body>",
-            f"<h1>Character Inventory: {char_id}</h1>"
-        ]
-        
-        # ストレージごとにテーブル作成
-        # 定義順に表示したいのでFILE_MAPPINGの順序を参照
-        ordered_labels = [v for k, v in self.FILE_MAPPING.items()]
-        
-        # 実際にデータがあるストレージのみ抽出してソート
-        existing_storages = []
-        for label in ordered_labels:
-            if label in data["storages"]:
-                existing_storages.append((label, data["storages"][label]))
-        
-        # マッピングにないがデータがあるもの（念のため）
-        for label, content in data["storages"].items():
-            if label not in ordered_labels:
-                existing_storages.append((label, content))
-
-        for label, content in existing_storages:
-            items = content["items"]
-            html.append(f"<div class='storage-box'>")
-            html.append(f"<h2>{label} ({content['filename']}) - {len(items)} items</h2>")
-            html.append("<table>")
-            html.append("<tr><th>Slot</th><th>ID</th><th>Name</th><th>Raw Index</th><th>Param1</th></tr>")
-            
-            for item in items:
-                slot_display = item['slot'] if item['slot'] > 0 else "-"
-                html.append(f"<tr>")
-                html.append(f"<td class='slot'>{slot_display}</td>")
-                html.append(f"<td class='id'>{item['id']}</td>")
-                html.append(f"<td class='name'>{item['name']}</td>")
-                html.append(f"<td>{item['index']}</td>")
-                html.append(f"<td>{item['param1']}</td>")
-                html.append(f"</tr>")
-            
-            html.append("</table></div>")
-            
-        html.append("</body></html>")
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("\n".join(html))
+        groups = report_export.scan_groups(data, list(self.FILE_MAPPING.values()))
+        with report_export.open_report(output_path) as f:
+            report_export.write_html_report(groups, f, f"Inventory Report: {char_id}")
         print(f"Exported HTML to {output_path}")
 
     def export_to_csv(self, data: Dict[str, Any], output_path: str):
-        """CSV形式でエクスポート"""
-        with open(output_path, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Storage", "Filename", "Slot", "ItemID", "HexID", "Name", "RecordIndex", "Param1"])
-            
-            for storage_name, content in data.get("storages", {}).items():
-                fname = content["filename"]
-                for item in content["items"]:
-                    writer.writerow([
-                        storage_name,
-                        fname,
-                        item["slot"] if item["slot"] > 0 else "",
-                        item["id"],
-                        item["hex_id"],
-                        item["name"],
-                        item["index"],
-                        item["param1"]
-                    ])
+        """CSV形式でエクスポート（出力先が .gz なら gzip 圧縮）"""
+        groups = report_export.scan_groups(data, list(self.FILE_MAPPING.values()))
+        with report_export.open_report(output_path) as f:
+            report_export.write_csv_report(groups, f)
         print(f"Exported CSV to {output_path}")
 
+    def export_all(self, output_path: str, char_ids: Optional[Iterable[str]] = None) -> int:
+        """全キャラクター（または char_ids）のレポートを1ファイルに逐次出力
+
+        形式は拡張子（.html / .csv、.gz 付きなら gzip 圧縮）で決まる。
+        キャラクターは1人ずつ読み込んで書き出すため、メモリ使用量はキャラ数によらず一定。
+
+        Returns:
+            書き出したアイテム数
+        """
+        count = report_export.write_report(report_export.parser_groups(self, char_ids), output_path)
+        print(f"Exported {count} items to {output_path}")
+        return count
+
 
 # FFXIの「せいとん」順序定義
 # クリスタル → 薬品 → 食事 → 武器 → 防具 → その他素材
@@ -0,0 +1,278 @@
+"""
+Inventory History - キャラクターごとの所持品の履歴（追記のみ、差分圧縮）
+
+VanaExport は実行のたびに前回のJSONを上書きするため、取り込むたびに所持品を
+(保管場所, アイテムID, extdata) ごとの個数の多重集合として data/history.db に記録する。
+
+- 通常は前回との差分（個数の増減）だけを zlib 圧縮したJSONで追記する
+- CHECKPOINT_INTERVAL 回ごとに全体（チェックポイント）を記録し、復元時に読む差分の数を抑える
+- 差分に含まれる (アイテムID, 保管場所) は別表にインデックスし、
+  「このアイテムがいつ金庫2から出たか」は該当する差分だけを読んで求める
+- 「先週火曜時点の所持品」は直前のチェックポイントとそれ以降の差分から復元する
+
+行の更新・削除はせず、追記だけを行う。
+"""
+
+import json
+import sqlite3
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # live_data から（export_diff 経由で）読み込まれるため、実行時には読み込まない
+    from live_data import CharacterSnapshot
+
+# 履歴の保存先
+DEFAULT_HISTORY_PATH = Path(__file__).parent / "data" / "history.db"
+
+# この回数の差分ごとにチェックポイント（全体）を記録する
+CHECKPOINT_INTERVAL = 16
+
+# 所持品の多重集合のキー: (保管場所, アイテムID, extdata)
+StateKey = Tuple[str, int, Optional[str]]
+InventoryState = Dict[StateKey, int]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    character TEXT NOT NULL,
+    taken_at REAL NOT NULL,
+    export_time TEXT,
+    checkpoint INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history_changes (
+    entry_id INTEGER NOT NULL REFERENCES history_entries(id),
+    item_id INTEGER NOT NULL,
+    storage TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_entries_character ON history_entries(character, taken_at);
+CREATE INDEX IF NOT EXISTS idx_history_changes_item ON history_changes(item_id, storage);
+"""
+
+When = Union[datetime, float]
+
+
+@dataclass(frozen=True)
+class HistoryEvent:
+    """履歴上の個数の増減"""
+    taken_at: datetime
+    export_time: Optional[str]
+    storage: str
+    item_id: int
+    extdata: Optional[str]
+    change: int   # 正 = 増えた / 負 = 減った（なくなった）
+
+
+def snapshot_state(snapshot: "CharacterSnapshot") -> InventoryState:
+    """スナップショットの所持品を (保管場所, アイテムID, extdata) -> 個数 の多重集合にする"""
+    state: Counter = Counter()
+    for item in snapshot.items:
+        state[(item.storage, item.id, item.extdata)] += item.count
+    return dict(state)
+
+
+def snapshot_time(snapshot: "CharacterSnapshot") -> float:
+    """スナップショットの時刻（エクスポート時刻、読めなければファイルの更新時刻）"""
+    if snapshot.export_time:
+        try:
+            return datetime.strptime(snapshot.export_time, "%Y-%m-%d %H:%M:%S").timestamp()
+        except ValueError:
+            pass
+    return snapshot.source_mtime_ns / 1e9
+
+
+def diff_states(old: InventoryState, new: InventoryState) -> InventoryState:
+    """old から new への個数の増減（変化のないキーは含まない）"""
+    delta = {}
+    for key, count in new.items():
+        change = count - old.get(key, 0)
+        if change:
+            delta[key] = change
+    for key, count in old.items():
+        if key not in new:
+            delta[key] = -count
+    return delta
+
+
+def _encode(state: InventoryState) -> bytes:
+    rows = [[storage, item_id, extdata, count] for (storage, item_id, extdata), count in state.items()]
+    return zlib.compress(json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _decode(payload: bytes) -> InventoryState:
+    return {
+        (storage, item_id, extdata): count
+        for storage, item_id, extdata, count in json.loads(zlib.decompress(payload).decode("utf-8"))
+    }
+
+
+def _timestamp(when: When) -> float:
+    return when.timestamp() if isinstance(when, datetime) else float(when)
+
+
+class InventoryHistory:
+    """所持品の履歴"""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path or DEFAULT_HISTORY_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        # キャラクター名 -> (最後に記録した時刻, その時点の所持品, 直前のチェックポイント以降の差分数)
+        self._latest: Dict[str, Tuple[float, InventoryState, int]] = {}
+
+    def close(self):
+        self.conn.close()
+
+    def _load_latest(self, character: str) -> Optional[Tuple[float, InventoryState, int]]:
+        cached = self._latest.get(character)
+        if cached is not None:
+            return cached
+        row = self.conn.execute(
+            "SELECT MAX(taken_at) FROM history_entries WHERE character = ?", (character,)
+        ).fetchone()
+        if row[0] is None:
+            return None
+        state, delta_count = self._reconstruct(character, row[0])
+        latest = (row[0], state, delta_count)
+        self._latest[character] = latest
+        return latest
+
+    def _reconstruct(self, character: str, taken_at: float) -> Tuple[InventoryState, int]:
+        """taken_at 時点の所持品（直前のチェックポイント + それ以降の差分）と、適用した差分の数"""
+        cur = self.conn.execute(
+            "SELECT checkpoint, payload FROM history_entries WHERE character = ? AND taken_at <= ? AND id >= "
+            "(SELECT COALESCE(MAX(id), 0) FROM history_entries "
+            " WHERE character = ? AND checkpoint = 1 AND taken_at <= ?) ORDER BY id",
+            (character, taken_at, character, taken_at),
+        )
+        state: InventoryState = {}
+        delta_count = 0
+        for checkpoint, payload in cur:
+            decoded = _decode(payload)
+            if checkpoint:
+                state = decoded
+                delta_count = 0
+                continue
+            for key, change in decoded.items():
+                count = state.get(key, 0) + change
+                if count:
+                    state[key] = count
+                else:
+                    state.pop(key, None)
+            delta_count += 1
+        return state, delta_count
+
+    def record(self, snapshot: "CharacterSnapshot") -> bool:
+        """スナップショットを履歴に追記する
+
+        前回の記録より古いスナップショットや、所持品が変わっていないスナップショットは記録しない。
+
+        Returns:
+            記録した場合 True
+        """
+        character = snapshot.char_name
+        taken_at = snapshot_time(snapshot)
+        state = snapshot_state(snapshot)
+        latest = self._load_latest(character)
+
+        if latest is None:
+            checkpoint, payload_state, delta_count = True, state, 0
+        else:
+            last_time, last_state, delta_count = latest
+            if taken_at <= last_time:
+                return False
+            delta = diff_states(last_state, state)
+            if not delta:
+                return False
+            if delta_count + 1 >= CHECKPOINT_INTERVAL:
+                checkpoint, payload_state, delta_count = True, state, 0
+            else:
+                checkpoint, payload_state, delta_count = False, delta, delta_count + 1
+
+        try:
+            with self.conn:
+                cur = self.conn.execute(
+                    "INSERT INTO history_entries (character, taken_at, export_time, checkpoint, payload) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (character, taken_at, snapshot.export_time, int(checkpoint), _encode(payload_state)),
+                )
+                changed = state if latest is None else diff_states(latest[1], state)
+                self.conn.executemany(
+                    "INSERT INTO history_changes (entry_id, item_id, storage) VALUES (?, ?, ?)",
+                    [(cur.lastrowid, item_id, storage) for storage, item_id in {(k[0], k[1]) for k in changed}],
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to record history of {character}: {e}")
+            return False
+        self._latest[character] = (taken_at, state, delta_count)
+        return True
+
+    def record_all(self, snapshots: Iterable["CharacterSnapshot"]) -> List[str]:
+        """複数のスナップショットを記録し、記録したキャラクター名を返す"""
+        return [snapshot.char_name for snapshot in snapshots if self.record(snapshot)]
+
+    def timestamps(self, character: str) -> List[datetime]:
+        """キャラクターの記録時刻の一覧（古い順）"""
+        cur = self.conn.execute(
+            "SELECT taken_at FROM history_entries WHERE character = ? ORDER BY taken_at", (character,)
+        )
+        return [datetime.fromtimestamp(taken_at) for (taken_at,) in cur]
+
+    def state_at(self, character: str, when: When) -> Optional[InventoryState]:
+        """when 時点の所持品（(保管場所, アイテムID, extdata) -> 個数）。記録がなければ None"""
+        taken_at = _timestamp(when)
+        row = self.conn.execute(
+            "SELECT 1 FROM history_entries WHERE character = ? AND taken_at <= ? LIMIT 1", (character, taken_at)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._reconstruct(character, taken_at)[0]
+
+    def item_events(self, character: str, item_id: int, storage: Optional[str] = None) -> List[HistoryEvent]:
+        """アイテムの個数の増減（古い順）
+
+        最初の記録（チェックポイント）に含まれていた分は増加として返す。
+        """
+        sql = (
+            "SELECT DISTINCT e.id, e.taken_at, e.export_time FROM history_changes c "
+            "JOIN history_entries e ON e.id = c.entry_id WHERE c.item_id = ? AND e.character = ?"
+        )
+        params: List = [item_id, character]
+        if storage is not None:
+            sql += " AND c.storage = ?"
+            params.append(storage)
+        sql += " ORDER BY e.id"
+        entries = self.conn.execute(sql, params).fetchall()
+
+        events: List[HistoryEvent] = []
+        for entry_id, taken_at, export_time in entries:
+            # チェックポイントの差分は直前の時点と比べて求める
+            checkpoint, payload = self.conn.execute(
+                "SELECT checkpoint, payload FROM history_entries WHERE id = ?", (entry_id,)
+            ).fetchone()
+            if checkpoint:
+                previous = self.conn.execute(
+                    "SELECT MAX(taken_at) FROM history_entries WHERE character = ? AND id < ?", (character, entry_id)
+                ).fetchone()[0]
+                before = self._reconstruct(character, previous)[0] if previous is not None else {}
+                changes = diff_states(before, _decode(payload))
+            else:
+                changes = _decode(payload)
+            for (key_storage, key_id, extdata), change in changes.items():
+                if key_id == item_id and (storage is None or key_storage == storage):
+                    events.append(HistoryEvent(
+                        datetime.fromtimestamp(taken_at), export_time, key_storage, key_id, extdata, change
+                    ))
+        return events
+
+    def last_removed(self, character: str, item_id: int, storage: str) -> Optional[HistoryEvent]:
+        """アイテムが保管場所から最後に減った（出された）記録"""
+        removed = [event for event in self.item_events(character, item_id, storage) if event.change < 0]
+        return removed[-1] if removed else None
@@ -0,0 +1,324 @@
+"""
+Inventory Warehouse - 全キャラクターの所持品をまとめたSQLiteデータベース
+
+VanaExport の全キャラクターのJSON（<キャラ名>_inventory.json）を data/warehouse.db の
+1つのデータベースに取り込み、アイテムID・保管場所・キャラクターのインデックスと、
+正規化したアイテム名の全文検索（FTS5 の trigram）で引けるようにする。
+外部スクリプトや横断集計、Search All の名前検索はJSONを読み直さずにSQLで検索できる。
+
+アイテム名の部分一致は3文字以上の語だけが trigram 索引を使える。2文字以下の語と、
+trigram に対応していない SQLite（3.34 未満）では検索キーを全件走査する。
+
+取り込みは差分だけ行う:
+- 前回取り込んだときとJSONの更新時刻・サイズが同じキャラクターは読まない
+- 更新されたキャラクターはそのキャラクターの行だけを1トランザクションで置き換える
+- JSONがなくなったキャラクターは行を削除する
+- 履歴（InventoryHistory）を渡すと、取り込んだスナップショットを履歴にも追記する
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from inventory_history import InventoryHistory
+from live_data import CharacterSnapshot, LiveDataLoader, LiveItem
+from text_normalize import query_search_keys
+
+# データベースの保存先
+DEFAULT_WAREHOUSE_PATH = Path(__file__).parent / "data" / "warehouse.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS characters (
+    name TEXT PRIMARY KEY,
+    source_mtime_ns INTEGER NOT NULL,
+    source_size INTEGER NOT NULL,
+    export_time TEXT,
+    main_job TEXT,
+    main_job_level INTEGER,
+    sub_job TEXT,
+    sub_job_level INTEGER,
+    player TEXT,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    character TEXT NOT NULL REFERENCES characters(name) ON DELETE CASCADE,
+    storage TEXT NOT NULL,
+    slot INTEGER,
+    item_id INTEGER NOT NULL,
+    name TEXT,
+    name_en TEXT,
+    count INTEGER NOT NULL,
+    category TEXT,
+    item_level INTEGER,
+    extdata TEXT,
+    augments TEXT,
+    jobs TEXT,
+    search_key TEXT
+);
+CREATE TABLE IF NOT EXISTS equipment (
+    character TEXT NOT NULL REFERENCES characters(name) ON DELETE CASCADE,
+    slot_name TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    name TEXT,
+    name_en TEXT,
+    extdata TEXT,
+    augments TEXT,
+    PRIMARY KEY (character, slot_name)
+);
+CREATE INDEX IF NOT EXISTS idx_items_item ON items(item_id);
+CREATE INDEX IF NOT EXISTS idx_items_storage ON items(storage, item_id);
+CREATE INDEX IF NOT EXISTS idx_items_character ON items(character, storage);
+DROP INDEX IF EXISTS idx_items_search_key;
+"""
+
+# アイテム名の全文検索（items の検索キーを trigram で索引、行の追加・削除はトリガーで反映）
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    search_key, content='items', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts (rowid, search_key) VALUES (new.rowid, new.search_key);
+END;
+CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts (items_fts, rowid, search_key) VALUES ('delete', old.rowid, old.search_key);
+END;
+"""
+
+# trigram 索引を使える検索語の最小文字数
+FTS_MIN_LENGTH = 3
+
+
+def _json_or_none(value: Any) -> Optional[str]:
+    return json.dumps(value, ensure_ascii=False) if value else None
+
+
+def _item_row(char_name: str, item: LiveItem) -> Tuple:
+    return (
+        char_name, item.storage, item.slot, item.id, item.name, item.name_en, item.count,
+        item.category, item.item_level, item.extdata, _json_or_none(item.augments),
+        _json_or_none(item.jobs), item.search_key,
+    )
+
+
+class InventoryWarehouse:
+    """全キャラクターの所持品データベース"""
+
+    def __init__(self, db_path: Optional[Path] = None, history: Optional[InventoryHistory] = None):
+        self.db_path = Path(db_path or DEFAULT_WAREHOUSE_PATH)
+        self.history = history
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # GUI では取り込みを別スレッドで行い、検索はGUIのスレッドから行うため、接続の利用はロックで順番にする
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self.has_fts = self._create_fts()
+
+    def _create_fts(self) -> bool:
+        """アイテム名の全文検索の表を作る（既存のデータベースでは取り込み済みの行から索引を作る）"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'"
+        ).fetchone() is not None
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            if not exists:
+                self.conn.execute("INSERT INTO items_fts (items_fts) VALUES ('rebuild')")
+            self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: Full-text search is not available ({e}); item names are scanned")
+            return False
+        return True
+
+    def close(self):
+        self.conn.close()
+
+    def ingested_state(self) -> Dict[str, Tuple[int, int]]:
+        """キャラクター名 -> 取り込み済みJSONの (更新時刻, サイズ)"""
+        with self._lock:
+            cur = self.conn.execute("SELECT name, source_mtime_ns, source_size FROM characters")
+            return {name: (mtime_ns, size) for name, mtime_ns, size in cur}
+
+    def ingest_snapshot(self, snapshot: CharacterSnapshot) -> bool:
+        """1キャラクター分のスナップショットを取り込む（そのキャラクターの行を置き換え）"""
+        char_name = snapshot.char_name
+        player = dict(snapshot.player) if snapshot.player else {}
+        try:
+            with self._lock, self.conn:
+                # 置き換え前の行は連鎖して削除される
+                self.conn.execute("DELETE FROM characters WHERE name = ?", (char_name,))
+                self.conn.execute(
+                    "INSERT INTO characters (name, source_mtime_ns, source_size, export_time, main_job, "
+                    "main_job_level, sub_job, sub_job_level, player, ingested_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        char_name, snapshot.source_mtime_ns, snapshot.source_size, snapshot.export_time,
+                        player.get("main_job"), player.get("main_job_level"),
+                        player.get("sub_job"), player.get("sub_job_level"),
+                        _json_or_none(player), time.time(),
+                    ),
+                )
+                self.conn.executemany(
+                    "INSERT INTO items (character, storage, slot, item_id, name, name_en, count, category, "
+                    "item_level, extdata, augments, jobs, search_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [_item_row(char_name, item) for item in snapshot.items],
+                )
+                self.conn.executemany(
+                    "INSERT INTO equipment (character, slot_name, item_id, name, name_en, extdata, augments) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (char_name, slot_name, item.id, item.name, item.name_en, item.extdata,
+                         _json_or_none(item.augments))
+                        for slot_name, item in snapshot.equipment.items()
+                    ],
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to store inventory of {char_name}: {e}")
+            return False
+        return True
+
+    def remove_character(self, char_name: str) -> bool:
+        try:
+            with self._lock, self.conn:
+                self.conn.execute("DELETE FROM characters WHERE name = ?", (char_name,))
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to remove {char_name} from warehouse: {e}")
+            return False
+        return True
+
+    def sync(self, loader: LiveDataLoader, char_names: Optional[Iterable[str]] = None,
+             listener: Optional[Callable[[CharacterSnapshot], None]] = None) -> List[str]:
+        """VanaExport のJSONのうち、更新されたキャラクターだけを取り込む
+
+        JSONは loader.read_snapshots() で読むため、ローダーのスナップショットのキャッシュや
+        change_feed・snapshot_listeners は変更しない（別スレッドから呼んでもよい）。
+
+        Args:
+            loader: JSONの読み込みとアイテムDBでの補完に使うローダー
+            char_names: 対象のキャラクター（省略時は全キャラクター。JSONがなくなったキャラクターは削除）
+            listener: 取り込んだスナップショットを受け取る関数（sync を呼んだスレッドで呼ばれる）
+
+        Returns:
+            取り込み直した（または削除した）キャラクター名
+        """
+        source = loader.export_source
+        available = source.list_characters()
+        targets = list(char_names) if char_names is not None else available
+        ingested = self.ingested_state()
+
+        changed = []
+        for char_name in targets:
+            state = source.stat(char_name)
+            if state is not None and ingested.get(char_name) != state:
+                changed.append(char_name)
+
+        updated = []
+        for snapshot in loader.read_snapshots(changed):
+            # 読み込み中にJSONがなくなり .dat から読んだ場合は取り込まない
+            if snapshot.source == source.kind and self.ingest_snapshot(snapshot):
+                updated.append(snapshot.char_name)
+                if self.history is not None:
+                    self.history.record(snapshot)
+                if listener is not None:
+                    listener(snapshot)
+
+        if char_names is None:
+            alive = set(available)
+            for char_name in ingested:
+                if char_name not in alive and self.remove_character(char_name):
+                    updated.append(char_name)
+        return updated
+
+    def find_item(self, item_id: int, storage: Optional[str] = None) -> List[Dict[str, Any]]:
+        """アイテムIDで全キャラクターを検索（キャラクター×保管場所ごとの合計個数）"""
+        sql = "SELECT character, storage, SUM(count) FROM items WHERE item_id = ?"
+        params: List[Any] = [item_id]
+        if storage is not None:
+            sql += " AND storage = ?"
+            params.append(storage)
+        sql += " GROUP BY character, storage ORDER BY character, storage"
+        with self._lock:
+            return [
+                {"character": char_name, "storage": storage_name, "count": count}
+                for char_name, storage_name, count in self.conn.execute(sql, params)
+            ]
+
+    def _name_condition(self, name_terms: Sequence[Sequence[str]]) -> Tuple[str, List[Any]]:
+        """検索語（それぞれ照合キー候補のOR）をすべて含む行の条件
+
+        3文字以上のキーは trigram 索引（items_fts）で、それより短いキーは検索キーの走査で照合する。
+        """
+        clauses = []
+        params: List[Any] = []
+        for keys in name_terms:
+            alternatives = []
+            for key in keys:
+                if self.has_fts and len(key) >= FTS_MIN_LENGTH:
+                    alternatives.append("rowid IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?)")
+                    params.append('"' + key.replace('"', '""') + '"')
+                else:
+                    alternatives.append("instr(search_key, ?) > 0")
+                    params.append(key)
+            clauses.append("(" + " OR ".join(alternatives) + ")")
+        return " AND ".join(clauses), params
+
+    def search_name(self, text: str, limit: int = 500) -> List[Dict[str, Any]]:
+        """アイテム名（表記ゆれを吸収した検索キー）の部分一致で全キャラクターを検索"""
+        keys = query_search_keys(text)
+        if not keys:
+            return []
+        condition, params = self._name_condition([keys])
+        with self._lock:
+            cur = self.conn.execute(
+                f"SELECT character, storage, item_id, name, SUM(count) FROM items WHERE {condition} "
+                "GROUP BY character, storage, item_id ORDER BY character, storage, item_id LIMIT ?",
+                params + [limit],
+            )
+            return [
+                {"character": char_name, "storage": storage, "id": item_id, "name": name, "count": count}
+                for char_name, storage, item_id, name, count in cur
+            ]
+
+    def search_items(self, name_terms: Sequence[Sequence[str]],
+                     characters: Iterable[str]) -> List[Dict[str, Any]]:
+        """名前の検索語をすべて含むアイテムを、エクスポートのJSONと同じ形式の辞書で返す
+
+        Search All の名前検索で、取り込み済みのキャラクターをJSONを読まずに検索するのに使う。
+        辞書には "character" と "storage" も含む。
+
+        Args:
+            name_terms: 検索語ごとの照合キー候補（CompiledQuery.name_terms）
+            characters: 検索するキャラクター名
+        """
+        characters = list(characters)
+        if not name_terms or not characters:
+            return []
+        condition, params = self._name_condition(name_terms)
+        placeholders = ", ".join("?" for _ in characters)
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT character, storage, slot, item_id, name, name_en, count, item_level, extdata, augments, jobs "
+                f"FROM items WHERE character IN ({placeholders}) AND {condition}",
+                characters + params,
+            )
+            rows = cur.fetchall()
+        return [
+            {
+                "character": char_name, "storage": storage, "slot": slot, "id": item_id,
+                "name": name, "name_en": name_en, "count": count, "item_level": item_level,
+                "extdata": extdata,
+                "augments": json.loads(augments) if augments else None,
+                "jobs": json.loads(jobs) if jobs else None,
+            }
+            for char_name, storage, slot, item_id, name, name_en, count, item_level, extdata, augments, jobs in rows
+        ]
+
+    def storage_totals(self, char_name: str) -> Dict[str, int]:
+        """キャラクターの保管場所ごとのアイテム数（枠数）"""
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT storage, COUNT(*) FROM items WHERE character = ? GROUP BY storage", (char_name,)
+            )
+            return dict(cur.fetchall())
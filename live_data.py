@@ -1,31 +1,68 @@
 """
 Live Data Loader - WindowerアドオンVanaExportが出力したJSONを読み込む
+
+キャラクターデータの読み込み元は2種類:
+- VanaExport のJSON（オーグメント・個数・装備中アイテムなどを含む）
+- FFXIクライアントが USER フォルダに保存するストレージファイル (*.dat、InventoryParser で解析)
+
+エクスポートのないキャラクターは .dat から読み込む。どちらもアイテムDBの読み込みと
+スナップショットのキャッシュは LiveDataLoader が共通で持つ。
+読み直したスナップショットは前回との差分を change_feed に流す。
 """
 
 import json
+import os
 import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from types import MappingProxyType
+from typing import Callable, Dict, Any, Optional, List, Set, Tuple, Mapping, Iterable
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from equipset_index import CharacterNameMapper, find_default_user_path
+from export_diff import ChangeFeed, SnapshotDiff, diff_snapshots
+from inventory import InventoryParser
+from search_query import CompiledQuery, compile_query
+from text_normalize import make_item_search_key, query_search_keys
+
 
 # アイテム辞書DBのデフォルトパス
 DEFAULT_DB_PATH = Path(__file__).parent / "data" / "items.db"
 
+# Search Allの検索結果を保持する件数（LRU）
+SEARCH_CACHE_SIZE = 32
+
+# 複数キャラクターのJSONを並列に読み込むときのスレッド数
+SNAPSHOT_LOAD_WORKERS = 4
+
+# キャラフォルダIDと表示名の対応（GearSet Builder で設定）
+NAMES_INI_PATH = Path(__file__).parent / "data" / "names.ini"
+
+# names.ini に表示名のないフォルダを、所持品がこの割合以上一致するエクスポートのキャラクターとみなす
+FOLDER_MATCH_THRESHOLD = 0.8
+
+# .dat がエクスポートよりこれ以上新しければエクスポートを古いとみなし .dat を読む
+# （クライアントはログアウト時にも .dat を書き出すため、エクスポート直後の書き出しは無視する）
+EXPORT_STALE_MARGIN_NS = 10 * 60 * 10**9
+
 
 @dataclass
 class ItemInfo:
     """アイテムのDB情報"""
+    name: str = ""
+    name_en: str = ""
     category: str = "Unknown"
     item_type: int = 0
     skill: Optional[int] = None
     slots: Optional[int] = None
 
 
-@dataclass
+@dataclass(frozen=True)
 class LiveItem:
-    """ライブデータのアイテム"""
+    """ライブデータのアイテム（生成後は変更しない）"""
     id: int
     name: str
     name_en: str
@@ -46,6 +83,8 @@ class LiveItem:
     item_type: int = 0
     skill: Optional[int] = None
     slots: Optional[int] = None
+    # 検索キー（日本語名/英語名を正規化したもの、取り込み時に生成）
+    search_key: str = ""
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -73,8 +112,244 @@ class LiveEquipment:
     item: LiveItem
 
 
+@dataclass(frozen=True)
+class CharacterSnapshot:
+    """1キャラクター分のエクスポートデータ（読み込み後は変更しない）
+
+    ローダーは読み込むたびに新しいスナップショットを作るだけで、表示中のキャラクターを
+    状態として持たない。メインウィンドウ・GearSet Builder・Search All が
+    それぞれ別のキャラクターを参照していても、ロックなしで安全に読める。
+    """
+    char_name: str
+    player: Optional[Mapping[str, Any]]
+    export_time: Optional[str]
+    equipment: Mapping[str, LiveItem]
+    items: Tuple[LiveItem, ...]
+    loaded_at: datetime
+    # 読み込んだファイルの状態（更新判定用）
+    source_mtime_ns: int = 0
+    source_size: int = 0
+    # 読み込み元（"export" = VanaExport のJSON / "dat" = クライアントの .dat）
+    source: str = "export"
+    # 保管場所 -> 最大枠数（エクスポートの max_slots、不明な保管場所は含まない）
+    capacities: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+
+    def get_items_for_slot(self, slot_value: int) -> List[LiveItem]:
+        """特定の装備部位に装備可能なアイテムを取得
+        
+        Args:
+            slot_value: 装備部位のビット値（例: 1=main, 2=sub, 4=range, 8=ammo, 16=head, etc.）
+        
+        Returns:
+            その部位に装備可能なアイテムのリスト
+        """
+        return [item for item in self.items if item.slots is not None and (item.slots & slot_value)]
+
+    def is_fresh(self, max_age_seconds: int = 300) -> bool:
+        """データが新鮮か（デフォルト5分以内に読み込んだもの）"""
+        age = (datetime.now() - self.loaded_at).total_seconds()
+        return age < max_age_seconds
+
+
+class CharacterDataSource:
+    """キャラクターデータの読み込み元
+
+    読み込み元は VanaExport のJSONと同じ形式の辞書を返し、スナップショットの作成と
+    キャッシュは LiveDataLoader が共通で行う。
+    """
+    kind = ""
+
+    def list_characters(self) -> List[str]:
+        """読み込めるキャラクター名の一覧"""
+        raise NotImplementedError
+
+    def stat(self, char_name: str) -> Optional[Tuple[int, int]]:
+        """データの状態 (更新時刻, サイズ)。データがなければ None"""
+        raise NotImplementedError
+
+    def read(self, char_name: str) -> Optional[Dict[str, Any]]:
+        """VanaExport のJSONと同じ形式のデータを読み込む"""
+        raise NotImplementedError
+
+    def paths(self, char_name: str) -> List[Path]:
+        """キャラクターのデータのファイル（変更の監視用）"""
+        return []
+
+
+class VanaExportSource(CharacterDataSource):
+    """VanaExport のJSON (<キャラ名>_inventory.json)"""
+    kind = "export"
+
+    def __init__(self, data_path: Optional[Path]):
+        self.data_path = data_path
+
+    def list_characters(self) -> List[str]:
+        if not self.data_path or not self.data_path.exists():
+            return []
+        return sorted(json_file.stem.replace("_inventory", "") for json_file in self.data_path.glob("*_inventory.json"))
+
+    def stat(self, char_name: str) -> Optional[Tuple[int, int]]:
+        if not self.data_path:
+            return None
+        try:
+            st = (self.data_path / f"{char_name}_inventory.json").stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def paths(self, char_name: str) -> List[Path]:
+        if not self.data_path:
+            return []
+        return [self.data_path / f"{char_name}_inventory.json"]
+
+    def read(self, char_name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.data_path / f"{char_name}_inventory.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"JSON読み込みエラー: {e}")
+            return None
+
+
+class DatFileSource(CharacterDataSource):
+    """FFXIクライアントのストレージファイル（USER/<キャラフォルダ>/*.dat）
+
+    ゲームを起動していなくても読めるが、個数・オーグメント・装備中アイテムは含まれない。
+    キャラ名は names.ini の表示名（未設定ならフォルダID）。表示名のないフォルダでも
+    エクスポートのキャラクターと対応付けたもの（aliases）は、そのキャラ名で読む。
+    """
+    kind = "dat"
+
+    # .dat ファイル -> VanaExport のストレージ名
+    STORAGE_NAMES = {
+        "is.dat": "Inventory",
+        "bs.dat": "Safe",
+        "b2.dat": "Safe 2",
+        "cl.dat": "Storage",
+        "mb.dat": "Locker",
+        "sb.dat": "Satchel",
+        "sk.dat": "Sack",
+        "ca.dat": "Case",
+        "wr.dat": "Wardrobe",
+        "wr_2.dat": "Wardrobe 2",
+        "wr_3.dat": "Wardrobe 3",
+        "wr_4.dat": "Wardrobe 4",
+        "wr_5.dat": "Wardrobe 5",
+        "wr_6.dat": "Wardrobe 6",
+        "wr_7.dat": "Wardrobe 7",
+        "wr_8.dat": "Wardrobe 8",
+    }
+
+    def __init__(self, parser: InventoryParser, name_mapper: CharacterNameMapper,
+                 item_names_en: Optional[Mapping[int, str]] = None):
+        self.parser = parser
+        self.name_mapper = name_mapper
+        self.item_names_en = item_names_en or {}
+        # キャラ名 -> フォルダID
+        self._folders: Dict[str, str] = {}
+        # エクスポートのキャラ名 -> 表示名のないフォルダID（LiveDataLoader が所持品から対応付ける）
+        self.aliases: Dict[str, str] = {}
+        # フォルダID -> (状態, アイテムID -> 枠数)
+        self._fingerprints: Dict[str, Tuple[Tuple[int, int], Counter]] = {}
+
+    def _refresh_folders(self):
+        self._folders = {self.name_mapper.get_name(folder_id): folder_id
+                         for folder_id in self.parser.find_character_ids()}
+
+    def _folder_id(self, char_name: str) -> Optional[str]:
+        if char_name in self.aliases:
+            return self.aliases[char_name]
+        if char_name not in self._folders:
+            self._refresh_folders()
+        return self._folders.get(char_name)
+
+    def list_characters(self) -> List[str]:
+        self._refresh_folders()
+        aliased = set(self.aliases.values())
+        return sorted(name for name, folder_id in self._folders.items() if folder_id not in aliased)
+
+    def named_characters(self) -> Set[str]:
+        """names.ini に表示名のあるキャラ名（直前の list_characters() 時点）"""
+        return {name for name, folder_id in self._folders.items() if name != folder_id}
+
+    def unmapped_folders(self) -> List[str]:
+        """names.ini に表示名のないフォルダID（直前の list_characters() 時点）"""
+        return sorted(folder_id for name, folder_id in self._folders.items() if name == folder_id)
+
+    def fingerprint(self, char_name: str) -> Optional[Counter]:
+        """所持品の指紋（アイテムID -> 枠数）。エクスポートとの対応付けに使う"""
+        folder_id = self._folder_id(char_name)
+        state = self.stat(char_name)
+        if folder_id is None or state is None:
+            return None
+        cached = self._fingerprints.get(folder_id)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+        counter: Counter = Counter()
+        for content in self.parser.scan_character(folder_id).get("storages", {}).values():
+            if content["filename"] in self.STORAGE_NAMES:
+                counter.update(item["id"] for item in content["items"])
+        self._fingerprints[folder_id] = (state, counter)
+        return counter
+
+    def stat(self, char_name: str) -> Optional[Tuple[int, int]]:
+        folder_id = self._folder_id(char_name)
+        if folder_id is None:
+            return None
+        # いずれかのファイルが更新されれば状態が変わるよう、最新の更新時刻と合計サイズを使う
+        char_dir = self.parser.user_path / folder_id
+        mtime_ns = 0
+        size = 0
+        found = False
+        for fname in self.STORAGE_NAMES:
+            try:
+                st = os.stat(char_dir / fname)
+            except OSError:
+                continue
+            found = True
+            mtime_ns = max(mtime_ns, st.st_mtime_ns)
+            size += st.st_size
+        return (mtime_ns, size) if found else None
+
+    def paths(self, char_name: str) -> List[Path]:
+        folder_id = self._folder_id(char_name)
+        if folder_id is None:
+            return []
+        char_dir = self.parser.user_path / folder_id
+        return [char_dir] + [char_dir / fname for fname in self.STORAGE_NAMES if (char_dir / fname).exists()]
+
+    def read(self, char_name: str) -> Optional[Dict[str, Any]]:
+        folder_id = self._folder_id(char_name)
+        if folder_id is None:
+            return None
+        scan = self.parser.scan_character(folder_id)
+        storages = {}
+        for content in scan.get("storages", {}).values():
+            storage_name = self.STORAGE_NAMES.get(content["filename"])
+            if storage_name is None:
+                continue
+            storages[storage_name] = {
+                "name": storage_name,
+                "items": [
+                    {
+                        "id": item["id"],
+                        "name": item["name"],
+                        "name_en": self.item_names_en.get(item["id"], "Unknown"),
+                        # .dat には個数がないため1として扱う
+                        "count": 1,
+                        "slot": item["slot"] if item["slot"] > 0 else 0,
+                    }
+                    for item in content["items"]
+                ],
+            }
+        return {"player": None, "export_time": None, "equipment": {}, "storages": storages}
+
+
 class LiveDataLoader:
-    """WindowerのVanaExportアドオンが出力したJSONを読み込むクラス"""
+    """WindowerのVanaExportアドオンが出力したJSONを読み込むクラス
+
+    エクスポートのないキャラクターはクライアントの .dat から読み込む。
+    """
     
     # Windowerのデフォルトパス候補
     WINDOWER_PATHS = [
@@ -84,19 +359,49 @@ class LiveDataLoader:
         Path.home() / "Windower4/addons/VanaExport/data",
     ]
     
-    def __init__(self, windower_path: Optional[Path] = None, db_path: Optional[Path] = None):
+    def __init__(self, windower_path: Optional[Path] = None, db_path: Optional[Path] = None,
+                 user_path: Optional[Path] = None):
         """
         Args:
             windower_path: Windowerのaddons/VanaExport/data/パス（None時は自動検索）
             db_path: アイテムDBのパス（None時はデフォルトパス）
+            user_path: FFXIのUSERフォルダ（None時は自動検索、.dat の読み込みに使用）
         """
         self.data_path = windower_path or self._find_data_path()
         self.db_path = db_path or DEFAULT_DB_PATH
-        self.current_data: Optional[Dict[str, Any]] = None
-        self.last_load_time: Optional[datetime] = None
-        # アイテムDB情報をキャッシュ
+        # アイテムDB情報をキャッシュ（.dat の読み込みでも共有する）
         self._item_db: Dict[int, ItemInfo] = {}
         self._load_item_db()
+        # 読み込み元（エクスポートを優先し、なければ .dat）
+        self.export_source = VanaExportSource(self.data_path)
+        self.dat_source: Optional[DatFileSource] = None
+        # Search Allの結果キャッシュ（クエリ -> (コンパイル済みクエリ, 結果)、LRU）
+        self._search_cache: "OrderedDict[str, Tuple[CompiledQuery, List[Dict[str, Any]]]]" = OrderedDict()
+        self._search_cache_state: Optional[Tuple] = None
+        self._search_lock = threading.Lock()
+        # 読み込み済みのスナップショット（キャラ名 -> スナップショット）
+        # 辞書の値の差し替えだけで更新するため、読み取り側はロック不要
+        self._snapshots: Dict[str, CharacterSnapshot] = {}
+        # エクスポートの所持品の指紋（キャラ名 -> (状態, アイテムID -> 枠数)）と、
+        # 表示名のないフォルダの対応付けの結果（判定に使った状態 -> エクスポートのキャラ名 -> フォルダID）
+        self._export_fingerprints: Dict[str, Tuple[Tuple[int, int], Counter]] = {}
+        self._folder_match: Optional[Tuple[Tuple, Dict[str, str]]] = None
+        # アイテム名カタログ（初回の名前検索時に読み込み）
+        self._catalog: Optional[List[Tuple[int, str, str, str]]] = None
+        # スナップショットを読み直したときの差分の通知
+        # Search All の結果キャッシュは、差分のあった (保管場所, アイテムID) だけを検索し直す
+        self.change_feed = ChangeFeed()
+        self._pending_changes: Dict[str, Set[Tuple[str, int]]] = {}
+        self.change_feed.subscribe(self._on_snapshot_changed)
+        # 新しく読み込んだスナップショットを受け取る関数（キャラクター一覧の要約の書き出しなど）
+        self.snapshot_listeners: List[Callable[[CharacterSnapshot], None]] = []
+        # Search All の名前検索に使う所持品データベース（InventoryWarehouse、任意）
+        # 取り込み済みで最新のキャラクターは、JSONを読み込まずにデータベースで検索する
+        self.warehouse = None
+        # 全キャラクターの読み込み元の状態（get_character_sources() の結果）。Search All は
+        # 入力のたびにディスクを見ないようこれを使い、再読込・ファイルの変更時に invalidate_sources() で破棄する
+        self._source_state: Optional[Tuple] = None
+        self.set_user_path(user_path or find_default_user_path())
     
     def _find_data_path(self) -> Optional[Path]:
         """VanaExportのdataフォルダを自動検索"""
@@ -114,9 +419,11 @@ class LiveDataLoader:
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-            cursor.execute("SELECT id, category, type, skill, slots FROM items")
-            for item_id, category, item_type, skill, slots in cursor.fetchall():
+            cursor.execute("SELECT id, name_ja, name_en, category, type, skill, slots FROM items")
+            for item_id, name_ja, name_en, category, item_type, skill, slots in cursor.fetchall():
                 self._item_db[item_id] = ItemInfo(
+                    name=name_ja or "",
+                    name_en=name_en or "",
                     category=category or "Unknown",
                     item_type=item_type or 0,
                     skill=skill,
@@ -130,46 +437,284 @@ class LiveDataLoader:
     def get_item_info(self, item_id: int) -> ItemInfo:
         """アイテムIDからDB情報を取得"""
         return self._item_db.get(item_id, ItemInfo())
+
+    def item_names(self) -> Dict[int, str]:
+        """読み込み済みのアイテムDBの アイテムID -> 日本語名（名前のないアイテムは除く）"""
+        return {item_id: info.name for item_id, info in self._item_db.items() if info.name}
     
     def set_data_path(self, path: str):
         """データパスを手動設定"""
         self.data_path = Path(path)
+        self.export_source = VanaExportSource(self.data_path)
+        self.invalidate_sources()
+        self.clear_search_cache()
     
-    def get_available_characters(self) -> List[str]:
-        """エクスポート済みのキャラクター一覧を取得"""
-        if not self.data_path or not self.data_path.exists():
-            return []
+    def set_user_path(self, user_path: Optional[Path]):
+        """.dat を読み込むUSERフォルダを設定（None で .dat の読み込みをしない）"""
+        self.user_path = Path(user_path) if user_path else None
+        if self.user_path is None:
+            self.dat_source = None
+        else:
+            # アイテム名・カテゴリは読み込み済みのDB情報を渡し、DBを再度読まない
+            parser = InventoryParser(
+                str(self.user_path),
+                self.db_path,
+                item_dict=self.item_names(),
+                category_dict={
+                    item_id: (info.category, info.item_type, info.skill, info.slots)
+                    for item_id, info in self._item_db.items()
+                },
+            )
+            names_en = {item_id: info.name_en for item_id, info in self._item_db.items() if info.name_en}
+            self.dat_source = DatFileSource(parser, CharacterNameMapper(NAMES_INI_PATH), names_en)
+        self.invalidate_sources()
+        self.clear_search_cache()
+    
+    def _resolve_source(self, char_name: str) -> Optional[Tuple[CharacterDataSource, Tuple[int, int]]]:
+        """キャラクターのデータを読む読み込み元と、その状態
+
+        エクスポートがあればエクスポートを読む。ただし .dat の方が EXPORT_STALE_MARGIN_NS 以上
+        新しければエクスポートは古いとみなして .dat を読む。
+        """
+        export_state = self.export_source.stat(char_name)
+        dat_state = self.dat_source.stat(char_name) if self.dat_source is not None else None
+        if export_state is not None and (
+            dat_state is None or dat_state[0] <= export_state[0] + EXPORT_STALE_MARGIN_NS
+        ):
+            return self.export_source, export_state
+        if dat_state is not None:
+            return self.dat_source, dat_state
+        return None
+    
+    def get_character_sources(self) -> Dict[str, str]:
+        """キャラクター名 -> 読み込み元（"export" / "dat"）
+
+        .dat はエクスポートのないキャラクターの分だけ加える。表示名のないフォルダは
+        所持品からエクスポートのキャラクターと対応付け、同じキャラクターを二重に並べない。
+        ディスクを見て求め直し、Search All が使う読み込み元の状態も更新する。
+        """
+        exported = self.export_source.list_characters()
+        dat_names: List[str] = []
+        if self.dat_source is not None:
+            self.dat_source.list_characters()
+            self.dat_source.aliases = self._match_unmapped_folders(exported)
+            dat_names = self.dat_source.list_characters()
+        result: Dict[str, str] = {}
+        state = []
+        for char_name in sorted(set(exported) | set(dat_names)):
+            resolved = self._resolve_source(char_name)
+            if resolved is not None:
+                source, (mtime_ns, size) = resolved
+                result[char_name] = source.kind
+                state.append((char_name, source.kind, mtime_ns, size))
+        self._source_state = tuple(state)
+        return result
+    
+    def invalidate_sources(self):
+        """読み込み元の状態を破棄し、次の Search All でディスクを見直す（再読込・ファイルの変更時）"""
+        self._source_state = None
+    
+    def watch_paths(self) -> List[Path]:
+        """変更を監視すべきフォルダ・ファイル（VanaExportのフォルダ、USERフォルダ、各キャラクターのデータ）"""
+        state = self._source_state
+        if state is None:
+            self.get_character_sources()
+            state = self._source_state
+        paths = [path for path in (self.data_path, self.user_path) if path is not None and path.exists()]
+        for char_name, _, _, _ in state:
+            paths.extend(self.export_source.paths(char_name))
+            if self.dat_source is not None:
+                paths.extend(self.dat_source.paths(char_name))
+        return [path for path in dict.fromkeys(paths) if path.exists()]
+    
+    def _export_fingerprint(self, char_name: str) -> Optional[Counter]:
+        """エクスポートの所持品の指紋（.dat のある保管場所のアイテムID -> 枠数）"""
+        state = self.export_source.stat(char_name)
+        if state is None:
+            return None
+        cached = self._export_fingerprints.get(char_name)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+        storages = set(DatFileSource.STORAGE_NAMES.values())
+        snapshot = self._snapshots.get(char_name)
+        if snapshot is not None and (snapshot.source, snapshot.source_mtime_ns, snapshot.source_size) == ("export",) + state:
+            counter = Counter(item.id for item in snapshot.items if item.storage in storages)
+        else:
+            data = self.export_source.read(char_name) or {}
+            counter = Counter(
+                item_data.get("id", 0)
+                for storage_name, storage_data in (data.get("storages") or {}).items()
+                if storage_name in storages
+                for item_data in storage_data.get("items", [])
+            )
+        self._export_fingerprints[char_name] = (state, counter)
+        return counter
+    
+    def _match_unmapped_folders(self, exported: List[str]) -> Dict[str, str]:
+        """表示名のないフォルダを、所持品の一致するエクスポートのキャラクターに対応付ける
+
+        Returns:
+            エクスポートのキャラ名 -> フォルダID
+        """
+        dat_source = self.dat_source
+        folders = dat_source.unmapped_folders()
+        # 表示名で .dat と対応の付いているキャラクターは候補にしない
+        named = dat_source.named_characters()
+        candidates = [name for name in exported if name not in named]
+        if not folders or not candidates:
+            return {}
+        key = (
+            tuple((folder_id, dat_source.stat(folder_id)) for folder_id in folders),
+            tuple((name, self.export_source.stat(name)) for name in candidates),
+        )
+        if self._folder_match is not None and self._folder_match[0] == key:
+            return dict(self._folder_match[1])
         
-        characters = []
-        for json_file in self.data_path.glob("*_inventory.json"):
-            char_name = json_file.stem.replace("_inventory", "")
-            characters.append(char_name)
+        scores = []
+        for folder_id in folders:
+            dat_print = dat_source.fingerprint(folder_id)
+            if not dat_print:
+                continue
+            for name in candidates:
+                export_print = self._export_fingerprint(name)
+                if not export_print:
+                    continue
+                common = sum((dat_print & export_print).values())
+                score = common / max(sum(dat_print.values()), sum(export_print.values()))
+                if score >= FOLDER_MATCH_THRESHOLD:
+                    scores.append((score, folder_id, name))
         
-        return sorted(characters)
+        # 一致率の高い組から、フォルダ・キャラクターとも1回ずつ対応付ける
+        matches: Dict[str, str] = {}
+        for _, folder_id, name in sorted(scores, reverse=True):
+            if name not in matches and folder_id not in matches.values():
+                matches[name] = folder_id
+        self._folder_match = (key, matches)
+        return dict(matches)
     
-    def load_character_data(self, char_name: str) -> Optional[Dict[str, Any]]:
-        """キャラクターのデータを読み込み"""
-        if not self.data_path:
-            return None
+    def get_available_characters(self) -> List[str]:
+        """キャラクター一覧を取得（エクスポート済み + .dat のみのキャラクター）"""
+        return sorted(self.get_character_sources())
+    
+    def load_snapshot(self, char_name: str) -> Optional[CharacterSnapshot]:
+        """キャラクターのデータを読み込み、スナップショットとして返す
         
-        json_file = self.data_path / f"{char_name}_inventory.json"
-        if not json_file.exists():
+        VanaExport のJSONがあればそれを、なければクライアントの .dat を読み込む。
+        読み込み元のファイルが前回の読み込みから更新されていなければ、同じスナップショットを返す。
+        更新されていれば、前回のスナップショットとの差分を change_feed に流す。
+        """
+        resolved = self._resolve_source(char_name)
+        if resolved is None:
             return None
+        source, (mtime_ns, size) = resolved
         
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                self.current_data = json.load(f)
-                self.last_load_time = datetime.now()
-                return self.current_data
-        except Exception as e:
-            print(f"JSON読み込みエラー: {e}")
+        cached = self._snapshots.get(char_name)
+        if cached is not None and (cached.source, cached.source_mtime_ns, cached.source_size) == (source.kind, mtime_ns, size):
+            return cached
+        
+        data = source.read(char_name)
+        if data is None:
             return None
+        
+        return self.adopt_snapshot(self._build_snapshot(char_name, data, mtime_ns, size, source.kind))
     
-    def get_player_info(self) -> Optional[Dict[str, Any]]:
-        """プレイヤー情報を取得"""
-        if not self.current_data:
+    def adopt_snapshot(self, snapshot: CharacterSnapshot) -> CharacterSnapshot:
+        """read_snapshot() で読み込んだスナップショットを、load_snapshot() で読み込んだものとして扱う
+
+        読み込み済みのスナップショットと差し替え、前回との差分を change_feed に流し、
+        snapshot_listeners に渡す。読み込み済みのものが同じか新しいファイルからなら、そちらを返す。
+        別スレッドで読み込んだスナップショットは、ローダーを使うスレッドでこのメソッドに渡すこと。
+        """
+        cached = self._snapshots.get(snapshot.char_name)
+        if cached is not None and cached.source == snapshot.source and (
+            (cached.source_mtime_ns, cached.source_size) == (snapshot.source_mtime_ns, snapshot.source_size)
+            or cached.source_mtime_ns > snapshot.source_mtime_ns
+        ):
+            return cached
+        self._snapshots[snapshot.char_name] = snapshot
+        if cached is not None and cached.source == snapshot.source:
+            self.change_feed.publish(diff_snapshots(cached, snapshot))
+        for listener in list(self.snapshot_listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"Warning: snapshot listener failed: {e}")
+        return snapshot
+    
+    def read_snapshot(self, char_name: str) -> Optional[CharacterSnapshot]:
+        """キャラクターのデータを読み込む（キャッシュ・差分通知なし）
+
+        全キャラクターを1人ずつ処理して捨てる用途（レポートの書き出しなど）や、
+        別スレッドでの読み込みで、読み込んだスナップショットをローダーに溜めないために使う。
+        """
+        resolved = self._resolve_source(char_name)
+        if resolved is None:
+            return None
+        source, (mtime_ns, size) = resolved
+        data = source.read(char_name)
+        if data is None:
             return None
-        return self.current_data.get("player")
+        return self._build_snapshot(char_name, data, mtime_ns, size, source.kind)
+    
+    def load_snapshots(self, char_names: Iterable[str]) -> List[CharacterSnapshot]:
+        """複数キャラクターのスナップショットを並列に読み込む（読み込めなかったキャラクターは除く）"""
+        return self._map_snapshots(self.load_snapshot, char_names)
+    
+    def read_snapshots(self, char_names: Iterable[str]) -> List[CharacterSnapshot]:
+        """複数キャラクターを read_snapshot() で並列に読み込む（読み込めなかったキャラクターは除く）"""
+        return self._map_snapshots(self.read_snapshot, char_names)
+    
+    @staticmethod
+    def _map_snapshots(read: Callable[[str], Optional[CharacterSnapshot]],
+                       char_names: Iterable[str]) -> List[CharacterSnapshot]:
+        char_names = list(char_names)
+        if len(char_names) <= 1:
+            snapshots = [read(name) for name in char_names]
+        else:
+            with ThreadPoolExecutor(max_workers=SNAPSHOT_LOAD_WORKERS) as executor:
+                snapshots = list(executor.map(read, char_names))
+        return [snapshot for snapshot in snapshots if snapshot is not None]
+    
+    def _build_snapshot(self, char_name: str, data: Dict[str, Any],
+                        mtime_ns: int = 0, size: int = 0, source: str = "export") -> CharacterSnapshot:
+        """エクスポートJSON（と同じ形式のデータ）からスナップショットを作成"""
+        equipment_data = data.get("equipment") or {}
+        # 空の装備データがJSON配列 [] として読み込まれた場合の対処
+        if isinstance(equipment_data, list):
+            equipment_data = {}
+        equipment = {
+            slot_name: self._create_live_item(item_data, "Equipped")
+            for slot_name, item_data in equipment_data.items()
+        }
+        
+        storages = data.get("storages") or {}
+        if isinstance(storages, list):
+            storages = {}
+        items = tuple(
+            self._create_live_item(item_data, storage_name)
+            for storage_name, storage_data in storages.items()
+            for item_data in storage_data.get("items", [])
+        )
+        
+        capacities = {
+            storage_name: storage_data["max_slots"]
+            for storage_name, storage_data in storages.items()
+            if isinstance(storage_data.get("max_slots"), int)
+        }
+        
+        player = data.get("player")
+        return CharacterSnapshot(
+            char_name=char_name,
+            player=MappingProxyType(dict(player)) if player else None,
+            export_time=data.get("export_time"),
+            equipment=MappingProxyType(equipment),
+            items=items,
+            loaded_at=datetime.now(),
+            source_mtime_ns=mtime_ns,
+            source_size=size,
+            source=source,
+            capacities=MappingProxyType(capacities),
+        )
     
     def _create_live_item(self, item_data: Dict[str, Any], storage: str) -> LiveItem:
         """LiveItemを作成しDB情報で補完する"""
@@ -182,11 +727,13 @@ class LiveDataLoader:
         
         skill_val = item_data.get("item_skill")
         slot_mask = item_data.get("item_slot")
+        name = item_data.get("name", "Unknown")
+        name_en = item_data.get("name_en", "Unknown")
         
         return LiveItem(
             id=item_id,
-            name=item_data.get("name", "Unknown"),
-            name_en=item_data.get("name_en", "Unknown"),
+            name=name,
+            name_en=name_en,
             count=item_data.get("count", 1),
             slot=item_data.get("slot", 0),
             storage=storage,
@@ -204,6 +751,7 @@ class LiveDataLoader:
             item_type=final_item_type,
             skill=skill_val if skill_val is not None else db_info.skill,
             slots=slot_mask if slot_mask is not None else db_info.slots,
+            search_key=make_item_search_key(name, name_en),
         )
 
     def _map_category(self, cat_id: Optional[int]) -> str:
@@ -213,161 +761,298 @@ class LiveDataLoader:
         if cat_id == 2: return "General"
         return "Unknown"
     
-    def get_current_equipment(self) -> Dict[str, LiveItem]:
-        """現在の装備を取得"""
-        if not self.current_data:
-            return {}
-        
-        equipment_data = self.current_data.get("equipment", {})
-        
-        # 空の装備データがJSON配列 [] として読み込まれた場合の対処
-        if isinstance(equipment_data, list):
-            equipment_data = {}
-            
-        result = {}
-        
-        for slot_name, item_data in equipment_data.items():
-            result[slot_name] = self._create_live_item(item_data, "Equipped")
-        
-        return result
-    
-    def get_all_items(self, include_equipped: bool = True) -> List[LiveItem]:
-        """全アイテムを取得"""
-        if not self.current_data:
-            return []
-        
-        items = []
-        storages = self.current_data.get("storages", {})
-        
-        for storage_name, storage_data in storages.items():
-            for item_data in storage_data.get("items", []):
-                items.append(self._create_live_item(item_data, storage_name))
-        
-        return items
-    
-    def get_equipment_items(self) -> List[LiveItem]:
-        """全ストレージからアイテムを取得（装備セットビルダー用）"""
-        if not self.current_data:
-            return []
-        
-        items = []
-        storages = self.current_data.get("storages", {})
-        
-        for storage_name, storage_data in storages.items():
-            for item_data in storage_data.get("items", []):
-                items.append(self._create_live_item(item_data, storage_name))
-        
-        return items
-    
-    def get_items_for_slot(self, slot_value: int) -> List[LiveItem]:
-        """特定の装備部位に装備可能なアイテムを取得
-        
-        Args:
-            slot_value: 装備部位のビット値（例: 1=main, 2=sub, 4=range, 8=ammo, 16=head, etc.）
-        
-        Returns:
-            その部位に装備可能なアイテムのリスト
-        """
-        all_items = self.get_equipment_items()
-        result = []
-        
-        for item in all_items:
-            if item.slots is not None and (item.slots & slot_value):
-                result.append(item)
-        
-        return result
-    
-    def get_export_time(self) -> Optional[str]:
-        """エクスポート時刻を取得"""
-        if not self.current_data:
-            return None
-        return self.current_data.get("export_time")
-    
-    def is_data_fresh(self, max_age_seconds: int = 300) -> bool:
-        """データが新鮮か（デフォルト5分以内）"""
-        if not self.last_load_time:
-            return False
-        
-        age = (datetime.now() - self.last_load_time).total_seconds()
-        return age < max_age_seconds
-
     def search_all_characters(self, query: str) -> List[Dict[str, Any]]:
         """全キャラクターからアイテムを検索
 
+        クエリは search_query の書式（id: / storage: / job: / ilvl>= / OR など）で解釈し、
+        一度コンパイルした述語を全キャラクターの全アイテムに1パスで適用する。
+        直近の検索結果はLRUキャッシュに保持し、名前だけの検索で過去のクエリを
+        含む場合（入力途中の絞り込み）はその結果を再フィルタするだけで済ませる。
+
         Args:
-            query: 検索クエリ（アイテム名、大文字小文字無視、部分一致）
+            query: 検索クエリ（名前のみの場合は大文字小文字無視、部分一致）
 
         Returns:
             検索結果のリスト: [{'character': str, 'storage': str, 'item': LiveItem, 'count': int}, ...]
             キャラクター×保管場所×アイテムID単位で集計済み
             誰も所持していない場合は、アイテム情報と個数0を返す
+
+        Raises:
+            QueryError: クエリの構文が正しくない場合
         """
+        query = query.strip() if query else ""
         if not query:
             return []
 
-        query_lower = query.lower()
-        characters = self.get_available_characters()
+        # エクスポート・.dat が更新されていれば、変化のあった分だけキャッシュに反映
+        state = self._get_source_state()
+        with self._search_lock:
+            old_state = self._search_cache_state
+        if state != old_state:
+            self._refresh_search_cache(old_state, state)
+
+        with self._search_lock:
+            cached = self._search_cache.get(query)
+            if cached is not None:
+                self._search_cache.move_to_end(query)
+                return list(cached[1])
+
+        compiled = compile_query(query)
 
+        with self._search_lock:
+            base = self._find_refinable_results(compiled)
+        if base is not None:
+            # 前回結果の絞り込み（並び順はそのまま維持される）
+            results = [r for r in base if compiled(r['character'], r['item'])]
+        else:
+            results = self._scan_all_characters(compiled, state)
+
+        with self._search_lock:
+            self._search_cache[query] = (compiled, results)
+            while len(self._search_cache) > SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+
+        return list(results)
+
+    def _scan_all_characters(self, compiled: CompiledQuery, state: Tuple) -> List[Dict[str, Any]]:
+        """全キャラクターの全アイテムに述語を1パスで適用して検索（結果キャッシュなし）"""
         # キャラクター×保管場所×アイテムIDで集計
         aggregated = {}
 
-        for char_name in characters:
-            data = self.load_character_data(char_name)
-            if not data:
-                continue
-
-            # 通常アイテム検索
-            items = self.get_all_items()
-            for item in items:
-                if (query_lower in item.name.lower() or
-                    query_lower in item.name_en.lower()):
-                    key = (char_name, item.storage, item.id)
-                    if key in aggregated:
-                        aggregated[key]['count'] += item.count
-                    else:
-                        aggregated[key] = {
-                            'character': char_name,
-                            'storage': item.storage,
-                            'item': item,
-                            'count': item.count
-                        }
+        searched = self._search_warehouse(compiled, state, aggregated)
+        for char_name, items in self._get_items_by_character(state, searched):
+            self._aggregate_matches(compiled, char_name, items, aggregated)
 
         results = list(aggregated.values())
+        self._sort_results(results)
+        return results
+
+    def _search_warehouse(self, compiled: CompiledQuery, state: Tuple,
+                          aggregated: Dict[Tuple[str, str, int], Dict[str, Any]]) -> Set[str]:
+        """名前検索を所持品データベースで行う
 
+        対象は、エクスポートの状態が取り込み時と同じで、スナップショットを読み込んでいないキャラクター。
+
+        Returns:
+            データベースで検索したキャラクター名
+        """
+        if self.warehouse is None or not compiled.is_plain:
+            return set()
+        ingested = self.warehouse.ingested_state()
+        targets = {
+            char_name for char_name, kind, mtime_ns, size in state
+            if kind == self.export_source.kind and char_name not in self._snapshots
+            and ingested.get(char_name) == (mtime_ns, size)
+        }
+        if not targets:
+            return targets
+        items_by_char: Dict[str, List[LiveItem]] = {}
+        for row in self.warehouse.search_items(compiled.name_terms, targets):
+            items_by_char.setdefault(row["character"], []).append(self._create_live_item(row, row["storage"]))
+        for char_name, items in items_by_char.items():
+            self._aggregate_matches(compiled, char_name, items, aggregated)
+        return targets
+
+    @staticmethod
+    def _aggregate_matches(compiled: CompiledQuery, char_name: str, items: Iterable[LiveItem],
+                           aggregated: Dict[Tuple[str, str, int], Dict[str, Any]]):
+        """述語に一致するアイテムをキャラクター×保管場所×アイテムIDで集計"""
+        for item in items:
+            if compiled(char_name, item):
+                key = (char_name, item.storage, item.id)
+                if key in aggregated:
+                    aggregated[key]['count'] += item.count
+                else:
+                    aggregated[key] = {
+                        'character': char_name,
+                        'storage': item.storage,
+                        'item': item,
+                        'count': item.count
+                    }
+
+    @staticmethod
+    def _sort_results(results: List[Dict[str, Any]]):
         # キャラクター名 → 保管場所 → 個数（降順）でソート
         results.sort(key=lambda x: (x['character'], x['storage'], -x['count']))
 
-        return results
+    def _on_snapshot_changed(self, diff: SnapshotDiff):
+        """change_feed の差分を、次の検索で結果キャッシュに反映するために記録"""
+        with self._search_lock:
+            if self._search_cache_state is not None:
+                self._pending_changes.setdefault(diff.char_name, set()).update(diff.affected_keys())
+
+    def _refresh_search_cache(self, old_state: Optional[Tuple], state: Tuple):
+        """エクスポート・.dat の更新を結果キャッシュに反映する
+
+        更新されたキャラクターを読み直し、change_feed から届いた差分の (保管場所, アイテムID) だけを
+        キャッシュ済みの各クエリで検索し直す。差分のないキャラクター（新しく増えた・読み込み元が
+        変わったなど）はそのキャラクターの全アイテムを、削除されたキャラクターは結果から除く。
+        """
+        if old_state is None:
+            with self._search_lock:
+                self._search_cache.clear()
+                self._pending_changes.clear()
+                self._search_cache_state = state
+            return
+
+        old = {entry[0]: entry[1:] for entry in old_state}
+        new = {entry[0]: entry[1:] for entry in state}
+        changed = [char_name for char_name, entry in new.items() if old.get(char_name) != entry]
+        removed = set(old) - set(new)
+        for char_name in removed:
+            self._snapshots.pop(char_name, None)
+        snapshots = {snapshot.char_name: snapshot for snapshot in self.load_snapshots(changed)}
+
+        with self._search_lock:
+            if self._search_cache_state != old_state:
+                # 別のスレッドが先に反映した
+                return
+            pending = self._pending_changes
+            self._pending_changes = {}
+            rescan = {char_name for char_name in changed if char_name not in pending}
+            dropped = removed | rescan
+            for query, (compiled, results) in list(self._search_cache.items()):
+                kept = [
+                    r for r in results
+                    if r['character'] not in dropped
+                    and (r['storage'], r['item'].id) not in pending.get(r['character'], ())
+                ]
+                aggregated: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+                for char_name in rescan:
+                    snapshot = snapshots.get(char_name)
+                    if snapshot is not None:
+                        self._aggregate_matches(compiled, char_name, snapshot.items, aggregated)
+                for char_name, keys in pending.items():
+                    snapshot = snapshots.get(char_name) or self._snapshots.get(char_name)
+                    if snapshot is None or char_name in removed or not keys:
+                        continue
+                    affected = (item for item in snapshot.items if (item.storage, item.id) in keys)
+                    self._aggregate_matches(compiled, char_name, affected, aggregated)
+                kept.extend(aggregated.values())
+                self._sort_results(kept)
+                self._search_cache[query] = (compiled, kept)
+            self._search_cache_state = state
+
+    def _get_items_by_character(self, state: Tuple,
+                                exclude: Iterable[str] = ()) -> List[Tuple[str, Tuple[LiveItem, ...]]]:
+        """全キャラクター（exclude を除く）のアイテムを取得
+
+        state と同じファイルから読み込み済みのスナップショットは、ファイルを見ずにそのまま使う。
+        """
+        alive = {char_name for char_name, _, _, _ in state}
+        exclude = set(exclude)
+
+        # 削除されたキャラクターのデータを破棄
+        for char_name in list(self._snapshots):
+            if char_name not in alive:
+                self._snapshots.pop(char_name, None)
+
+        snapshots: Dict[str, CharacterSnapshot] = {}
+        stale = []
+        for char_name, kind, mtime_ns, size in state:
+            if char_name in exclude:
+                continue
+            cached = self._snapshots.get(char_name)
+            if cached is not None and (cached.source, cached.source_mtime_ns, cached.source_size) == (kind, mtime_ns, size):
+                snapshots[char_name] = cached
+            else:
+                stale.append(char_name)
+        for snapshot in self.load_snapshots(stale):
+            snapshots[snapshot.char_name] = snapshot
+        return [
+            (char_name, snapshots[char_name].items)
+            for char_name, _, _, _ in state if char_name in snapshots
+        ]
+
+    def _find_refinable_results(self, compiled: CompiledQuery) -> Optional[List[Dict[str, Any]]]:
+        """絞り込みで新しいクエリの結果を求められるキャッシュ済み結果のうち、最も件数の少ないものを返す
+
+        "リン" の結果には "リング" に一致するアイテムがすべて含まれるため、
+        全キャラクターを再走査せずに絞り込みで求められる。
+        """
+        best_key = None
+        best_results = None
+        for cached_query, (cached_compiled, cached_results) in self._search_cache.items():
+            if compiled.refines(cached_compiled):
+                if best_results is None or len(cached_results) < len(best_results):
+                    best_key = cached_query
+                    best_results = cached_results
+        if best_key is None:
+            return None
+        self._search_cache.move_to_end(best_key)
+        return best_results
+
+    def _get_source_state(self) -> Tuple:
+        """全キャラクターの読み込み元の状態（キャラ名・読み込み元・更新時刻・サイズ）を取得
+
+        get_character_sources() の結果を使い、破棄されているときだけディスクを見て求め直す。
+        """
+        state = self._source_state
+        if state is None:
+            self.get_character_sources()
+            state = self._source_state
+        return state
+
+    def clear_search_cache(self):
+        """Search Allの結果キャッシュを破棄"""
+        with self._search_lock:
+            self._search_cache.clear()
+            self._search_cache_state = None
+            self._pending_changes = {}
+        self._snapshots = {}
 
     def search_item_in_db(self, query: str) -> Optional[Dict[str, Any]]:
         """アイテムDBから名前で検索（誰も所持していない場合の表示用）
 
         Args:
-            query: 検索クエリ（アイテム名、部分一致）
+            query: 検索クエリ（アイテム名、部分一致。空白区切りの語はすべてを含むものに一致）
 
         Returns:
             見つかった場合は {'id': int, 'name': str, 'name_en': str}、見つからない場合はNone
         """
-        if not query or not self.db_path or not self.db_path.exists():
+        if not query:
+            return None
+
+        terms = [query_search_keys(term) for term in query.split()]
+        terms = [keys for keys in terms if keys]
+        if not terms:
             return None
 
+        for item_id, name_ja, name_en, search_key in self._get_catalog():
+            if all(any(key in search_key for key in keys) for keys in terms):
+                return {'id': item_id, 'name': name_ja, 'name_en': name_en}
+        return None
+
+    def _get_catalog(self) -> List[Tuple[int, str, str, str]]:
+        """アイテム名カタログ（ID・日本語名・英語名・検索キー）を取得（初回のみDBから読み込み）"""
+        if self._catalog is not None:
+            return self._catalog
+
+        self._catalog = []
+        if not self.db_path or not self.db_path.exists():
+            return self._catalog
+
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-            # 日本語名または英語名で部分一致検索
-            cursor.execute(
-                "SELECT id, name_ja, name_en FROM items WHERE name_ja LIKE ? OR name_en LIKE ? LIMIT 1",
-                (f"%{query}%", f"%{query}%")
-            )
-            row = cursor.fetchone()
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(items)")}
+            if "search_key" in columns:
+                # generate_item_db.py で生成済みの検索キーを使用
+                cursor.execute("SELECT id, name_ja, name_en, search_key FROM items ORDER BY id")
+                self._catalog = [
+                    (item_id, name_ja or "", name_en or "", key or make_item_search_key(name_ja, name_en))
+                    for item_id, name_ja, name_en, key in cursor.fetchall()
+                ]
+            else:
+                cursor.execute("SELECT id, name_ja, name_en FROM items ORDER BY id")
+                self._catalog = [
+                    (item_id, name_ja or "", name_en or "", make_item_search_key(name_ja, name_en))
+                    for item_id, name_ja, name_en in cursor.fetchall()
+                ]
             conn.close()
-
-            if row:
-                return {'id': row[0], 'name': row[1], 'name_en': row[2]}
-            return None
         except Exception as e:
             print(f"DB検索エラー: {e}")
-            return None
+        return self._catalog
 
 
 def main():
@@ -381,17 +1066,17 @@ def main():
     
     if characters:
         char = characters[0]
-        data = loader.load_character_data(char)
-        if data:
-            print(f"\nPlayer: {loader.get_player_info()}")
-            print(f"Export time: {loader.get_export_time()}")
+        snapshot = loader.load_snapshot(char)
+        if snapshot:
+            print(f"\nPlayer: {dict(snapshot.player or {})}")
+            print(f"Export time: {snapshot.export_time}")
             
-            equipment = loader.get_current_equipment()
+            equipment = snapshot.equipment
             print(f"\nCurrent equipment ({len(equipment)} slots):")
             for slot, item in equipment.items():
                 print(f"  {slot}: {item.name}")
             
-            all_items = loader.get_all_items()
+            all_items = snapshot.items
             print(f"\nTotal items: {len(all_items)}")
 
 
@@ -0,0 +1,225 @@
+"""
+Report Export - 全キャラクターの所持品レポート（HTML / CSV）を逐次書き出す
+
+キャラクター・ストレージ単位のグループを順に受け取り、その場で書き出すため、
+アカウント全体のレポートでもメモリ使用量は1ストレージ分程度で一定になる。
+
+- HTML はアイテム名・キャラ名などをエスケープして出力
+- 行のテンプレートは事前に用意した str.format をそのまま使う
+- 出力は FLUSH_CHUNK_SIZE ごとにまとめて書き込み、拡張子 .gz なら gzip 圧縮
+"""
+
+import csv
+import gzip
+import html
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator, List, Optional, Tuple
+
+# これだけ溜まったらファイルへ書き出す（文字数）
+FLUSH_CHUNK_SIZE = 64 * 1024
+
+# 1行分: (スロット, アイテムID, アイテム名, 個数, レコード番号, param1)
+# 個数は .dat には含まれず、レコード番号・param1 は .dat にしかないため None になりうる
+ReportRow = Tuple[int, int, str, Optional[int], Optional[int], Optional[int]]
+# ストレージ1つ分: (キャラクター, ストレージ名, 読み込み元（ファイル名など）, 行)
+ReportGroup = Tuple[str, str, str, List[ReportRow]]
+
+CSV_HEADER = ["Character", "Storage", "Source", "Slot", "ItemID", "HexID", "Name", "Count", "RecordIndex", "Param1"]
+
+_HTML_HEAD = "\n".join([
+    "<html><head>",
+    "<meta charset='utf-8'>",
+    "<style>",
+    "body { font-family: sans-serif; background: #f0f0f0; padding: 20px; }",
+    "h1 { color: #333; }",
+    ".storage-box { background: white; margin-bottom: 20px; padding: 15px; border-radius: 5px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }",
+    "h2 { border-bottom: 2px solid #eee; padding-bottom: 10px; color: #555; }",
+    "table { width: 100%; border-collapse: collapse; font-size: 14px; }",
+    "th, td { padding: 8px; text-align: left; border-bottom: 1px solid #ddd; }",
+    "th { background-color: #f8f9fa; }",
+    ".slot { width: 50px; font-weight: bold; color: #666; }",
+    ".id { width: 80px; color: #999; font-family: monospace; }",
+    ".name { font-weight: bold; color: #2c3e50; }",
+    "</style>",
+    "<title>{title}</title>",
+    "</head><body>",
+    "",
+])
+_HTML_CHARACTER = "<h1>Character Inventory: {}</h1>\n".format
+_HTML_GROUP_HEAD = (
+    "<div class='storage-box'>\n<h2>{} ({}) - {} items</h2>\n<table>\n"
+    "<tr><th>Slot</th><th>ID</th><th>Name</th><th>Count</th><th>Raw Index</th><th>Param1</th></tr>\n"
+).format
+_HTML_ROW = (
+    "<tr><td class='slot'>{}</td><td class='id'>{}</td><td class='name'>{}</td>"
+    "<td>{}</td><td>{}</td><td>{}</td></tr>\n"
+).format
+_HTML_GROUP_TAIL = "</table></div>\n"
+_HTML_TAIL = "</body></html>\n"
+
+
+class _ChunkedWriter:
+    """書き込みを溜めて chunk_size ごとにまとめて出力する"""
+
+    def __init__(self, out: IO[str], chunk_size: int = FLUSH_CHUNK_SIZE):
+        self.out = out
+        self.chunk_size = chunk_size
+        self._parts: List[str] = []
+        self._size = 0
+
+    def write(self, text: str):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.out.write("".join(self._parts))
+            self._parts.clear()
+            self._size = 0
+
+
+def _blank(value: Any) -> Any:
+    return "" if value is None else value
+
+
+def parser_groups(parser: Any, char_ids: Optional[Iterable[str]] = None) -> Iterator[ReportGroup]:
+    """InventoryParser（クライアントの .dat）からキャラクターを1人ずつ読み、ストレージ単位で返す
+
+    パーサーのファイルキャッシュは使わず、列ごとの配列から直接行を作るため、
+    読み込んだ内容はそのストレージを書き終えた時点で破棄される。
+    """
+    from inventory import parse_storage_file_compact
+
+    item_dict = parser.item_dict
+    for char_id in (char_ids if char_ids is not None else parser.find_character_ids()):
+        char_dir = parser.user_path / char_id
+        for fname, label in parser.FILE_MAPPING.items():
+            compact = parse_storage_file_compact(char_dir / fname)
+            if not compact:
+                continue
+            rows = []
+            for i in compact.slot_order():
+                item_id = compact.ids[i]
+                rows.append((
+                    compact.slot(i), item_id, item_dict.get(item_id, f"Unknown Item ({item_id})"),
+                    None, compact.indexes[i], compact.param1s[i],
+                ))
+            yield char_id, label, fname, rows
+
+
+def scan_groups(scan: Any, ordered_labels: Optional[List[str]] = None) -> Iterator[ReportGroup]:
+    """InventoryParser.scan_character() の結果をストレージ単位で返す（ordered_labels の順、残りは後ろ）"""
+    storages = scan.get("storages", {}) if scan else {}
+    char_id = scan.get("character_id", "unknown") if scan else "unknown"
+    ordered_labels = ordered_labels or []
+    labels = [label for label in ordered_labels if label in storages]
+    labels += [label for label in storages if label not in ordered_labels]
+    for label in labels:
+        content = storages[label]
+        rows = [
+            (item["slot"], item["id"], item["name"], None, item["index"], item["param1"])
+            for item in content["items"]
+        ]
+        yield char_id, label, content["filename"], rows
+
+
+def loader_groups(loader: Any, char_names: Optional[Iterable[str]] = None) -> Iterator[ReportGroup]:
+    """LiveDataLoader（VanaExport / .dat）からキャラクターを1人ずつ読み、ストレージ単位で返す
+
+    スナップショットはローダーのキャッシュに入れず、書き出したら捨てる
+    （メモリ使用量がキャラクター数に比例しないように）。
+    """
+    for char_name in (char_names if char_names is not None else loader.get_available_characters()):
+        snapshot = loader.read_snapshot(char_name)
+        if snapshot is None:
+            continue
+        by_storage = {}
+        for item in snapshot.items:
+            by_storage.setdefault(item.storage, []).append((item.slot, item.id, item.name, item.count, None, None))
+        for storage, rows in by_storage.items():
+            yield snapshot.char_name, storage, snapshot.source, rows
+
+
+def write_html_report(groups: Iterable[ReportGroup], out: IO[str], title: str = "Inventory Report",
+                      chunk_size: int = FLUSH_CHUNK_SIZE) -> int:
+    """HTMLレポートを書き出す
+
+    Returns:
+        書き出した行数
+    """
+    escape = html.escape
+    writer = _ChunkedWriter(out, chunk_size)
+    write = writer.write
+    write(_HTML_HEAD.replace("{title}", escape(title)))
+    count = 0
+    current = None
+    for character, storage, source, rows in groups:
+        if character != current:
+            current = character
+            write(_HTML_CHARACTER(escape(str(character))))
+        write(_HTML_GROUP_HEAD(escape(str(storage)), escape(str(source)), len(rows)))
+        for slot, item_id, name, item_count, index, param1 in rows:
+            write(_HTML_ROW(
+                slot if slot and slot > 0 else "-",
+                item_id,
+                escape(name or ""),
+                _blank(item_count),
+                _blank(index),
+                _blank(param1),
+            ))
+        write(_HTML_GROUP_TAIL)
+        count += len(rows)
+    write(_HTML_TAIL)
+    writer.flush()
+    return count
+
+
+def write_csv_report(groups: Iterable[ReportGroup], out: IO[str], chunk_size: int = FLUSH_CHUNK_SIZE) -> int:
+    """CSVレポートを書き出す（1行1アイテム、全キャラクター共通の列）
+
+    Returns:
+        書き出した行数
+    """
+    writer = _ChunkedWriter(out, chunk_size)
+    csv_writer = csv.writer(writer)
+    csv_writer.writerow(CSV_HEADER)
+    writerow = csv_writer.writerow
+    count = 0
+    for character, storage, source, rows in groups:
+        for slot, item_id, name, item_count, index, param1 in rows:
+            writerow((
+                character, storage, source,
+                slot if slot and slot > 0 else "",
+                item_id, f"0x{item_id:04X}", name,
+                _blank(item_count), _blank(index), _blank(param1),
+            ))
+        count += len(rows)
+    writer.flush()
+    return count
+
+
+def open_report(path: Path, compress: Optional[bool] = None) -> IO[str]:
+    """レポートの出力先を開く（compress が None なら拡張子 .gz で判定）"""
+    path = Path(path)
+    if compress is None:
+        compress = path.suffix.lower() == ".gz"
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def write_report(groups: Iterable[ReportGroup], path: Path, fmt: Optional[str] = None,
+                 compress: Optional[bool] = None, title: str = "Inventory Report") -> int:
+    """拡張子（.html / .csv、続けて .gz も可）または fmt で形式を選んで書き出す"""
+    path = Path(path)
+    if fmt is None:
+        suffixes = [s.lower() for s in path.suffixes]
+        if suffixes and suffixes[-1] == ".gz":
+            suffixes = suffixes[:-1]
+        fmt = "csv" if suffixes and suffixes[-1] == ".csv" else "html"
+    with open_report(path, compress) as out:
+        if fmt == "csv":
+            return write_csv_report(groups, out)
+        return write_html_report(groups, out, title)
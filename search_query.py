@@ -0,0 +1,421 @@
+"""
+Search Query - Search All用の簡易クエリ言語
+
+クエリは一度だけ解析して述語（関数）にコンパイルし、
+全キャラクターの全アイテムに対して1パスで評価する。
+
+書式:
+    リング                     名前（日本語/英語）に「リング」を含む
+    "Moonlight Ring"           空白を含む語は引用符で囲む
+    id:11697                   アイテムID
+    storage:wardrobe           保管場所（部分一致）
+    char:Alice                 キャラクター名（部分一致）
+    cat:Weapon                 カテゴリ（前方一致）
+    job:COR / job:コ           装備可能ジョブ
+    slot:ring / slot:指        装備部位
+    aug:"STR+"                 オーグメント（部分一致）
+    ilvl>=119 / lv<99          アイテムLv / 装備Lv
+    count>1                    スタック個数
+    A B / A AND B              両方に一致
+    A OR B                     いずれかに一致
+    NOT A / -A                 一致しない
+    ( ... )                    グループ化
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+from text_normalize import query_search_keys
+
+
+class QueryError(ValueError):
+    """クエリの構文エラー"""
+
+
+# ジョブ略称 -> ジョブID（Windowerのres.jobsに準拠）
+JOB_IDS = {
+    "WAR": 1, "MNK": 2, "WHM": 3, "BLM": 4, "RDM": 5, "THF": 6,
+    "PLD": 7, "DRK": 8, "BST": 9, "BRD": 10, "RNG": 11, "SAM": 12,
+    "NIN": 13, "DRG": 14, "SMN": 15, "BLU": 16, "COR": 17, "PUP": 18,
+    "DNC": 19, "SCH": 20, "GEO": 21, "RUN": 22,
+    "戦": 1, "モ": 2, "白": 3, "黒": 4, "赤": 5, "シ": 6,
+    "ナ": 7, "暗": 8, "獣": 9, "吟": 10, "狩": 11, "侍": 12,
+    "忍": 13, "竜": 14, "召": 15, "青": 16, "コ": 17, "か": 18,
+    "踊": 19, "学": 20, "風": 21, "剣": 22,
+}
+
+# 部位名 -> 装備スロットのビットマスク（DBのslotsカラム）
+SLOT_MASKS = {
+    "main": 1, "sub": 2, "range": 4, "ranged": 4, "ammo": 8,
+    "head": 16, "body": 32, "hands": 64, "legs": 128, "feet": 256,
+    "neck": 512, "waist": 1024, "back": 32768,
+    "ear": 6144, "ear1": 6144, "ear2": 6144, "left_ear": 6144, "right_ear": 6144,
+    "ring": 24576, "ring1": 24576, "ring2": 24576, "left_ring": 24576, "right_ring": 24576,
+    "shield": 2,
+    "メイン": 1, "サブ": 2, "盾": 2, "遠隔": 4, "レンジ": 4, "矢弾": 8,
+    "頭": 16, "胴": 32, "両手": 64, "両脚": 128, "両足": 256,
+    "首": 512, "腰": 1024, "背": 32768, "耳": 6144, "指": 24576, "指輪": 24576,
+}
+
+# 文字列で比較するフィールド
+TEXT_FIELDS = {"name", "storage", "char", "cat", "job", "slot", "aug"}
+# 数値で比較するフィールド
+NUMERIC_FIELDS = {"id", "ilvl", "lv", "count"}
+
+COMPARE_OPS = {
+    "=": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+}
+
+# 評価コストの目安（AND/ORの子は安いものから評価する）
+_COST_NUMERIC = 1
+_COST_MASK = 2
+_COST_TEXT = 3
+
+Predicate = Callable[[str, Any], bool]
+
+
+def jobs_to_mask(jobs: Any) -> int:
+    """ジョブ情報（リスト/辞書/ビットフラグ）をビットマスク（bit n = ジョブID n）に変換
+
+    ビットフラグ形式は format_jobs() と同じく bit (ジョブID-1) = ジョブのため、1ビットずらす。
+    """
+    if jobs is None or isinstance(jobs, bool):
+        return 0
+    if isinstance(jobs, int):
+        return jobs << 1
+    mask = 0
+    if isinstance(jobs, dict):
+        entries = [key for key, enabled in jobs.items() if enabled]
+    else:
+        entries = jobs
+    for entry in entries:
+        if isinstance(entry, bool):
+            continue
+        if isinstance(entry, int):
+            if entry >= 0:
+                mask |= 1 << entry
+        elif isinstance(entry, str):
+            if entry.isdigit():
+                mask |= 1 << int(entry)
+            elif entry.upper() in JOB_IDS:
+                mask |= 1 << JOB_IDS[entry.upper()]
+    return mask
+
+
+@dataclass
+class CompiledQuery:
+    """コンパイル済みクエリ"""
+    text: str
+    predicate: Predicate
+    # 名前の部分一致だけをANDで並べたクエリの場合、各検索語の照合キー候補（正規化済み）
+    name_terms: Optional[Tuple[Tuple[str, ...], ...]] = None
+
+    @property
+    def is_plain(self) -> bool:
+        """名前検索だけのクエリかどうか"""
+        return self.name_terms is not None
+
+    def refines(self, other: "CompiledQuery") -> bool:
+        """このクエリの結果が必ず other の結果に含まれるか
+
+        どちらも名前検索だけで、other の各検索語について、このクエリのいずれかの
+        検索語の照合キー候補すべてがその検索語の候補を含んでいれば、
+        other の結果を絞り込むだけで求められる。
+        （ローマ字の候補は "kan"→かん、"kana"→かな のように包含関係が崩れることがあるため候補単位で判定する）
+        """
+        if not self.is_plain or not other.is_plain:
+            return False
+        return all(
+            any(
+                all(any(prev in key for prev in prev_keys) for key in term_keys)
+                for term_keys in self.name_terms
+            )
+            for prev_keys in other.name_terms
+        )
+
+    @property
+    def name_text(self) -> str:
+        """名前検索だけのクエリの場合、検索語を空白で連結した文字列"""
+        if not self.is_plain:
+            return ""
+        return " ".join(keys[0] for keys in self.name_terms)
+
+    def __call__(self, char_name: str, item: Any) -> bool:
+        return self.predicate(char_name, item)
+
+
+# =========================
+# 字句解析
+# =========================
+
+_KEYWORDS = {"OR": "OR", "|": "OR", "AND": "AND", "&": "AND", "NOT": "NOT"}
+
+
+@dataclass
+class _Token:
+    kind: str  # "(", ")", "OR", "AND", "NOT", "TERM"
+    text: str = ""
+    negated: bool = False
+    # 語全体が引用符で始まる（フィールド指定として解釈しない）
+    literal: bool = False
+
+
+def _tokenize(text: str) -> List[_Token]:
+    tokens: List[_Token] = []
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch.isspace():
+            i += 1
+            continue
+        if ch in "()":
+            tokens.append(_Token(ch))
+            i += 1
+            continue
+
+        negated = False
+        if ch == "-" and i + 1 < n and not text[i + 1].isspace():
+            negated = True
+            i += 1
+
+        # 語の終わり（空白または括弧）まで読む。引用符内の空白・括弧は語の一部とする
+        buf = []
+        quoted = False
+        literal = i < n and text[i] == '"'
+        while i < n and not text[i].isspace() and text[i] not in "()":
+            if text[i] == '"':
+                end = text.find('"', i + 1)
+                if end < 0:
+                    raise QueryError("引用符が閉じられていません")
+                buf.append(text[i + 1:end])
+                quoted = True
+                i = end + 1
+            else:
+                buf.append(text[i])
+                i += 1
+        word = "".join(buf)
+
+        if not quoted and not negated and word in _KEYWORDS:
+            tokens.append(_Token(_KEYWORDS[word]))
+        elif word or quoted:
+            tokens.append(_Token("TERM", word, negated, literal))
+    return tokens
+
+
+# =========================
+# 構文解析 + コンパイル
+# =========================
+
+class _Node:
+    """コンパイル済みノード（述語・評価コスト・名前検索語）"""
+    __slots__ = ("predicate", "cost", "name_terms")
+
+    def __init__(self, predicate: Predicate, cost: int, name_terms: Optional[Tuple[Tuple[str, ...], ...]] = None):
+        self.predicate = predicate
+        self.cost = cost
+        self.name_terms = name_terms
+
+
+class _Parser:
+    def __init__(self, tokens: List[_Token]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Optional[_Token]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> _Token:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> _Node:
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QueryError("括弧の対応が正しくありません")
+        return node
+
+    def parse_or(self) -> _Node:
+        nodes = [self.parse_and()]
+        while self.peek() is not None and self.peek().kind == "OR":
+            self.take()
+            nodes.append(self.parse_and())
+        return _any(nodes) if len(nodes) > 1 else nodes[0]
+
+    def parse_and(self) -> _Node:
+        nodes = [self.parse_unary()]
+        while True:
+            token = self.peek()
+            if token is None or token.kind in ("OR", ")"):
+                break
+            if token.kind == "AND":
+                self.take()
+            nodes.append(self.parse_unary())
+        return _all(nodes) if len(nodes) > 1 else nodes[0]
+
+    def parse_unary(self) -> _Node:
+        token = self.peek()
+        if token is None:
+            raise QueryError("条件がありません")
+        if token.kind == "NOT":
+            self.take()
+            return _negate(self.parse_unary())
+        if token.kind == "(":
+            self.take()
+            node = self.parse_or()
+            if self.peek() is None or self.peek().kind != ")":
+                raise QueryError("括弧が閉じられていません")
+            self.take()
+            return node
+        if token.kind == "TERM":
+            self.take()
+            node = _compile_term(token)
+            return _negate(node) if token.negated else node
+        raise QueryError(f"'{token.kind}' の位置が正しくありません")
+
+
+def _all(nodes: List[_Node]) -> _Node:
+    ordered = sorted(nodes, key=lambda n: n.cost)
+    predicates = [n.predicate for n in ordered]
+
+    def predicate(char_name, item):
+        for p in predicates:
+            if not p(char_name, item):
+                return False
+        return True
+
+    name_terms = None
+    if all(n.name_terms is not None for n in nodes):
+        name_terms = tuple(t for n in nodes for t in n.name_terms)
+    return _Node(predicate, max(n.cost for n in nodes), name_terms)
+
+
+def _any(nodes: List[_Node]) -> _Node:
+    ordered = sorted(nodes, key=lambda n: n.cost)
+    predicates = [n.predicate for n in ordered]
+
+    def predicate(char_name, item):
+        for p in predicates:
+            if p(char_name, item):
+                return True
+        return False
+
+    return _Node(predicate, max(n.cost for n in nodes))
+
+
+def _negate(node: _Node) -> _Node:
+    inner = node.predicate
+    return _Node(lambda char_name, item: not inner(char_name, item), node.cost)
+
+
+def _split_field(token: _Token) -> Tuple[Optional[str], str, str]:
+    """'ilvl>=119' -> ('ilvl', '>=', '119')、フィールド指定がなければ (None, '', 語)"""
+    text = token.text
+    if token.literal:
+        return None, "", text
+    for i, ch in enumerate(text):
+        if ch in ":<>=!":
+            name = text[:i].lower()
+            if name not in TEXT_FIELDS and name not in NUMERIC_FIELDS:
+                break
+            rest = text[i:]
+            for op in (">=", "<=", "!=", ":", ">", "<", "="):
+                if rest.startswith(op):
+                    return name, op, rest[len(op):]
+            break
+        if not (ch.isalpha() and ch.isascii()):
+            break
+    return None, "", text
+
+
+def _compile_term(token: _Token) -> _Node:
+    field_name, op, value = _split_field(token)
+    if field_name is None:
+        field_name, op, value = "name", ":", token.text
+    if not value:
+        raise QueryError(f"'{field_name}{op}' の値がありません")
+
+    if field_name in NUMERIC_FIELDS:
+        return _compile_numeric(field_name, "=" if op == ":" else op, value)
+    if op != ":":
+        raise QueryError(f"'{field_name}' では '{op}' は使えません")
+    return _compile_text(field_name, value)
+
+
+def _compile_numeric(field_name: str, op: str, value: str) -> _Node:
+    try:
+        number = int(value)
+    except ValueError:
+        raise QueryError(f"'{field_name}' には数値を指定してください: {value}")
+    compare = COMPARE_OPS[op]
+
+    if field_name == "id":
+        return _Node(lambda c, item: compare(item.id, number), _COST_NUMERIC)
+    if field_name == "count":
+        return _Node(lambda c, item: compare(item.count, number), _COST_NUMERIC)
+    attr = "item_level" if field_name == "ilvl" else "level"
+
+    def predicate(char_name, item):
+        level = getattr(item, attr)
+        return level is not None and compare(level, number)
+
+    return _Node(predicate, _COST_NUMERIC)
+
+
+def _compile_text(field_name: str, value: str) -> _Node:
+    needle = value.lower()
+
+    if field_name == "name":
+        keys = query_search_keys(value)
+        if not keys:
+            raise QueryError("検索語がありません")
+        if len(keys) == 1:
+            key = keys[0]
+            return _Node(lambda c, item: key in item.search_key, _COST_TEXT, (keys,))
+        return _Node(
+            lambda c, item: any(k in item.search_key for k in keys),
+            _COST_TEXT,
+            (keys,),
+        )
+    if field_name == "storage":
+        return _Node(lambda c, item: needle in item.storage.lower(), _COST_TEXT)
+    if field_name == "char":
+        return _Node(lambda char_name, item: needle in char_name.lower(), _COST_TEXT)
+    if field_name == "cat":
+        return _Node(lambda c, item: (item.category or "").lower().startswith(needle), _COST_TEXT)
+    if field_name == "aug":
+        return _Node(
+            lambda c, item: bool(item.augments) and any(needle in aug.lower() for aug in item.augments),
+            _COST_TEXT,
+        )
+    if field_name == "job":
+        job_id = int(value) if value.isdigit() else JOB_IDS.get(value.upper())
+        if job_id is None or not 1 <= job_id <= 22:
+            raise QueryError(f"不明なジョブです: {value}")
+        bit = 1 << job_id
+        return _Node(lambda c, item: (jobs_to_mask(item.jobs) & bit) != 0, _COST_MASK)
+    if field_name == "slot":
+        mask = SLOT_MASKS.get(needle)
+        if mask is None:
+            raise QueryError(f"不明な部位です: {value}")
+        return _Node(lambda c, item: item.slots is not None and (item.slots & mask) != 0, _COST_MASK)
+    raise QueryError(f"不明なフィールドです: {field_name}")
+
+
+def compile_query(text: str) -> CompiledQuery:
+    """クエリ文字列を解析して述語にコンパイルする
+
+    Raises:
+        QueryError: 構文が正しくない場合
+    """
+    tokens = _tokenize(text)
+    if not tokens:
+        raise QueryError("検索語がありません")
+    node = _Parser(tokens).parse()
+    return CompiledQuery(text=text, predicate=node.predicate, name_terms=node.name_terms)
@@ -0,0 +1,7 @@
+"""テスト共通設定"""
+
+import sys
+from pathlib import Path
+
+# プロジェクト直下のモジュールを参照する
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,92 @@
+"""export_diff のテスト"""
+
+from types import SimpleNamespace
+
+from export_diff import ChangeFeed, ItemChange, diff_snapshots
+
+
+def _snapshot(items, export_time=None, char_name="Alice"):
+    return SimpleNamespace(
+        char_name=char_name, export_time=export_time, source_mtime_ns=0,
+        items=[SimpleNamespace(storage=s, id=i, name=f"Item {i}", extdata=e, count=c) for s, i, e, c in items],
+    )
+
+
+def test_changes_are_classified():
+    old = _snapshot([
+        ("Safe", 1, None, 1),          # 金庫2へ移動
+        ("Inventory", 2, None, 10),    # 個数だけ変化
+        ("Inventory", 3, None, 1),     # なくなった
+        ("Inventory", 4, "aa", 1),     # extdata が違うので移動ではない
+    ], export_time="old")
+    new = _snapshot([
+        ("Safe 2", 1, None, 1),
+        ("Inventory", 2, None, 4),
+        ("Wardrobe", 4, "bb", 1),
+        ("Wardrobe", 5, None, 2),      # 増えた
+    ], export_time="new")
+    diff = diff_snapshots(old, new)
+
+    assert diff.changes == (
+        ItemChange("added", 4, "Item 4", "bb", None, "Wardrobe", 0, 1),
+        ItemChange("added", 5, "Item 5", None, None, "Wardrobe", 0, 2),
+        ItemChange("count", 2, "Item 2", None, "Inventory", "Inventory", 10, 4),
+        ItemChange("moved", 1, "Item 1", None, "Safe", "Safe 2", 1, 1),
+        ItemChange("removed", 3, "Item 3", None, "Inventory", None, 1, 0),
+        ItemChange("removed", 4, "Item 4", "aa", "Inventory", None, 1, 0),
+    )
+    assert (diff.old_export_time, diff.new_export_time) == ("old", "new")
+    assert diff.counts() == {"added": 2, "removed": 2, "moved": 1, "count": 1}
+    assert diff.summary() == "+2 / -2 / 移動1 / 個数1"
+    assert diff.affected_keys() == {
+        ("Wardrobe", 4), ("Wardrobe", 5), ("Inventory", 2), ("Safe", 1), ("Safe 2", 1),
+        ("Inventory", 3), ("Inventory", 4),
+    }
+    assert [change.amount for change in diff.changes] == [1, 2, 6, 1, 1, 1]
+
+
+def test_partial_moves_leave_the_rest_as_count_changes():
+    old = _snapshot([("Safe", 1, None, 5)])
+    new = _snapshot([("Safe", 1, None, 2), ("Inventory", 1, None, 1), ("Wardrobe", 1, None, 1)])
+    changes = diff_snapshots(old, new).changes
+    assert [(c.kind, c.from_storage, c.to_storage, c.amount) for c in changes] == [
+        ("count", "Safe", "Safe", 1),
+        ("moved", "Safe", "Inventory", 1),
+        ("moved", "Safe", "Wardrobe", 1),
+    ]
+    assert changes[0].new_count == 4
+
+
+def test_unchanged_snapshots_give_an_empty_diff():
+    items = [("Safe", 1, None, 1)]
+    diff = diff_snapshots(_snapshot(items), _snapshot(items))
+    assert not diff
+    assert diff.summary() == "+0 / -0 / 移動0 / 個数0"
+
+
+def test_change_feed_keeps_recent_diffs_per_character():
+    feed = ChangeFeed(history_size=2)
+    received = []
+    feed.subscribe(received.append)
+    feed.subscribe(lambda diff: 1 / 0)     # 失敗した購読者があっても他には届く
+
+    diffs = [
+        diff_snapshots(_snapshot([]), _snapshot([("Safe", i, None, 1)], export_time=str(i)))
+        for i in range(3)
+    ]
+    for diff in diffs:
+        feed.publish(diff)
+    other = diff_snapshots(_snapshot([], char_name="Bob"), _snapshot([("Safe", 9, None, 1)], char_name="Bob"))
+    feed.publish(other)
+
+    assert received == diffs + [other]
+    assert feed.latest("Alice") is diffs[-1]
+    assert feed.recent("Alice") == diffs[1:]
+    assert feed.recent("Bob") == [other]
+    assert feed.latest("Carol") is None
+
+    feed.unsubscribe(received.append)
+    feed.publish(diffs[0])
+    assert len(received) == 4
+    feed.clear()
+    assert feed.recent("Alice") == []
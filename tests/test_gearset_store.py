@@ -0,0 +1,85 @@
+"""gearset_store のテスト"""
+
+import pytest
+
+from gearset_store import GearSetStore, SavedSetRef
+
+
+def _item(item_id, storage, slot, name="", augments=None):
+    return {"id": item_id, "name": name or f"Item {item_id}", "storage": storage, "slot": slot, "augments": augments}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = GearSetStore(tmp_path / "gearsets.db")
+    yield store
+    store.close()
+
+
+def test_save_replace_delete_and_list(store):
+    assert store.save_set("Alice", 1, "TP", {"main": _item(1, "Wardrobe", 1), "sub": _item(2, "Wardrobe", 2)})
+    assert store.save_set("Alice", 1, "WS", {"main": _item(1, "Wardrobe", 1)})
+    assert store.save_set("Alice", None, "Town", {"body": _item(3, "Wardrobe", 3)})
+    assert store.list_sets("Alice", 1) == ["TP", "WS"]
+    assert store.list_sets("Alice", None) == ["Town"]
+    assert store.list_sets("Bob", 1) == []
+
+    # 同名のセットはスロットごと置き換える
+    store.save_set("Alice", 1, "TP", {"ring1": _item(4, "Wardrobe", 4)})
+    assert store.list_sets("Alice", 1) == ["TP", "WS"]
+    assert list(store.load_character("Alice")[1]["TP"]) == ["ring1"]
+
+    assert store.delete_set("Alice", 1, "WS")
+    assert store.list_sets("Alice", 1) == ["TP"]
+    assert store.find_sets_using(1) == []
+
+
+def test_load_character_without_inventory_returns_saved_items(store):
+    store.save_set("Alice", None, "Town", {"body": _item(3, "Wardrobe", 3, name="Coat", augments=["HP+10"])})
+    sets = store.load_character("Alice")
+    assert list(sets) == [None]
+    assert sets[None]["Town"]["body"] == {
+        "id": 3, "name": "Coat", "storage": "Wardrobe", "slot": 3, "augments": ["HP+10"],
+    }
+
+
+def test_load_character_relinks_moved_items(store):
+    saved = _item(5, "Wardrobe", 10, augments=["STR+5"])
+    store.save_set("Alice", 1, "TP", {"main": _item(1, "Wardrobe", 1), "ring1": saved})
+    inventory = [
+        _item(1, "Wardrobe", 1),
+        _item(5, "Safe", 1, augments=["DEX+5"]),
+        _item(5, "Safe", 2, augments=["STR+5"]),
+    ]
+    tp = store.load_character("Alice", inventory)[1]["TP"]
+    assert tp["main"] is inventory[0]
+    assert tp["ring1"] is inventory[2]
+
+
+def test_moved_copies_of_the_same_id_are_matched_once_each(store):
+    # 保存後に1個だけ動かした同じ指輪（もう1個は保存位置のまま）
+    store.save_set("Alice", 1, "TP", {"ring1": _item(5, "Wardrobe", 10), "ring2": _item(5, "Wardrobe", 11)})
+    store.save_set("Alice", 1, "WS", {"ring2": _item(5, "Wardrobe", 11)})
+    inventory = [_item(5, "Wardrobe", 10), _item(5, "Safe", 1)]
+    sets = store.load_character("Alice", inventory)[1]
+    assert sets["TP"]["ring1"] is inventory[0]
+    assert sets["TP"]["ring2"] is inventory[1]
+    assert sets["WS"]["ring2"] is inventory[1]
+
+    # 候補がなくなった保存位置は保存時の情報のまま
+    store.save_set("Alice", 1, "Idle", {"ring1": _item(5, "Wardrobe", 12)})
+    idle = store.load_character("Alice", inventory)[1]["Idle"]["ring1"]
+    assert idle["storage"] == "Wardrobe" and idle["slot"] == 12
+
+
+def test_find_sets_using(store):
+    store.save_set("Bob", 2, "TP", {"ring1": _item(5, "Wardrobe", 1)})
+    store.save_set("Alice", None, "Town", {"ring2": _item(5, "Wardrobe", 2)})
+    store.save_set("Alice", 1, "TP", {"ring1": _item(5, "Wardrobe", 2), "main": _item(1, "Wardrobe", 3)})
+    assert store.find_sets_using(5) == [
+        SavedSetRef("Alice", None, "Town", "ring2"),
+        SavedSetRef("Alice", 1, "TP", "ring1"),
+        SavedSetRef("Bob", 2, "TP", "ring1"),
+    ]
+    assert store.find_sets_using(5, "Bob") == [SavedSetRef("Bob", 2, "TP", "ring1")]
+    assert store.find_sets_using(999) == []
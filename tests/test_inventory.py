@@ -0,0 +1,56 @@
+"""inventory（ストレージファイルの解析）のテスト"""
+
+import os
+
+from inventory import STORAGE_HEADER_SIZE, STORAGE_RECORD, InventoryParser, parse_storage_file_compact
+
+
+def _write_storage(path, records):
+    path.write_bytes(b"\0" * STORAGE_HEADER_SIZE + b"".join(STORAGE_RECORD.pack(*r) for r in records))
+
+
+def test_compact_parse_drops_invalid_ids(tmp_path):
+    path = tmp_path / "is.dat"
+    _write_storage(path, [(0, 0, 0), (100, 2, 7), (0xFFFF, 3, 0), (200, 1, 9)])
+    compact = parse_storage_file_compact(path)
+    assert list(compact.indexes) == [1, 3]
+    assert list(compact.ids) == [100, 200]
+    assert list(compact.param1s) == [2, 1]
+    assert list(compact.param2s) == [7, 9]
+
+
+def test_scan_character_orders_by_slot_and_names_items(tmp_path):
+    char_dir = tmp_path / "abc123"
+    char_dir.mkdir()
+    _write_storage(char_dir / "is.dat", [(100, 2, 7), (0, 0, 0), (300, 999, 0), (200, 1, 9)])
+    parser = InventoryParser(str(tmp_path), item_dict={100: "ポーション"}, category_dict={})
+    scan = parser.scan_character("abc123")
+    items = scan["storages"]["Inventory"]["items"]
+    assert [item["id"] for item in items] == [200, 100, 300]
+    assert [item["slot"] for item in items] == [1, 2, -1]
+    assert items[1] == {
+        "index": 0, "id": 100, "hex_id": "0x0064", "name": "ポーション",
+        "param1": 2, "slot": 2, "param2": 7,
+    }
+    assert items[0]["name"] == "Unknown Item (200)"
+    assert parser.find_character_ids() == ["abc123"]
+
+
+def test_cache_keeps_arrays_and_builds_fresh_dicts(tmp_path):
+    char_dir = tmp_path / "abc123"
+    char_dir.mkdir()
+    path = char_dir / "is.dat"
+    _write_storage(path, [(100, 1, 0)])
+    parser = InventoryParser(str(tmp_path), item_dict={}, category_dict={})
+
+    first = parser.scan_character("abc123")["storages"]["Inventory"]["items"]
+    first[0]["name"] = "changed"
+    second = parser.scan_character("abc123")["storages"]["Inventory"]["items"]
+    assert second[0]["name"] == "Unknown Item (100)"
+    assert parser.load_storage(path) is parser.load_storage(path)
+
+    # 更新されたファイルは読み直す
+    _write_storage(path, [(100, 1, 0), (101, 2, 0)])
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert [item["id"] for item in parser.scan_character("abc123")["storages"]["Inventory"]["items"]] == [100, 101]
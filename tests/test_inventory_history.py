@@ -0,0 +1,101 @@
+"""inventory_history のテスト"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from inventory_history import (
+    CHECKPOINT_INTERVAL, InventoryHistory, _decode, _encode, diff_states, snapshot_state, snapshot_time,
+)
+
+
+def _snapshot(state, taken_at, char_name="Alice", export_time=None):
+    items = [
+        SimpleNamespace(storage=storage, id=item_id, extdata=extdata, count=count)
+        for (storage, item_id, extdata), count in state.items()
+    ]
+    return SimpleNamespace(char_name=char_name, items=items, export_time=export_time,
+                           source_mtime_ns=int(taken_at * 1e9))
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = InventoryHistory(tmp_path / "history.db")
+    yield history
+    history.close()
+
+
+def test_diff_states_and_encode_round_trip():
+    old = {("Safe", 1, None): 2, ("Inventory", 2, "ab"): 1}
+    new = {("Safe", 1, None): 5, ("Wardrobe", 3, None): 1}
+    delta = diff_states(old, new)
+    assert delta == {("Safe", 1, None): 3, ("Wardrobe", 3, None): 1, ("Inventory", 2, "ab"): -1}
+    assert diff_states(new, new) == {}
+    assert _decode(_encode(delta)) == delta
+
+
+def test_snapshot_state_sums_counts_and_time_prefers_export_time():
+    snapshot = _snapshot({("Safe", 1, None): 2}, 100.0)
+    snapshot.items.append(SimpleNamespace(storage="Safe", id=1, extdata=None, count=3))
+    assert snapshot_state(snapshot) == {("Safe", 1, None): 5}
+    assert snapshot_time(snapshot) == 100.0
+    snapshot.export_time = "2026-01-02 03:04:05"
+    assert snapshot_time(snapshot) != 100.0
+    snapshot.export_time = "broken"
+    assert snapshot_time(snapshot) == 100.0
+
+
+def test_state_round_trips_across_checkpoints(tmp_path, history):
+    states = []
+    for i in range(CHECKPOINT_INTERVAL * 2 + 3):
+        state = {("Inventory", 1000 + j, None): j + 1 for j in range(i % 5)}
+        state[("Safe", 1, None)] = i + 1
+        states.append(state)
+        assert history.record(_snapshot(state, 1000.0 + i))
+
+    for i, state in enumerate(states):
+        assert history.state_at("Alice", 1000.0 + i + 0.5) == state
+    assert history.state_at("Alice", 999.0) is None
+    assert len(history.timestamps("Alice")) == len(states)
+
+    checkpoints = [row[0] for row in history.conn.execute(
+        "SELECT id FROM history_entries WHERE checkpoint = 1 ORDER BY id")]
+    assert checkpoints == [1, CHECKPOINT_INTERVAL + 1, CHECKPOINT_INTERVAL * 2 + 1]
+
+    # 開き直しても最後の記録から続けられる
+    reopened = InventoryHistory(tmp_path / "history.db")
+    try:
+        latest = dict(states[-1])
+        latest[("Safe", 1, None)] += 1
+        assert reopened.record(_snapshot(latest, 2000.0))
+        assert reopened.state_at("Alice", 2000.0) == latest
+    finally:
+        reopened.close()
+
+
+def test_unchanged_or_older_snapshots_are_skipped(history):
+    state = {("Safe", 1, None): 1}
+    assert history.record(_snapshot(state, 100.0))
+    assert not history.record(_snapshot(state, 200.0))
+    assert not history.record(_snapshot({("Safe", 2, None): 1}, 50.0))
+    assert history.record_all([
+        _snapshot({("Safe", 2, None): 1}, 300.0),
+        _snapshot(state, 100.0, char_name="Bob"),
+        _snapshot(state, 100.0, char_name="Alice"),
+    ]) == ["Alice", "Bob"]
+
+
+def test_item_events_and_last_removed(history):
+    history.record(_snapshot({("Safe", 1, None): 2}, 100.0))
+    history.record(_snapshot({("Safe", 1, None): 2, ("Inventory", 5, None): 1}, 200.0))
+    history.record(_snapshot({("Inventory", 1, None): 2, ("Inventory", 5, None): 1}, 300.0))
+
+    events = history.item_events("Alice", 1)
+    assert [(e.storage, e.change) for e in events[:1]] == [("Safe", 2)]
+    assert {(e.storage, e.change) for e in events[1:]} == {("Safe", -2), ("Inventory", 2)}
+    assert [e.change for e in history.item_events("Alice", 1, "Inventory")] == [2]
+    assert history.item_events("Alice", 5)[0].taken_at.timestamp() == 200.0
+
+    removed = history.last_removed("Alice", 1, "Safe")
+    assert removed.change == -2 and removed.taken_at.timestamp() == 300.0
+    assert history.last_removed("Alice", 5, "Inventory") is None
@@ -0,0 +1,119 @@
+"""inventory_warehouse のテスト"""
+
+import json
+import os
+
+import pytest
+
+from inventory_warehouse import FTS_MIN_LENGTH, InventoryWarehouse
+from live_data import LiveDataLoader
+
+
+def _write_export(export_dir, char_name, items, mtime_offset=0):
+    path = export_dir / f"{char_name}_inventory.json"
+    data = {
+        "player": {"main_job": "WAR", "main_job_level": 99},
+        "export_time": "2026-01-01 00:00:00",
+        "equipment": {},
+        "storages": {
+            "Inventory": {
+                "max_slots": 80,
+                "items": [
+                    {"id": item_id, "name": name, "name_en": name_en, "count": 1, "slot": slot}
+                    for slot, (item_id, name, name_en) in enumerate(items, 1)
+                ],
+            },
+        },
+    }
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    if mtime_offset:
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + mtime_offset))
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    path = tmp_path / "export"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def loader(tmp_path, export_dir):
+    loader = LiveDataLoader(export_dir, tmp_path / "items.db")
+    loader.set_user_path(None)
+    return loader
+
+
+@pytest.fixture
+def warehouse(tmp_path):
+    warehouse = InventoryWarehouse(tmp_path / "warehouse.db")
+    yield warehouse
+    warehouse.close()
+
+
+def test_sync_ingests_only_changed_exports(export_dir, loader, warehouse, monkeypatch):
+    _write_export(export_dir, "Alice", [(1, "ムーンライトリング", "Moonlight Ring")])
+    _write_export(export_dir, "Bob", [(2, "ポーション", "Potion")])
+    assert sorted(warehouse.sync(loader)) == ["Alice", "Bob"]
+
+    read = []
+    original = loader.read_snapshot
+    monkeypatch.setattr(loader, "read_snapshot", lambda name: read.append(name) or original(name))
+    assert warehouse.sync(loader) == []
+    assert read == []
+
+    _write_export(export_dir, "Bob", [(2, "ポーション", "Potion"), (3, "エーテル", "Ether")], mtime_offset=10**9)
+    assert warehouse.sync(loader) == ["Bob"]
+    assert read == ["Bob"]
+    assert warehouse.storage_totals("Bob") == {"Inventory": 2}
+    assert warehouse.find_item(1) == [{"character": "Alice", "storage": "Inventory", "count": 1}]
+    # 取り込みではローダーのキャッシュを変更しない
+    assert loader._snapshots == {}
+
+
+def test_sync_removes_characters_without_export(export_dir, loader, warehouse):
+    _write_export(export_dir, "Alice", [(1, "ムーンライトリング", "Moonlight Ring")])
+    _write_export(export_dir, "Bob", [(1, "ムーンライトリング", "Moonlight Ring")])
+    warehouse.sync(loader)
+
+    (export_dir / "Alice_inventory.json").unlink()
+    assert warehouse.sync(loader) == ["Alice"]
+    assert list(warehouse.ingested_state()) == ["Bob"]
+    assert [row["character"] for row in warehouse.find_item(1)] == ["Bob"]
+    # 行は連鎖して削除され、全文検索の索引にも残らない
+    assert [row["character"] for row in warehouse.search_name("moonlight")] == ["Bob"]
+
+
+def test_name_search_uses_fts_for_long_keys_and_instr_for_short(export_dir, loader, warehouse):
+    _write_export(export_dir, "Alice", [
+        (1, "ムーンライトリング", "Moonlight Ring"),
+        (2, "ライトソード", "Light Sword"),
+        (3, "ポーション", "Potion"),
+    ])
+    warehouse.sync(loader)
+
+    condition, params = warehouse._name_condition([("light",), ("りん",)])
+    assert "instr(search_key, ?)" in condition
+    assert params[-1] == "りん"
+    if warehouse.has_fts:
+        assert "items_fts MATCH ?" in condition
+        assert params[0] == '"light"'
+    assert len("りん") < FTS_MIN_LENGTH <= len("light")
+
+    def names(text):
+        return sorted(row["name"] for row in warehouse.search_name(text))
+
+    assert names("light") == ["ムーンライトリング", "ライトソード"]
+    assert names("ﾘﾝｸﾞ") == ["ムーンライトリング"]
+    assert names("りん") == ["ムーンライトリング"]
+    assert names("ポ") == ["ポーション"]
+    assert names("zzz") == []
+
+    rows = warehouse.search_items([("light",), ("ring",)], ["Alice", "Bob"])
+    assert [(row["character"], row["storage"], row["id"]) for row in rows] == [("Alice", "Inventory", 1)]
+
+    # 全文検索がなくても検索キーの走査で同じ結果になる
+    warehouse.has_fts = False
+    assert names("light") == ["ムーンライトリング", "ライトソード"]
+    assert names("りん") == ["ムーンライトリング"]
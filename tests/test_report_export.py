@@ -0,0 +1,54 @@
+"""report_export のテスト"""
+
+import csv
+import io
+
+from report_export import CSV_HEADER, scan_groups, write_csv_report, write_html_report
+
+
+def _scan():
+    return {
+        "character_id": "<Alice>",
+        "storages": {
+            "Safe": {"filename": "bs.dat", "items": [
+                {"slot": 1, "id": 100, "name": "ポーション", "index": 0, "param1": 1},
+            ]},
+            "Inventory": {"filename": "is.dat", "items": [
+                {"slot": 2, "id": 0x2DD4, "name": "<b>Ring & Co</b>", "index": 5, "param1": 2},
+                {"slot": -1, "id": 300, "name": "Unknown Item (300)", "index": 6, "param1": 0},
+            ]},
+        },
+    }
+
+
+def test_scan_groups_follow_label_order():
+    groups = list(scan_groups(_scan(), ["Inventory", "Wardrobe"]))
+    assert [(char_id, label, source) for char_id, label, source, _ in groups] == [
+        ("<Alice>", "Inventory", "is.dat"), ("<Alice>", "Safe", "bs.dat"),
+    ]
+    assert groups[0][3][0] == (2, 0x2DD4, "<b>Ring & Co</b>", None, 5, 2)
+    assert list(scan_groups(None)) == []
+
+
+def test_html_report_escapes_names():
+    out = io.StringIO()
+    assert write_html_report(scan_groups(_scan()), out, title="A & B", chunk_size=16) == 3
+    text = out.getvalue()
+    assert "<title>A &amp; B</title>" in text
+    assert "Character Inventory: &lt;Alice&gt;" in text
+    assert "&lt;b&gt;Ring &amp; Co&lt;/b&gt;" in text
+    assert "<b>Ring" not in text
+    assert "<td class='slot'>-</td>" in text
+    assert text.endswith("</body></html>\n")
+
+
+def test_csv_report_rows():
+    out = io.StringIO()
+    assert write_csv_report(scan_groups(_scan(), ["Inventory"]), out) == 3
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+    assert rows[0] == CSV_HEADER
+    assert rows[1:] == [
+        ["<Alice>", "Inventory", "is.dat", "2", str(0x2DD4), "0x2DD4", "<b>Ring & Co</b>", "", "5", "2"],
+        ["<Alice>", "Inventory", "is.dat", "", "300", "0x012C", "Unknown Item (300)", "", "6", "0"],
+        ["<Alice>", "Safe", "bs.dat", "1", "100", "0x0064", "ポーション", "", "0", "1"],
+    ]
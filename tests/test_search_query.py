@@ -0,0 +1,93 @@
+"""search_query のテスト"""
+
+import pytest
+
+from live_data import LiveItem
+from search_query import JOB_IDS, QueryError, compile_query, jobs_to_mask
+from text_normalize import make_item_search_key
+from tools.equipset_to_lua import ALL_JOBS, set_jobs
+
+
+def _item(item_id=1, name="ムーンライトリング", name_en="Moonlight Ring", storage="Wardrobe",
+          count=1, jobs=None, slots=24576, item_level=None, level=99, augments=None):
+    return LiveItem(
+        id=item_id, name=name, name_en=name_en, count=count, slot=1, storage=storage,
+        augments=augments, level=level, item_level=item_level, jobs=jobs, slots=slots,
+        category="Armor", search_key=make_item_search_key(name, name_en),
+    )
+
+
+def test_bitflag_jobs_use_job_id_minus_one():
+    # ビットフラグは bit (ジョブID-1): WAR = 1, COR = 1 << 16
+    assert jobs_to_mask(1) == 1 << JOB_IDS["WAR"]
+    assert jobs_to_mask(1 << 16) == 1 << JOB_IDS["COR"]
+
+
+def test_list_dict_and_bitflag_jobs_agree():
+    bitflag = (1 << (JOB_IDS["WAR"] - 1)) | (1 << (JOB_IDS["RUN"] - 1))
+    expected = (1 << JOB_IDS["WAR"]) | (1 << JOB_IDS["RUN"])
+    assert jobs_to_mask(bitflag) == expected
+    assert jobs_to_mask([1, 22]) == expected
+    assert jobs_to_mask(["WAR", "run"]) == expected
+    assert jobs_to_mask(["1", "22"]) == expected
+    assert jobs_to_mask({1: True, 22: True, 3: False}) == expected
+    assert jobs_to_mask({"WAR": True, "RUN": 1}) == expected
+
+
+def test_missing_jobs_are_empty():
+    assert jobs_to_mask(None) == 0
+    assert jobs_to_mask([]) == 0
+    assert jobs_to_mask(True) == 0
+
+
+@pytest.mark.parametrize("jobs", [1 << 16, [17], {17: True}, ["COR"]])
+def test_job_field_matches_every_format(jobs):
+    item = _item(jobs=jobs)
+    assert compile_query("job:COR")("Alice", item)
+    assert compile_query("job:コ")("Alice", item)
+    assert compile_query("job:17")("Alice", item)
+    assert not compile_query("job:WAR")("Alice", item)
+    assert not compile_query("job:PUP")("Alice", item)
+
+
+def test_set_jobs_intersects_bitflag_and_list_jobs():
+    slots = {
+        "main": {"jobs": (1 << 0) | (1 << 16)},    # WAR / COR（ビットフラグ）
+        "ring1": {"jobs": [17, 18]},               # COR / PUP
+        "ring2": {"jobs": None},                   # ジョブ情報なし
+    }
+    assert set_jobs(slots) == 1 << JOB_IDS["COR"]
+    assert set_jobs({"ring2": {"jobs": None}}) == 0
+    assert jobs_to_mask((1 << 22) - 1) == ALL_JOBS
+
+
+def test_name_terms_are_normalized_and_anded():
+    item = _item()
+    assert compile_query("ﾑｰﾝﾗｲﾄ")("Alice", item)
+    assert compile_query("moonlight RING")("Alice", item)
+    assert not compile_query("moonlight earring")("Alice", item)
+    assert compile_query("moonlight").is_plain
+
+
+def test_fields_and_boolean_operators():
+    item = _item(item_id=11697, storage="Wardrobe 2", count=3, item_level=119, augments=["STR+5"])
+    assert compile_query("id:11697")("Alice", item)
+    assert compile_query("storage:wardrobe char:ali")("Alice", item)
+    assert compile_query("slot:ring ilvl>=119 count>1")("Alice", item)
+    assert compile_query('aug:"str+"')("Alice", item)
+    assert compile_query("id:1 OR id:11697")("Alice", item)
+    assert not compile_query("NOT storage:wardrobe")("Alice", item)
+    assert not compile_query("-ring")("Alice", item)
+    assert compile_query("(id:1 OR ring) lv<100")("Alice", item)
+
+
+def test_refines_only_between_plain_queries():
+    assert compile_query("リング").refines(compile_query("リン"))
+    assert not compile_query("リン").refines(compile_query("リング"))
+    assert not compile_query("リング id:1").refines(compile_query("リン"))
+
+
+@pytest.mark.parametrize("query", ["job:XXX", "slot:tail", "(ring", "ilvl>=abc"])
+def test_invalid_queries_raise(query):
+    with pytest.raises(QueryError):
+        compile_query(query)
@@ -0,0 +1,48 @@
+"""text_normalize のテスト"""
+
+import pytest
+
+from text_normalize import make_item_search_key, normalize_search_key, query_search_keys, romaji_to_hiragana
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("ﾑｰﾝﾗｲﾄ Ring", "むーんらいと ring"),     # 半角カナ・大文字
+    ("ｶﾞﾝﾏﾝ", "がんまん"),                     # 半角の濁点
+    ("ＡＢＣ", "abc"),                          # 全角英字
+    ("ヴァ", "ゔぁ"),
+    ("リング", "りんぐ"),
+    ("", ""),
+    (None, ""),
+])
+def test_normalize_search_key(text, expected):
+    assert normalize_search_key(text) == expected
+
+
+def test_item_search_key_joins_both_names():
+    key = make_item_search_key("ムーンライトリング", "Moonlight Ring")
+    assert key == "むーんらいとりんぐ\nmoonlight ring"
+    assert make_item_search_key("リング", None) == "りんぐ\n"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("gakkou", "がっこう"),
+    ("shinn", "しん"),
+    ("kka", "っか"),
+    ("kan'i", "かんい"),
+    ("xyz", None),
+])
+def test_romaji_to_hiragana(text, expected):
+    assert romaji_to_hiragana(text) == expected
+
+
+def test_query_search_keys_adds_kana_for_romaji():
+    assert query_search_keys("kana") == ("kana", "かな")
+    assert query_search_keys("ring") == ("ring",)
+    assert query_search_keys("ﾘﾝｸﾞ") == ("りんぐ",)
+    assert query_search_keys("") == ()
+
+
+def test_query_keys_match_item_keys():
+    key = make_item_search_key("ムーンライトリング", "Moonlight Ring")
+    for query in ("ﾑｰﾝﾗｲﾄ", "MOONLIGHT", "むーんらいと", "ringu", "light ring"):
+        assert any(k in key for k in query_search_keys(query)), query
@@ -0,0 +1,79 @@
+"""wardrobe_planner のテスト"""
+
+from wardrobe_planner import DEFAULT_CAPACITY, WARDROBE_STORAGES, plan_wardrobes
+
+
+def _item(item_id, storage, slot, name="", augments=None):
+    return {"id": item_id, "name": name or f"Item {item_id}", "storage": storage, "slot": slot, "augments": augments}
+
+
+def test_items_already_in_wardrobe_are_not_moved():
+    inventory = [_item(1, "Wardrobe", 1), _item(2, "Inventory", 1)]
+    sets = {"WAR": {"TP": {"main": inventory[0], "ring1": inventory[1]}}}
+    plan = plan_wardrobes(inventory, sets)
+    assert plan.required_count == 2
+    assert plan.move_count == 0
+    assert plan.assignment == {("Wardrobe", 1, 1): "Wardrobe", ("Inventory", 1, 2): "Inventory"}
+
+
+def test_capacities_skip_locked_and_full_wardrobes():
+    inventory = [_item(10 + i, "Safe", i) for i in range(3)]
+    sets = {"WAR": {"TP": {f"slot{i}": item for i, item in enumerate(inventory)}}}
+    capacities = {storage: 0 for storage in WARDROBE_STORAGES}
+    capacities["Wardrobe 3"] = 2
+    plan = plan_wardrobes(inventory, sets, capacities)
+    assert [move.to_storage for move in plan.moves] == ["Wardrobe 3", "Wardrobe 3"]
+    assert len(plan.unplaced) == 1
+    assert plan.usage["Wardrobe 3"] == 2
+    assert all(plan.usage[w] == 0 for w in WARDROBE_STORAGES if w != "Wardrobe 3")
+
+
+def test_default_capacity_for_unknown_storages():
+    inventory = [_item(1, "Safe", 1)]
+    plan = plan_wardrobes(inventory, {"WAR": {"TP": {"main": inventory[0]}}}, {"Wardrobe": 0})
+    assert plan.moves[0].to_storage != "Wardrobe"
+    assert plan.usage[plan.moves[0].to_storage] == 1
+    assert DEFAULT_CAPACITY == 80
+
+
+def test_eviction_frees_space_for_required_items():
+    wardrobe = [_item(100 + i, "Wardrobe", i + 1) for i in range(2)]
+    required = _item(1, "Safe", 1)
+    capacities = {storage: 0 for storage in WARDROBE_STORAGES}
+    capacities["Wardrobe"] = 2
+    plan = plan_wardrobes(wardrobe + [required], {"WAR": {"TP": {"main": required}}}, capacities)
+    assert [move.reason for move in plan.moves] == ["evict", "required"]
+    assert plan.moves[0].from_storage == "Wardrobe"
+    assert plan.assignment[("Safe", 1, 1)] == "Wardrobe"
+
+
+def test_moved_copies_of_the_same_id_are_matched_once_each():
+    # 保存後に2個とも金庫へ移動した同じ指輪
+    inventory = [_item(5, "Safe", 1), _item(5, "Safe", 2)]
+    saved_ring1 = _item(5, "Wardrobe", 10)
+    saved_ring2 = _item(5, "Wardrobe", 11)
+    sets = {
+        "WAR": {
+            "TP": {"ring1": saved_ring1, "ring2": saved_ring2},
+            # 同じ保存位置は同じ装備として扱う
+            "WS": {"ring1": saved_ring1},
+        }
+    }
+    plan = plan_wardrobes(inventory, sets)
+    assert plan.required_count == 2
+    assert sorted(plan.assignment) == [("Safe", 1, 5), ("Safe", 2, 5)]
+    assert plan.missing == []
+
+
+def test_moved_item_prefers_matching_augments_and_reports_missing_copies():
+    inventory = [_item(7, "Safe", 1, augments=["STR+5"]), _item(7, "Safe", 2, augments=["DEX+5"])]
+    sets = {
+        "WAR": {
+            "TP": {"back": _item(7, "Wardrobe", 1, augments=["DEX+5"])},
+            "WS": {"back": _item(7, "Wardrobe", 2, augments=["DEX+5"])},
+            "Idle": {"back": _item(7, "Wardrobe", 3, name="Cape")},
+        }
+    }
+    plan = plan_wardrobes(inventory, sets)
+    assert list(plan.assignment) == [("Safe", 2, 7), ("Safe", 1, 7)]
+    assert plan.missing == [("Idle", "back", "Cape")]
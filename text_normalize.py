@@ -0,0 +1,139 @@
+"""
+Text Normalize - 検索用の文字列正規化
+
+アイテム名は取り込み時に一度だけ正規化した検索キーを保持し、
+検索語も一度だけ正規化して、部分一致は検索キー同士の `in` だけで判定する。
+
+正規化の内容:
+- 全角/半角の統一（NFKC: ＲＩＮＧ→RING、ｶﾌﾞﾄ→カブト）
+- 大文字小文字の統一（casefold）
+- カタカナをひらがなに統一（カブト→かぶと）
+- ローマ字入力の検索語はひらがなの候補も生成する（kabuto→かぶと）
+"""
+
+import unicodedata
+from typing import Optional, Tuple
+
+# カタカナ（ァ～ヶ）とひらがな（ぁ～ゖ）のコードポイント差
+_KATAKANA_START = 0x30A1
+_KATAKANA_END = 0x30F6
+_KANA_OFFSET = 0x60
+_KATAKANA_TO_HIRAGANA = {
+    code: code - _KANA_OFFSET for code in range(_KATAKANA_START, _KATAKANA_END + 1)
+}
+
+
+def normalize_search_key(text: Optional[str]) -> str:
+    """検索キー用に正規化（幅・大文字小文字・カタカナ/ひらがなを統一）"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return text.translate(_KATAKANA_TO_HIRAGANA)
+
+
+def make_item_search_key(name: Optional[str], name_en: Optional[str]) -> str:
+    """アイテムの検索キー（日本語名と英語名を改行で連結）を生成"""
+    return normalize_search_key(name) + "\n" + normalize_search_key(name_en)
+
+
+# =========================
+# ローマ字 -> ひらがな
+# =========================
+
+_ROMAJI = {
+    "a": "あ", "i": "い", "u": "う", "e": "え", "o": "お",
+    "ka": "か", "ki": "き", "ku": "く", "ke": "け", "ko": "こ",
+    "sa": "さ", "si": "し", "shi": "し", "su": "す", "se": "せ", "so": "そ",
+    "ta": "た", "ti": "ち", "chi": "ち", "tu": "つ", "tsu": "つ", "te": "て", "to": "と",
+    "na": "な", "ni": "に", "nu": "ぬ", "ne": "ね", "no": "の",
+    "ha": "は", "hi": "ひ", "hu": "ふ", "fu": "ふ", "he": "へ", "ho": "ほ",
+    "ma": "ま", "mi": "み", "mu": "む", "me": "め", "mo": "も",
+    "ya": "や", "yu": "ゆ", "yo": "よ",
+    "ra": "ら", "ri": "り", "ru": "る", "re": "れ", "ro": "ろ",
+    "wa": "わ", "wo": "を",
+    "ga": "が", "gi": "ぎ", "gu": "ぐ", "ge": "げ", "go": "ご",
+    "za": "ざ", "zi": "じ", "ji": "じ", "zu": "ず", "ze": "ぜ", "zo": "ぞ",
+    "da": "だ", "di": "ぢ", "du": "づ", "de": "で", "do": "ど",
+    "ba": "ば", "bi": "び", "bu": "ぶ", "be": "べ", "bo": "ぼ",
+    "pa": "ぱ", "pi": "ぴ", "pu": "ぷ", "pe": "ぺ", "po": "ぽ",
+    "va": "ゔぁ", "vi": "ゔぃ", "vu": "ゔ", "ve": "ゔぇ", "vo": "ゔぉ",
+    "fa": "ふぁ", "fi": "ふぃ", "fe": "ふぇ", "fo": "ふぉ",
+    "ja": "じゃ", "ju": "じゅ", "je": "じぇ", "jo": "じょ",
+    "sha": "しゃ", "shu": "しゅ", "she": "しぇ", "sho": "しょ",
+    "cha": "ちゃ", "chu": "ちゅ", "che": "ちぇ", "cho": "ちょ",
+    "thi": "てぃ", "dhi": "でぃ", "tsa": "つぁ",
+    "xa": "ぁ", "xi": "ぃ", "xu": "ぅ", "xe": "ぇ", "xo": "ぉ",
+    "la": "ぁ", "li": "ぃ", "lu": "ぅ", "le": "ぇ", "lo": "ぉ",
+    "xya": "ゃ", "xyu": "ゅ", "xyo": "ょ", "xtu": "っ", "xtsu": "っ",
+    "-": "ー",
+}
+# 拗音（きゃ・しゃ など）
+for _head, _kana in (
+    ("k", "き"), ("s", "し"), ("t", "ち"), ("c", "ち"), ("n", "に"), ("h", "ひ"),
+    ("m", "み"), ("r", "り"), ("g", "ぎ"), ("z", "じ"), ("j", "じ"), ("d", "ぢ"),
+    ("b", "び"), ("p", "ぴ"),
+):
+    for _vowel, _small in (("a", "ゃ"), ("u", "ゅ"), ("o", "ょ")):
+        _ROMAJI.setdefault(f"{_head}y{_vowel}", _kana + _small)
+
+_ROMAJI_MAX_LEN = max(len(key) for key in _ROMAJI)
+_VOWELS = set("aiueo")
+
+
+def romaji_to_hiragana(text: str) -> Optional[str]:
+    """ローマ字をひらがなに変換（変換できない文字が残る場合はNone）"""
+    result = []
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        # 促音（kk, tt など。nは撥音なので除く）
+        if ch.isalpha() and ch not in _VOWELS and ch != "n" and i + 1 < n and text[i + 1] == ch:
+            result.append("っ")
+            i += 1
+            continue
+        if ch == "t" and text.startswith("tch", i):
+            result.append("っ")
+            i += 1
+            continue
+        # 撥音（n の後が母音・y でなければ「ん」）
+        if ch == "n":
+            nxt = text[i + 1] if i + 1 < n else ""
+            if nxt == "n":
+                result.append("ん")
+                i += 2
+                continue
+            if nxt == "'":
+                result.append("ん")
+                i += 2
+                continue
+            if nxt not in _VOWELS and nxt != "y":
+                result.append("ん")
+                i += 1
+                continue
+
+        for length in range(min(_ROMAJI_MAX_LEN, n - i), 0, -1):
+            kana = _ROMAJI.get(text[i:i + length])
+            if kana is not None:
+                result.append(kana)
+                i += length
+                break
+        else:
+            return None
+    return "".join(result)
+
+
+def query_search_keys(query: str) -> Tuple[str, ...]:
+    """検索語を正規化し、照合に使うキーの候補を返す
+
+    ローマ字として読める英字の検索語には、ひらがなに変換した候補も加える。
+    """
+    key = normalize_search_key(query)
+    if not key:
+        return ()
+    keys = [key]
+    if key.isascii() and any(ch.isalpha() for ch in key):
+        kana = romaji_to_hiragana(key.replace(" ", ""))
+        if kana and kana != key:
+            keys.append(kana)
+    return tuple(keys)
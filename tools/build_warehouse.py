@@ -0,0 +1,93 @@
+"""
+所持品データベース更新ツール
+
+VanaExport の全キャラクターのJSONを data/warehouse.db に取り込む（更新されたキャラクターのみ）。
+取り込んだデータベースは外部スクリプトから SQL で直接検索できる。
+取り込んだ所持品は履歴（data/history.db）にも差分として追記し、過去の時点を復元できる。
+
+使用例:
+    python tools/build_warehouse.py
+    python tools/build_warehouse.py --export-dir <Windower>/addons/VanaExport/data --db-out inventory.db
+    python tools/build_warehouse.py --find 12276
+    python tools/build_warehouse.py --sql "SELECT character, COUNT(*) FROM items GROUP BY character"
+    python tools/build_warehouse.py --char Alice --item-history 12276
+    python tools/build_warehouse.py --char Alice --as-of "2026-10-13 00:00"
+"""
+
+import argparse
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクト直下のモジュールを参照する
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from inventory_history import InventoryHistory
+from inventory_warehouse import DEFAULT_WAREHOUSE_PATH, InventoryWarehouse
+from live_data import DEFAULT_DB_PATH, LiveDataLoader
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest all VanaExport data into one SQLite database')
+    parser.add_argument('--export-dir', type=str, default=None, help='VanaExport data folder (default: auto-detect)')
+    parser.add_argument('--db', type=str, default=None, help='Path to items.db')
+    parser.add_argument('--db-out', type=str, default=None, help=f'Warehouse database (default: {DEFAULT_WAREHOUSE_PATH})')
+    parser.add_argument('--find', type=int, default=None, help='Print where an item ID is stored after syncing')
+    parser.add_argument('--sql', type=str, default=None, help='Run a query after syncing and print the rows')
+    parser.add_argument('--history-out', type=str, default=None, help='History database (default: data/history.db)')
+    parser.add_argument('--char', type=str, default=None, help='Character for --item-history / --as-of')
+    parser.add_argument('--item-history', type=int, default=None, help='Print when an item ID was added or removed')
+    parser.add_argument('--as-of', type=str, default=None, help='Print the inventory at "YYYY-MM-DD HH:MM"')
+    args = parser.parse_args()
+
+    as_of = None
+    if args.as_of:
+        try:
+            as_of = datetime.fromisoformat(args.as_of)
+        except ValueError:
+            print(f"Error: invalid date {args.as_of}", file=sys.stderr)
+            return 1
+    if (args.item_history is not None or as_of is not None) and not args.char:
+        print("Error: --char is required with --item-history / --as-of", file=sys.stderr)
+        return 1
+
+    loader = LiveDataLoader(Path(args.export_dir) if args.export_dir else None,
+                            Path(args.db) if args.db else DEFAULT_DB_PATH)
+    if not loader.data_path:
+        print("Error: VanaExport data folder not found", file=sys.stderr)
+        return 1
+
+    history = InventoryHistory(Path(args.history_out) if args.history_out else None)
+    warehouse = InventoryWarehouse(Path(args.db_out) if args.db_out else None, history)
+    try:
+        updated = warehouse.sync(loader)
+        print(f"{warehouse.db_path}: {len(updated)} characters updated", file=sys.stderr)
+        if args.find is not None:
+            for row in warehouse.find_item(args.find):
+                print(f"{row['character']}\t{row['storage']}\t{row['count']}")
+        if args.item_history is not None:
+            for event in history.item_events(args.char, args.item_history):
+                print(f"{event.taken_at:%Y-%m-%d %H:%M:%S}\t{event.storage}\t{event.change:+d}")
+        if as_of is not None:
+            state = history.state_at(args.char, as_of)
+            if state is None:
+                print(f"Error: no history for {args.char} before {as_of}", file=sys.stderr)
+                return 1
+            for (storage, item_id, _), count in sorted(state.items(), key=lambda kv: (kv[0][0], kv[0][1])):
+                name = loader.get_item_info(item_id).name
+                print(f"{storage}\t{item_id}\t{name}\t{count}")
+        if args.sql:
+            try:
+                for row in warehouse.conn.execute(args.sql):
+                    print("\t".join("" if v is None else str(v) for v in row))
+            except sqlite3.Error as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+    finally:
+        warehouse.close()
+        history.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+ゲーム内装備セット → GearSwap Lua 一括変換ツール
+
+USERフォルダ（またはキャラフォルダ）の es*.dat に登録された全200セットを読み、
+GearSwap の sets テーブルをジョブごとのLuaファイル（<キャラ名>_<ジョブ>.lua）に書き出す。
+
+- アイテム名は items.db を一度だけ読み込んで解決
+- オーグメント・装備可能ジョブは VanaExport の最新データ（<キャラ名>_inventory.json）から取得
+- 各セットは、全部位の装備可能ジョブの共通部分に含まれるジョブのファイルに出力
+  （ジョブ情報がない場合や、共通するジョブがない場合は <キャラ名>_All.lua）
+- ジョブごとのファイルはセット断片を順に書き込み、全体を文字列に組み立てない
+
+キャラ名は GearSet Builder で設定した表示名（data/names.ini）を使用する。
+
+使用例:
+    python tools/equipset_to_lua.py <USER> --out gearswap
+    python tools/equipset_to_lua.py <USER>/<キャラフォルダ> --char Alice --job COR --job WAR
+    python tools/equipset_to_lua.py <USER> --export-dir <Windower>/addons/VanaExport/data
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# プロジェクト直下のモジュールを参照する
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import tools.parse_equipset as parse_equipset
+from equipset_index import CharacterNameMapper
+from equipset_validator import InventoryItemIndex
+from gearswap_lua import iter_gearswap_lua, write_gearswap_lua
+from live_data import DEFAULT_DB_PATH, LiveDataLoader
+from search_query import JOB_IDS, jobs_to_mask
+
+# ジョブID -> 略称（ファイル名に使用）
+JOB_ABBREVIATIONS = {job_id: name for name, job_id in JOB_IDS.items() if name.isascii()}
+ALL_JOBS = (1 << 23) - 2   # bit 1～22
+
+NAMES_INI = Path(__file__).parent.parent / "data" / "names.ini"
+
+
+def set_jobs(slots: Dict[str, Any]) -> int:
+    """全部位の装備可能ジョブの共通部分（ジョブ情報のない装備は制約なしとして扱う）
+
+    どの装備にもジョブ情報がなければ 0 を返す。
+    """
+    mask = ALL_JOBS
+    known = False
+    for item in slots.values():
+        jobs = item.get("jobs") if isinstance(item, dict) else getattr(item, "jobs", None)
+        item_mask = jobs_to_mask(jobs)
+        if item_mask:
+            mask &= item_mask
+            known = True
+    return mask if known else 0
+
+
+def convert_folder(sets: List[parse_equipset.ScannedSet], item_index: Optional[InventoryItemIndex],
+                   item_dict: Dict[int, str]) -> Tuple[Dict[Optional[int], Dict[str, Dict[str, Any]]], int]:
+    """1キャラ分のセットをジョブごとの {セット名: {スロット: 装備}} に振り分ける
+
+    Returns:
+        (ジョブID（None = ジョブ不明） -> セット, VanaExportに見つからなかった装備の数)
+    """
+    by_job: Dict[Optional[int], Dict[str, Dict[str, Any]]] = {}
+    unresolved = 0
+    storage_names: Dict[int, str] = {}
+    for global_index, name, storage_ids, bag_indexes, item_ids in sets:
+        slots: Dict[str, Any] = {}
+        for slot_no, slot_key in enumerate(parse_equipset.EQUIPMENT_SLOTS):
+            item_id = item_ids[slot_no]
+            if not item_id:
+                continue
+            item = None
+            if item_index is not None:
+                storage = storage_names.get(storage_ids[slot_no])
+                if storage is None:
+                    storage = item_index.map_storage(parse_equipset.get_storage_name(storage_ids[slot_no]))
+                    storage_names[storage_ids[slot_no]] = storage
+                item = item_index.find(item_id, storage, bag_indexes[slot_no])
+            if item is None:
+                # エクスポートにない装備は名前だけ（オーグメントなし）
+                unresolved += 1
+                item = {"id": item_id, "name": item_dict.get(item_id, f"ID:{item_id}")}
+            slots[slot_key] = item
+        if not slots:
+            continue
+
+        set_name = name or f"Set{global_index}"
+        mask = set_jobs(slots)
+        job_ids = [job_id for job_id in JOB_ABBREVIATIONS if mask & (1 << job_id)]
+        for job_id in job_ids or [None]:
+            job_sets = by_job.setdefault(job_id, {})
+            # 同名のセットは通し番号を付けて区別
+            key = set_name if set_name not in job_sets else f"{set_name}_{global_index}"
+            job_sets[key] = slots
+    return by_job, unresolved
+
+
+def job_label(job_id: Optional[int]) -> str:
+    return JOB_ABBREVIATIONS.get(job_id, "All") if job_id else "All"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert in-game equipsets to GearSwap Lua files')
+    parser.add_argument('path', help='USER folder or character folder containing es*.dat')
+    parser.add_argument('--out', '-o', type=str, default='.', help='Output directory (default: current directory)')
+    parser.add_argument('--char', action='append', default=None,
+                        help='Character name (single folder) or display names to convert (repeatable)')
+    parser.add_argument('--job', action='append', default=None, help='Only write these jobs (e.g. --job WAR)')
+    parser.add_argument('--export-dir', type=str, default=None, help='VanaExport data folder (default: auto-detect)')
+    parser.add_argument('--db', type=str, default=None, help='Path to items.db')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes for parsing')
+    args = parser.parse_args()
+
+    target = Path(args.path)
+    if not target.is_dir():
+        print(f"Error: {target} is not a directory", file=sys.stderr)
+        return 1
+
+    only_jobs = None
+    if args.job:
+        only_jobs = set()
+        for value in args.job:
+            job_id = JOB_IDS.get(value.upper())
+            if job_id is None:
+                print(f"Error: unknown job {value}", file=sys.stderr)
+                return 1
+            only_jobs.add(job_id)
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # VanaExportのローダーは全キャラで共有し、アイテム名もローダーが読み込んだ items.db から引く（読み込みは1回）
+    db_path = Path(args.db) if args.db else DEFAULT_DB_PATH
+    loader = LiveDataLoader(Path(args.export_dir) if args.export_dir else None, db_path)
+    item_dict = loader.item_names()
+    if not loader.data_path:
+        print("Warning: VanaExport data not found; augments are not resolved", file=sys.stderr)
+    name_mapper = CharacterNameMapper(NAMES_INI)
+
+    folder_count = 0
+    file_count = 0
+    now = datetime.now()
+    for folder, sets in parse_equipset.scan_user_tree(target, args.workers):
+        folder = Path(folder)
+        if args.char and len(args.char) == 1 and folder == target:
+            char_name = args.char[0]
+        else:
+            char_name = name_mapper.get_name(folder.name)
+            if args.char and char_name not in args.char:
+                continue
+        folder_count += 1
+
+        snapshot = loader.load_snapshot(char_name)
+        if snapshot is None:
+            print(f"Warning: no VanaExport data for {char_name}; augments are not resolved", file=sys.stderr)
+        item_index = InventoryItemIndex(snapshot.items) if snapshot else None
+
+        by_job, unresolved = convert_folder(sets, item_index, item_dict)
+        for job_id, job_sets in by_job.items():
+            if only_jobs is not None and job_id not in only_jobs:
+                continue
+            out_path = out_dir / f"{char_name}_{job_label(job_id)}.lua"
+            write_gearswap_lua(out_path, iter_gearswap_lua({job_id: job_sets}, job_label, now=now))
+            file_count += 1
+            print(f"{out_path}: {len(job_sets)} sets", file=sys.stderr)
+        if unresolved and snapshot is not None:
+            print(f"Warning: {char_name}: {unresolved} slots not found in VanaExport data", file=sys.stderr)
+
+    if not folder_count:
+        print(f"Error: no equipset folders found under {target}", file=sys.stderr)
+        return 1
+    print(f"Wrote {file_count} files for {folder_count} characters", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
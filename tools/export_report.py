@@ -0,0 +1,56 @@
+"""
+全キャラクター所持品レポート出力ツール
+
+全キャラクターの所持品を1つの HTML / CSV ファイルに書き出す。
+形式は出力ファイルの拡張子（.html / .csv）で決まり、末尾に .gz を付けると gzip 圧縮する。
+キャラクターは1人ずつ読み込んで逐次書き出すため、キャラ数が増えてもメモリ使用量は一定。
+
+- 既定は VanaExport のデータ（なければクライアントの .dat）から読み込む（個数・オーグメント名の解決あり）
+- --dat 指定時は USER フォルダの .dat を直接読み、レコード番号・param1 も出力する
+
+使用例:
+    python tools/export_report.py report.html
+    python tools/export_report.py report.csv.gz --char Alice --char Bob
+    python tools/export_report.py report.html --dat --user <FFXI>/USER
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# プロジェクト直下のモジュールを参照する
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import report_export
+from inventory import InventoryParser
+from live_data import DEFAULT_DB_PATH, LiveDataLoader
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export an inventory report for all characters')
+    parser.add_argument('output', help='Output file (.html / .csv, optionally followed by .gz)')
+    parser.add_argument('--char', action='append', default=None, help='Only these characters (repeatable)')
+    parser.add_argument('--dat', action='store_true', help='Read the client .dat files directly')
+    parser.add_argument('--user', type=str, default=None, help='FFXI USER folder (required with --dat)')
+    parser.add_argument('--export-dir', type=str, default=None, help='VanaExport data folder (default: auto-detect)')
+    parser.add_argument('--db', type=str, default=None, help='Path to items.db')
+    parser.add_argument('--format', choices=['html', 'csv'], default=None, help='Override the output format')
+    args = parser.parse_args()
+
+    db_path = Path(args.db) if args.db else DEFAULT_DB_PATH
+    if args.dat:
+        if not args.user:
+            print("Error: --user is required with --dat", file=sys.stderr)
+            return 1
+        inv_parser = InventoryParser(args.user, str(db_path))
+        groups = report_export.parser_groups(inv_parser, args.char)
+    else:
+        loader = LiveDataLoader(Path(args.export_dir) if args.export_dir else None, db_path, args.user)
+        groups = report_export.loader_groups(loader, args.char)
+
+    count = report_export.write_report(groups, Path(args.output), args.format)
+    print(f"Wrote {count} items to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,7 @@ VanaInventory用の軽量DBを生成します。
 
 使用例:
     python tools/generate_item_db.py --input path/to/items.lua
+    python tools/generate_item_db.py --update-keys   # 既存DBに検索キーのみ追加
 """
 
 import argparse
@@ -18,6 +19,10 @@ import sys
 import datetime
 from pathlib import Path
 
+# プロジェクト直下のモジュール（検索キーの正規化）を参照する
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from text_normalize import make_item_search_key
+
 # 出力先
 OUTPUT_DB = Path(__file__).parent.parent / "data" / "items.db"
 
@@ -40,7 +45,8 @@ def create_output_db(output_path: Path) -> sqlite3.Connection:
             category TEXT,
             type INTEGER,
             skill INTEGER,
-            slots INTEGER
+            slots INTEGER,
+            search_key TEXT
         )
     """)
     
@@ -85,11 +91,12 @@ def import_from_windower_lua(input_path: Path, output_conn: sqlite3.Connection):
         slots = int(slots_match.group(1)) if slots_match else None
         
         if en_name or ja_name:
-            items.append((int(item_id), ja_name, en_name, category, item_type, skill, slots))
+            search_key = make_item_search_key(ja_name, en_name)
+            items.append((int(item_id), ja_name, en_name, category, item_type, skill, slots, search_key))
     
     output_cursor = output_conn.cursor()
     output_cursor.executemany(
-        "INSERT OR REPLACE INTO items (id, name_ja, name_en, category, type, skill, slots) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        "INSERT OR REPLACE INTO items (id, name_ja, name_en, category, type, skill, slots, search_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
         items
     )
     output_conn.commit()
@@ -97,6 +104,23 @@ def import_from_windower_lua(input_path: Path, output_conn: sqlite3.Connection):
     print(f"Imported {len(items)} items from items.lua")
 
 
+def update_search_keys(conn: sqlite3.Connection):
+    """既存DBに検索キー列を追加（または再計算）する"""
+    cursor = conn.cursor()
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(items)")}
+    if "search_key" not in columns:
+        cursor.execute("ALTER TABLE items ADD COLUMN search_key TEXT")
+    
+    rows = cursor.execute("SELECT id, name_ja, name_en FROM items").fetchall()
+    cursor.executemany(
+        "UPDATE items SET search_key = ? WHERE id = ?",
+        [(make_item_search_key(name_ja, name_en), item_id) for item_id, name_ja, name_en in rows]
+    )
+    conn.commit()
+    
+    print(f"Updated search keys for {len(rows)} items")
+
+
 def add_metadata(conn: sqlite3.Connection, input_path: str):
     """メタデータを追加"""
     cursor = conn.cursor()
@@ -111,11 +135,21 @@ def add_metadata(conn: sqlite3.Connection, input_path: str):
 
 def main():
     parser = argparse.ArgumentParser(description="Generate item database for VanaInventory from items.lua")
-    parser.add_argument("--input", required=True, help="Path to items.lua")
+    parser.add_argument("--input", help="Path to items.lua")
     parser.add_argument("--output", default=str(OUTPUT_DB), help="Output DB path")
+    parser.add_argument("--update-keys", action="store_true", help="Only add/refresh search keys in an existing DB")
     
     args = parser.parse_args()
     
+    if args.update_keys:
+        conn = sqlite3.connect(args.output)
+        update_search_keys(conn)
+        conn.close()
+        return
+    
+    if not args.input:
+        parser.error("--input is required")
+    
     input_path = Path(args.input)
     output_path = Path(args.output)
     
@@ -20,12 +20,20 @@ es0.dat: 装備セット 1～20
 es1.dat: 装備セット 21～40
 ...
 es9.dat: 装備セット 181～200
+
+■USERフォルダの一括スキャン:
+python tools/parse_equipset.py <USER> --scan                    # JSON Lines を標準出力へ
+python tools/parse_equipset.py <USER> --scan --jsonl sets.jsonl
+python tools/parse_equipset.py <USER> --scan --binary sets.bin  # 配列そのままの小さいバイナリ
 """
 
+import os
 import sys
+import mmap
 import struct
+from array import array
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, Tuple, IO
 
 # ファイル構造定数
 HEADER_SIZE = 24      # ヘッダーサイズ
@@ -36,6 +44,10 @@ SLOT_SIZE = 4         # 各スロットのサイズ
 SET_NAME_SIZE = 16    # セット名のサイズ
 EQUIPMENT_OFFSET = 16 # セット内の装備データ開始オフセット
 
+# 1セット分のレイアウト: セット名(16s) + 16スロット × (ストレージID(B), バッグ内インデックス(B), アイテムID(<H))
+SET_STRUCT = struct.Struct("<%ds" % SET_NAME_SIZE + "BBH" * SLOT_COUNT)
+SLOT_STRUCT = struct.Struct("<BBH")
+
 # ストレージID（バッグID）のマッピング
 # FFXIクライアント内で使用される可能性のあるID
 # 実際の値は 0x20 オフセットを含む場合あり
@@ -226,6 +238,132 @@ def parse_equipset_file(filepath: Path, file_index: int = 0, item_dict: Dict[int
     return result
 
 
+class CompactEquipsetFile:
+    """es*.dat 1ファイル分の解析結果（配列形式）
+
+    全 20セット × 16スロット を3本の配列（ストレージID / バッグ内インデックス / アイテムID、
+    いずれも セット番号 * SLOT_COUNT + スロット番号 の順）で保持する。
+    parse_equipset_file() と同じ形式の辞書は、表示するセットについてだけ set_view() で作る。
+    """
+
+    __slots__ = ("filename", "file_index", "file_size", "header", "names",
+                 "storage_ids", "bag_indexes", "item_ids")
+
+    def __init__(self, filename: str, file_index: int, file_size: int, header: bytes,
+                 names: List[str], storage_ids: array, bag_indexes: array, item_ids: array):
+        self.filename = filename
+        self.file_index = file_index
+        self.file_size = file_size
+        self.header = header
+        self.names = names
+        self.storage_ids = storage_ids
+        self.bag_indexes = bag_indexes
+        self.item_ids = item_ids
+
+    @property
+    def set_count(self) -> int:
+        return len(self.names)
+
+    def global_index(self, set_idx: int) -> int:
+        """通し番号（1～200）"""
+        return self.file_index * SET_COUNT + set_idx + 1
+
+    def item_count(self, set_idx: int) -> int:
+        """空でないスロットの数"""
+        base = set_idx * SLOT_COUNT
+        storage_ids = self.storage_ids
+        item_ids = self.item_ids
+        return sum(
+            1 for i in range(base, base + SLOT_COUNT)
+            if storage_ids[i] != 0 or item_ids[i] != 0
+        )
+
+    def set_view(self, set_idx: int, item_dict: Dict[int, str] = None) -> Dict[str, Any]:
+        """1セット分を parse_equipset_file() の "sets" 要素と同じ形式の辞書にする"""
+        slots = {}
+        base = set_idx * SLOT_COUNT
+        for i, slot_key in enumerate(EQUIPMENT_SLOTS):
+            storage_id = self.storage_ids[base + i]
+            bag_index = self.bag_indexes[base + i]
+            item_id = self.item_ids[base + i]
+            slot_data = {
+                "storage_id": storage_id,
+                "storage_name": get_storage_name(storage_id),
+                "bag_index": bag_index,
+                "item_id": item_id,
+                "raw": SLOT_STRUCT.pack(storage_id, bag_index, item_id).hex(),
+                "empty": storage_id == 0 and item_id == 0,
+            }
+            if item_dict and item_id > 0:
+                slot_data["item_name"] = item_dict.get(item_id, f"Unknown Item ({item_id})")
+            slots[slot_key] = slot_data
+        return {
+            "index": set_idx + 1,
+            "name": self.names[set_idx],
+            "slots": slots,
+            "global_index": self.global_index(set_idx),
+        }
+
+    def to_dict(self, item_dict: Dict[int, str] = None) -> Dict[str, Any]:
+        """parse_equipset_file() と同じ形式の辞書にする"""
+        return {
+            "filename": self.filename,
+            "file_size": self.file_size,
+            "file_index": self.file_index,
+            "set_range_start": self.file_index * SET_COUNT + 1,
+            "set_range_end": (self.file_index + 1) * SET_COUNT,
+            "sets": [self.set_view(i, item_dict) for i in range(self.set_count)],
+            "header": self.header.hex(),
+        }
+
+
+def parse_equipset_file_compact(filepath: Path, file_index: int = 0) -> Optional[CompactEquipsetFile]:
+    """装備セットファイルを配列形式で解析（ファイルがなければNone）
+
+    ファイルを mmap してコピーせずに memoryview で参照し、全セットを
+    SET_STRUCT.iter_unpack の1回で読み取る。
+    """
+    try:
+        with open(filepath, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            if file_size == 0:
+                data = b""
+                mapped = None
+            else:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                data = mapped
+            try:
+                view = memoryview(data)
+                try:
+                    header = bytes(view[:HEADER_SIZE])
+                    set_count = min(SET_COUNT, max(0, (file_size - HEADER_SIZE) // SET_SIZE))
+                    records = list(SET_STRUCT.iter_unpack(
+                        view[HEADER_SIZE:HEADER_SIZE + set_count * SET_SIZE]
+                    ))
+                finally:
+                    view.release()
+            finally:
+                if mapped is not None:
+                    mapped.close()
+    except OSError:
+        return None
+
+    names = [decode_set_name(record[0]) for record in records]
+    # record[1:] は (ストレージID, インデックス, アイテムID) × 16 の並び
+    storage_ids = array("B")
+    bag_indexes = array("B")
+    item_ids = array("H")
+    for record in records:
+        storage_ids.extend(record[1::3])
+        bag_indexes.extend(record[2::3])
+        item_ids.extend(record[3::3])
+
+    return CompactEquipsetFile(
+        Path(filepath).name, file_index, file_size, header,
+        names, storage_ids, bag_indexes, item_ids,
+    )
+
+
 def parse_all_equipset_files(folder: Path, item_dict: Dict[int, str] = None) -> List[Dict[str, Any]]:
     """フォルダ内の全es*.datを解析"""
     results = []
@@ -254,6 +392,243 @@ def load_character_equipsets(char_folder: Path, item_dict: Dict[int, str] = None
     return parse_all_equipset_files(char_folder, item_dict)
 
 
+class EquipsetCache:
+    """キャラクターフォルダごとの装備セット解析結果のキャッシュ（UI向け）
+
+    - アイテム名は items.db から最初に必要になったときに一度だけ読み込む
+    - 解析結果は配列形式（CompactEquipsetFile）でファイルごとに (サイズ, 更新時刻) をキーとして保持し、
+      変わったファイルだけ再解析する。辞書形式は表示するセットについてだけ作る
+    - 一度読み込んだフォルダは invalidate() されるまでディスクに触れずに結果を返す
+      （ゲームによる書き換えはファイル監視側から invalidate() を呼んで通知する）
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path
+        self._item_dict: Optional[Dict[int, str]] = None
+        # ファイルパス -> ((サイズ, 更新時刻), 解析結果)
+        self._files: Dict[Path, Any] = {}
+        # フォルダ -> 存在するes*.datの解析結果（ファイル番号順）
+        self._folders: Dict[Path, List[CompactEquipsetFile]] = {}
+
+    @property
+    def item_dict(self) -> Dict[int, str]:
+        """アイテム辞書（初回のみDBから読み込み）"""
+        if self._item_dict is None:
+            self._item_dict = load_item_dictionary(self.db_path) if self.db_path else {}
+        return self._item_dict
+
+    def load(self, char_folder: Path) -> List[CompactEquipsetFile]:
+        """フォルダの全装備セットを取得"""
+        char_folder = Path(char_folder)
+        cached = self._folders.get(char_folder)
+        if cached is not None:
+            return cached
+
+        results = []
+        for i in range(10):
+            filepath = char_folder / f"es{i}.dat"
+            try:
+                st = filepath.stat()
+            except OSError:
+                self._files.pop(filepath, None)
+                continue
+
+            key = (st.st_size, st.st_mtime_ns)
+            entry = self._files.get(filepath)
+            if entry is None or entry[0] != key:
+                compact = parse_equipset_file_compact(filepath, i)
+                if compact is None:
+                    continue
+                entry = (key, compact)
+                self._files[filepath] = entry
+            results.append(entry[1])
+
+        self._folders[char_folder] = results
+        return results
+
+    def set_view(self, compact: CompactEquipsetFile, set_idx: int) -> Dict[str, Any]:
+        """1セット分の辞書（アイテム名付き）を作成"""
+        return compact.set_view(set_idx, self.item_dict)
+
+    def invalidate(self, path: Path) -> None:
+        """ファイルまたはフォルダが変更されたことを通知（次回の load() で再確認する）"""
+        path = Path(path)
+        self._folders.pop(path, None)
+        self._folders.pop(path.parent, None)
+
+    def clear(self) -> None:
+        """キャッシュをすべて破棄"""
+        self._files.clear()
+        self._folders.clear()
+
+
+# =========================
+# USERフォルダ一括スキャン
+# =========================
+
+# 一括スキャンの1セット分: (通し番号, セット名, ストレージID×16, バッグ内インデックス×16, アイテムID×16)
+ScannedSet = Tuple[int, str, Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]
+
+# バイナリ出力の形式
+# ファイル先頭: マジック(4s) + バージョン(H)
+# フォルダごと: パス長(H) + パス(UTF-8) + セット数(H)
+# セットごと: 通し番号(H) + 名前長(B) + 名前(UTF-8) + ストレージID(16B) + インデックス(16B) + アイテムID(16H)
+BINARY_MAGIC = b"FFES"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sH")
+BINARY_FOLDER = struct.Struct("<H")
+BINARY_SET_HEAD = struct.Struct("<HB")
+BINARY_SET_SLOTS = struct.Struct("<%dB%dB%dH" % (SLOT_COUNT, SLOT_COUNT, SLOT_COUNT))
+
+
+def find_character_folders(root: Path) -> List[Path]:
+    """root 以下で es*.dat を含むフォルダをすべて探す（複数アカウント・複数インストールのUSERに対応）"""
+    folders = set()
+    for dirpath, _dirnames, filenames in os.walk(root):
+        if any(name.startswith("es") and name.endswith(".dat") for name in filenames):
+            folders.add(Path(dirpath))
+    return sorted(folders)
+
+
+def scan_character_folder(folder: Path) -> Tuple[str, List[ScannedSet]]:
+    """1キャラフォルダの空でないセットを取得（プロセスプールのワーカー用）"""
+    sets = []
+    for i in range(10):
+        compact = parse_equipset_file_compact(Path(folder) / f"es{i}.dat", i)
+        if compact is None:
+            continue
+        for set_idx in range(compact.set_count):
+            name = compact.names[set_idx]
+            if not name and not compact.item_count(set_idx):
+                continue
+            start = set_idx * SLOT_COUNT
+            end = start + SLOT_COUNT
+            sets.append((
+                compact.global_index(set_idx),
+                name,
+                tuple(compact.storage_ids[start:end]),
+                tuple(compact.bag_indexes[start:end]),
+                tuple(compact.item_ids[start:end]),
+            ))
+    return str(folder), sets
+
+
+def scan_user_tree(root: Path, workers: Optional[int] = None) -> Iterator[Tuple[str, List[ScannedSet]]]:
+    """USERフォルダ以下の全キャラフォルダをプロセスプールで解析し、フォルダ単位で順に返す
+
+    結果はフォルダ単位で受け取ってすぐに返すため、メモリ使用量はフォルダ数に比例しない
+    （ワーカー数 × 1フォルダ分程度）。
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    folders = find_character_folders(root)
+    if not folders:
+        return
+    if workers == 1 or len(folders) == 1:
+        for folder in folders:
+            yield scan_character_folder(folder)
+        return
+
+    workers = workers or min(len(folders), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for folder in folders:
+            pending.append(executor.submit(scan_character_folder, folder))
+            # 先行して投入する数を制限し、結果を溜め込まない
+            if len(pending) >= workers * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def write_scan_jsonl(scan: Iterator[Tuple[str, List[ScannedSet]]], out: IO[str],
+                     item_dict: Dict[int, str] = None) -> int:
+    """一括スキャン結果を JSON Lines（1行1セット）で書き出し、書き出したセット数を返す"""
+    import json
+
+    count = 0
+    for folder, sets in scan:
+        char_id = Path(folder).name
+        for global_index, name, storage_ids, bag_indexes, item_ids in sets:
+            slots = {}
+            for slot_key, storage_id, bag_index, item_id in zip(EQUIPMENT_SLOTS, storage_ids, bag_indexes, item_ids):
+                if storage_id == 0 and item_id == 0:
+                    continue
+                slot = {
+                    "storage_id": storage_id,
+                    "storage_name": get_storage_name(storage_id),
+                    "bag_index": bag_index,
+                    "item_id": item_id,
+                }
+                if item_dict and item_id > 0:
+                    slot["item_name"] = item_dict.get(item_id, f"Unknown Item ({item_id})")
+                slots[slot_key] = slot
+            record = {
+                "folder": folder,
+                "character": char_id,
+                "global_index": global_index,
+                "name": name,
+                "slots": slots,
+            }
+            out.write(json.dumps(record, ensure_ascii=False))
+            out.write("\n")
+            count += 1
+        out.flush()
+    return count
+
+
+def write_scan_binary(scan: Iterator[Tuple[str, List[ScannedSet]]], out: IO[bytes]) -> int:
+    """一括スキャン結果をバイナリ形式で書き出し、書き出したセット数を返す"""
+    out.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION))
+    count = 0
+    for folder, sets in scan:
+        folder_raw = folder.encode("utf-8")
+        out.write(BINARY_FOLDER.pack(len(folder_raw)))
+        out.write(folder_raw)
+        out.write(BINARY_FOLDER.pack(len(sets)))
+        for global_index, name, storage_ids, bag_indexes, item_ids in sets:
+            name_raw = name.encode("utf-8")[:255]
+            out.write(BINARY_SET_HEAD.pack(global_index, len(name_raw)))
+            out.write(name_raw)
+            out.write(BINARY_SET_SLOTS.pack(*storage_ids, *bag_indexes, *item_ids))
+            count += 1
+    out.flush()
+    return count
+
+
+def read_scan_binary(stream: IO[bytes]) -> Iterator[Tuple[str, List[ScannedSet]]]:
+    """write_scan_binary() の出力をフォルダ単位で読み込む"""
+    def read_exact(size: int) -> bytes:
+        data = stream.read(size)
+        if len(data) != size:
+            raise ValueError("バイナリが途中で終わっています")
+        return data
+
+    header = stream.read(BINARY_HEADER.size)
+    if not header:
+        return
+    magic, version = BINARY_HEADER.unpack(header)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError(f"対応していない形式です: {magic!r} v{version}")
+
+    while True:
+        head = stream.read(BINARY_FOLDER.size)
+        if not head:
+            return
+        (folder_len,) = BINARY_FOLDER.unpack(head)
+        folder = read_exact(folder_len).decode("utf-8")
+        (set_count,) = BINARY_FOLDER.unpack(read_exact(BINARY_FOLDER.size))
+        sets = []
+        for _ in range(set_count):
+            global_index, name_len = BINARY_SET_HEAD.unpack(read_exact(BINARY_SET_HEAD.size))
+            name = read_exact(name_len).decode("utf-8", errors="replace")
+            values = BINARY_SET_SLOTS.unpack(read_exact(BINARY_SET_SLOTS.size))
+            sets.append((
+                global_index, name,
+                values[:SLOT_COUNT], values[SLOT_COUNT:SLOT_COUNT * 2], values[SLOT_COUNT * 2:],
+            ))
+        yield folder, sets
+
 
 def print_detailed_analysis(results: List[Dict[str, Any]], show_empty: bool = False) -> None:
     """詳細な解析結果を表示"""
@@ -351,11 +726,19 @@ def main():
     parser.add_argument('--all', '-a', action='store_true', help='Show empty sets/slots')
     parser.add_argument('--json', '-j', type=str, help='Export to JSON file')
     parser.add_argument('--db', type=str, help='Path to items.db for item names')
+    parser.add_argument('--scan', action='store_true',
+                        help='Scan every character folder under path (JSON Lines to stdout by default)')
+    parser.add_argument('--jsonl', type=str, help='With --scan: write JSON Lines to this file')
+    parser.add_argument('--binary', type=str, help='With --scan: write compact binary to this file')
+    parser.add_argument('--workers', type=int, default=None, help='With --scan: number of worker processes')
     
     args = parser.parse_args()
     
     target = Path(args.path)
     
+    if args.scan:
+        sys.exit(run_scan(target, args))
+    
     # アイテム辞書をロード
     item_dict = {}
     if args.db:
@@ -385,5 +768,30 @@ def main():
         export_to_json(results, Path(args.json))
 
 
+def run_scan(target: Path, args) -> int:
+    """--scan: USERフォルダ以下を一括解析して書き出す"""
+    if not target.is_dir():
+        print(f"Error: {target} is not a directory", file=sys.stderr)
+        return 1
+    
+    scan = scan_user_tree(target, args.workers)
+    if args.binary:
+        with open(args.binary, "wb") as f:
+            count = write_scan_binary(scan, f)
+        print(f"Wrote {count} sets to {args.binary}", file=sys.stderr)
+        return 0
+    
+    # JSON Lines はアイテム名付き（辞書はメインプロセスで一度だけ読み込む）
+    db_path = Path(args.db) if args.db else Path(__file__).parent.parent / "data" / "items.db"
+    item_dict = load_item_dictionary(db_path)
+    if args.jsonl:
+        with open(args.jsonl, "w", encoding="utf-8") as f:
+            count = write_scan_jsonl(scan, f, item_dict)
+        print(f"Wrote {count} sets to {args.jsonl}", file=sys.stderr)
+    else:
+        write_scan_jsonl(scan, sys.stdout, item_dict)
+    return 0
+
+
 if __name__ == "__main__":
     main()
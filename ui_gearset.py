@@ -4,9 +4,9 @@ Phase 2: GearSwap Lua生成に向けた装備セット管理
 """
 
 import sys
-import configparser
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, List, Optional, TYPE_CHECKING, Union
+from typing import Dict, Any, Callable, Iterable, List, Mapping, Optional, Tuple, TYPE_CHECKING, Union
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -19,6 +19,7 @@ from PyQt6.QtWidgets import (
     QPushButton,
     QListWidget,
     QListWidgetItem,
+    QListView,
     QFrame,
     QSplitter,
     QGroupBox,
@@ -29,12 +30,23 @@ from PyQt6.QtWidgets import (
     QTextEdit,
     QTabWidget,
     QInputDialog,
+    QDialog,
+    QDialogButtonBox,
+)
+from PyQt6.QtCore import (
+    Qt, QMimeData, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QFileSystemWatcher,
 )
-from PyQt6.QtCore import Qt, QMimeData
 from PyQt6.QtGui import QFont, QFontMetrics, QDrag, QDragEnterEvent, QDropEvent
 
 # LiveItem型のインポート
 from live_data import LiveItem, LiveDataLoader
+from search_query import jobs_to_mask
+from text_normalize import normalize_search_key, query_search_keys
+from equipset_index import DEFAULT_USER_PATHS, CharacterNameMapper, find_default_user_path
+from equipset_validator import InventoryItemIndex, SlotStatus, validate_all_characters
+from gearset_store import GearSetStore
+from gearswap_lua import LuaFragmentCache, iter_gearswap_lua, render_set, write_gearswap_lua
+from wardrobe_planner import WARDROBE_STORAGES, ingame_sets_to_groups, plan_wardrobes
 
 # ゲーム内装備セットパーサーのインポート
 import tools.parse_equipset as parse_equipset
@@ -45,38 +57,6 @@ import tools.parse_equipset as parse_equipset
 # 中右列: Range, Ear1, Ring1, Legs
 # 右列: Ammo, Ear2, Ring2, Feet
 
-class CharacterNameMapper:
-    """キャラフォルダIDと表示名のマッピングを管理(names.ini)"""
-    def __init__(self, ini_path: Path):
-        self.ini_path = ini_path
-        self.config = configparser.ConfigParser()
-        self.section = "DisplayNames"
-        self.load()
-
-    def load(self):
-        if self.ini_path.exists():
-            try:
-                self.config.read(self.ini_path, encoding="utf-8")
-            except Exception as e:
-                print(f"Warning: Failed to load {self.ini_path}: {e}")
-        
-        if self.section not in self.config:
-            self.config[self.section] = {}
-
-    def get_name(self, folder_id: str) -> str:
-        return self.config[self.section].get(folder_id, folder_id)
-
-    def set_name(self, folder_id: str, display_name: str):
-        self.config[self.section][folder_id] = display_name
-        self.save()
-
-    def save(self):
-        try:
-            with open(self.ini_path, "w", encoding="utf-8") as f:
-                self.config.write(f)
-        except Exception as e:
-            print(f"Warning: Failed to save {self.ini_path}: {e}")
-
 EQUIPMENT_SLOTS = [
     ("main", "メイン"),
     ("sub", "サブ"),
@@ -96,33 +76,6 @@ EQUIPMENT_SLOTS = [
     ("feet", "両足"),
 ]
 
-# GearSwap Lua出力用のスロット名マッピング
-LUA_SLOT_MAP = {
-    "main": "main",
-    "sub": "sub",
-    "range": "range",
-    "ammo": "ammo",
-    "head": "head",
-    "body": "body",
-    "hands": "hands",
-    "legs": "legs",
-    "feet": "feet",
-    "neck": "neck",
-    "waist": "waist",
-    "ear1": "left_ear",
-    "ear2": "right_ear",
-    "ring1": "left_ring",
-    "ring2": "right_ring",
-    "back": "back",
-}
-
-# GearSwap Lua出力用の標準的な並び順
-LUA_SLOT_ORDER = [
-    "main", "sub", "range", "ammo",
-    "head", "body", "hands", "legs", "feet",
-    "neck", "waist", "ear1", "ear2", "ring1", "ring2", "back"
-]
-
 # スロット名からslots値へのマッピング（DBのslotsカラム用）
 SLOT_TO_DB_VALUE = {
     "main": 1,      # Main
@@ -173,6 +126,103 @@ ARMOR_SLOT_TYPES = {
     32768: "背",
 }
 
+# ジョブ情報がないアイテム用のマスク（どのジョブでも表示）
+ALL_JOBS_MASK = -1
+
+
+def _jobs_to_filter_mask(jobs_data: Any) -> int:
+    """ジョブ情報（ビットフラグ/リスト/辞書）を bit n = ジョブID n のマスクに変換
+
+    変換は Search All の job: と同じ jobs_to_mask() で行う（ビットフラグは bit (job_id-1)）。
+    """
+    if not isinstance(jobs_data, (int, list, dict)):
+        return ALL_JOBS_MASK  # 情報がなければフィルタしない
+    return jobs_to_mask(jobs_data)
+
+
+@dataclass(frozen=True)
+class EquipmentFilterRecord:
+    """装備リストの1行分のフィルタ用情報（リスト作成時に一度だけ計算）"""
+    name_key: str   # 正規化済みの検索キー
+    slots: int      # 装備部位のビットマスク（DBのslots値）
+    jobs: int       # bit n = ジョブID n のマスク
+
+
+class EquipmentListModel(QAbstractListModel):
+    """GearSet Builder の装備リスト（所持品の装備品）のモデル
+
+    アイテムとフィルタ用情報を行ごとに保持するだけで、表示文字列は
+    ビューが描画する行についてのみ生成する。
+    """
+
+    def __init__(self, label_func: Callable[[Union[Dict[str, Any], LiveItem]], str], parent=None):
+        super().__init__(parent)
+        self._label_func = label_func
+        self._items: List[Union[Dict[str, Any], LiveItem]] = []
+        self._records: List[EquipmentFilterRecord] = []
+
+    def set_items(self, items: List[Union[Dict[str, Any], LiveItem]], records: List[EquipmentFilterRecord]):
+        """行を差し替える（items と records は同じ並び）"""
+        self.beginResetModel()
+        self._items = items
+        self._records = records
+        self.endResetModel()
+
+    def item_at(self, row: int) -> Union[Dict[str, Any], LiveItem]:
+        return self._items[row]
+
+    def record_at(self, row: int) -> EquipmentFilterRecord:
+        return self._records[row]
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._items)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._label_func(self._items[index.row()])
+        if role == Qt.ItemDataRole.UserRole:
+            return self._items[index.row()]
+        return None
+
+
+class EquipmentFilterProxyModel(QSortFilterProxyModel):
+    """装備リストの絞り込み（検索キー・部位マスク・ジョブマスク）"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._filter = ((), 0, 0)
+
+    def set_filter(self, search_keys: Tuple[str, ...], slot_mask: int, job_mask: int):
+        """絞り込み条件を設定（条件が変わらなければ何もしない）"""
+        new_filter = (tuple(search_keys), slot_mask, job_mask)
+        if new_filter == self._filter:
+            return
+        if hasattr(self, "beginFilterChange"):  # Qt 6.9 以降
+            self.beginFilterChange()
+            self._filter = new_filter
+            self.endFilterChange()
+        else:
+            self._filter = new_filter
+            self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        search_keys, slot_mask, job_mask = self._filter
+        record = self.sourceModel().record_at(source_row)
+        # スロットフィルタ（アイテムが該当スロットに装備可能か）
+        if slot_mask and not (record.slots & slot_mask):
+            return False
+        # ジョブフィルタ
+        if job_mask and not (record.jobs & job_mask):
+            return False
+        # 検索フィルタ
+        if search_keys:
+            return any(key in record.name_key for key in search_keys)
+        return True
+
 
 class EquipmentSlotWidget(QFrame):
     """個別の装備スロットウィジェット"""
@@ -292,6 +342,8 @@ class GearSetPanel(QWidget):
         self.gear_sets_by_job: Dict[Optional[int], Dict[str, Dict[str, Any]]] = {}
         self.current_job_id: Optional[int] = None
         self.current_set_name: str = ""  # 現在編集中のセット名
+        # 保存済みセットごとのLua断片（保存・削除したセットだけ作り直す）
+        self.lua_cache = LuaFragmentCache()
         self.setup_ui()
     
     def setup_ui(self):
@@ -408,6 +460,11 @@ class GearSetPanel(QWidget):
         
         export_layout.addStretch()
         
+        self.wardrobe_plan_btn = QPushButton("モグワ配置案")
+        self.wardrobe_plan_btn.setToolTip("保存済みの全ジョブのセットに必要な装備を、最少の移動回数でモグワに収める手順を表示")
+        self.wardrobe_plan_btn.clicked.connect(self.show_wardrobe_plan)
+        export_layout.addWidget(self.wardrobe_plan_btn)
+        
         self.copy_btn = QPushButton("コピー")
         self.copy_btn.setToolTip("Luaコードをクリップボードにコピー")
         self.copy_btn.clicked.connect(self.copy_lua_to_clipboard)
@@ -459,6 +516,21 @@ class GearSetPanel(QWidget):
         self.clear_all()
         self._update_set_list()
 
+    def _library(self) -> Tuple[Optional[GearSetStore], Optional[str]]:
+        """保存済みセットのライブラリと保存先のキャラ名"""
+        if self.parent_window is None or self.parent_window.gearset_store is None:
+            return None, None
+        return self.parent_window.gearset_store, self.parent_window.char_name
+
+    def load_library(self):
+        """ライブラリからキャラクターの全ジョブのセットを読み込む"""
+        store, char_name = self._library()
+        if store is None:
+            return
+        self.gear_sets_by_job = store.load_character(char_name, self.parent_window.inventory_items)
+        self.lua_cache.clear()
+        self._update_set_list()
+
     def _get_active_sets(self) -> Dict[str, Dict[str, Any]]:
         """現在選択中ジョブのセット辞書を取得（なければ作成）"""
         return self.gear_sets_by_job.setdefault(self.current_job_id, {})
@@ -486,142 +558,25 @@ class GearSetPanel(QWidget):
         """単一セットのLuaコードを生成"""
         if not equipped:
             return "-- No equipment selected"
-            
-        lines = [f"sets['{set_name}'] = {{"]
-        
-        # 定義された順序に従って出力
-        for slot_key in LUA_SLOT_ORDER:
-            if slot_key not in equipped:
-                continue
-            
-            item = equipped[slot_key]
-            lua_slot = LUA_SLOT_MAP.get(slot_key, slot_key)
-            item_name, augments = self._get_item_lua_info(item)
-            
-            if augments:
-                # オーグメント付き
-                lines.append(f"    {lua_slot}={{name=\"{item_name}\", augments={{{augments}}}}},")
-            else:
-                # 通常
-                lines.append(f"    {lua_slot}=\"{item_name}\",")
-        
-        lines.append("}")
-        return "\n".join(lines)
-    
-    def _get_item_lua_info(self, item: Any) -> tuple:
-        """アイテムからLua出力用の情報を取得
-        
-        Returns:
-            (item_name, augments_str)
-        """
-        # LiveItemかDictかを判定
-        if hasattr(item, 'name'):
-            # LiveItem - 日本語名を使用
-            item_name = item.name
-            augments = item.augments if hasattr(item, 'augments') else None
-        else:
-            # Dict
-            item_name = item.get("name", "Unknown")
-            augments = item.get("augments")
-        
-        # 特殊文字のエスケープ（ダブルクォートのみ）
-        item_name = item_name.replace('"', '\\"')
-        
-        # オーグメント文字列を生成
-        aug_str = ""
-        if augments and len(augments) > 0:
-            aug_parts = []
-            for aug in augments:
-                # GearSwapで一般的なシングルクォート形式を使用
-                aug_parts.append(f"'{aug}'")
-            # 最後にカンマを含めるのがGearSwap流
-            aug_str = ",".join(aug_parts) + ","
-        
-        return item_name, aug_str
+        return render_set(set_name, equipped)
     
-    def _generate_gearswap_template(self) -> str:
-        """GearSwap完全版テンプレートを生成"""
-        from datetime import datetime
-        lines = [
-            "---------------------------------------------------",
-            "-- GearSwap Lua - Generated by VanaInventory",
-            f"-- Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            "---------------------------------------------------",
-            "",
-            "function get_sets()",
-            "    sets = {}",
-            ""
-        ]
-        # 全ジョブの保存済みセットを出力
-        for job_id, sets in self.gear_sets_by_job.items():
-            job_label = JOB_NAMES.get(job_id, "All") if job_id else "All"
-            lines.append(f"    -- Job: {job_label}")
-            for set_name, set_data in sets.items():
-                lines.append(f"    -- {set_name}")
-                lines.append(f"    sets['{set_name}'] = {{")
-                # 定義された順位に従って出力
-                for slot_key in LUA_SLOT_ORDER:
-                    if slot_key not in set_data:
-                        continue
-                    
-                    item = set_data[slot_key]
-                    lua_slot = LUA_SLOT_MAP.get(slot_key, slot_key)
-                    item_name, augments = self._get_item_lua_info(item)
-                    
-                    if augments:
-                        lines.append(f"        {lua_slot}={{name=\"{item_name}\", augments={{{augments}}}}},")
-                    else:
-                        lines.append(f"        {lua_slot}=\"{item_name}\",")
-                lines.append("    }")
-                lines.append("")
-        
+    def _iter_gearswap_chunks(self):
+        """GearSwap完全版のLuaコードを断片ごとに返す（保存済みセットはキャッシュを使う）"""
         # 現在のセット（未保存の場合はアクティブジョブに紐付け）
         set_name = self.set_name_edit.text().strip() or "NewSet"
         equipped = self.get_equipped_items()
         active_sets = self._get_active_sets()
-        if equipped and set_name not in active_sets:
-            lines.append(f"    sets['{set_name}'] = {{")
-            # 定義された順位に従って出力
-            for slot_key in LUA_SLOT_ORDER:
-                if slot_key not in equipped:
-                    continue
-                    
-                item = equipped[slot_key]
-                lua_slot = LUA_SLOT_MAP.get(slot_key, slot_key)
-                item_name, augments = self._get_item_lua_info(item)
-                
-                if augments:
-                    lines.append(f"        {lua_slot}={{name=\"{item_name}\", augments={{{augments}}}}},")
-                else:
-                    lines.append(f"        {lua_slot}=\"{item_name}\",")
-            lines.append("    }")
-            lines.append("")
-        
-        lines.extend([
-            "    return sets",
-            "end",
-            "",
-            "-- Precast",
-            "function precast(spell)",
-            "    -- FastCast装備などを設定",
-            "    -- if spell.action_type == 'Magic' then",
-            "    --     equip(sets.FastCast)",
-            "    -- end",
-            "end",
-            "",
-            "-- Midcast",
-            "function midcast(spell)",
-            "    -- 詠唱完了時の装備を設定",
-            "end",
-            "",
-            "-- Aftercast",
-            "function aftercast(spell)",
-            "    -- 待機装備に戻す",
-            "    -- equip(sets.Idle)",
-            "end",
-        ])
-        
-        return "\n".join(lines)
+        extra_set = (set_name, equipped) if equipped and set_name not in active_sets else None
+        return iter_gearswap_lua(
+            self.gear_sets_by_job,
+            lambda job_id: JOB_NAMES.get(job_id, "All") if job_id else "All",
+            cache=self.lua_cache,
+            extra_set=extra_set,
+        )
+    
+    def _generate_gearswap_template(self) -> str:
+        """GearSwap完全版テンプレートを生成"""
+        return "".join(self._iter_gearswap_chunks())
     
     def update_lua_preview(self):
         """Luaプレビューを更新"""
@@ -660,12 +615,25 @@ class GearSetPanel(QWidget):
             return
         
         try:
-            lua_code = self.generate_lua_code(mode="gearswap")
-            Path(file_path).write_text(lua_code, encoding="utf-8")
+            # 全体を文字列に組み立てず、セットごとの断片をそのまま書き込む
+            write_gearswap_lua(file_path, self._iter_gearswap_chunks())
             QMessageBox.information(self, "完了", f"Luaファイルを保存しました:\n{file_path}")
         except Exception as e:
             QMessageBox.critical(self, "エラー", f"ファイル保存に失敗しました:\n{e}")
     
+    def show_wardrobe_plan(self):
+        """保存済みの全ジョブのセットからモグワ配置案を表示"""
+        if not self.parent_window:
+            return
+        if not any(self.gear_sets_by_job.values()):
+            QMessageBox.warning(self, "警告", "保存済みのセットがありません")
+            return
+        groups = {
+            JOB_NAMES.get(job_id, "All") if job_id else "All": sets
+            for job_id, sets in self.gear_sets_by_job.items() if sets
+        }
+        self.parent_window.show_wardrobe_plan(groups)
+    
     def save_current_set(self):
         """現在の装備セットを保存"""
         set_name = self.set_name_edit.text().strip()
@@ -680,6 +648,10 @@ class GearSetPanel(QWidget):
 
         active_sets = self._get_active_sets()
         active_sets[set_name] = equipped.copy()
+        self.lua_cache.invalidate(self.current_job_id, set_name)
+        store, char_name = self._library()
+        if store is not None:
+            store.save_set(char_name, self.current_job_id, set_name, active_sets[set_name])
         self.current_set_name = set_name
         self._update_set_list()
         self.update_lua_preview()
@@ -700,6 +672,13 @@ class GearSetPanel(QWidget):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            del active_sets[set_name]
+            self.lua_cache.invalidate(self.current_job_id, set_name)
+            store, char_name = self._library()
+            if store is not None:
+                store.delete_set(char_name, self.current_job_id, set_name)
+            if self.current_set_name == set_name:
+                self.current_set_name = ""
             self.set_name_edit.clear()
             self._update_set_list()
     
@@ -720,68 +699,20 @@ class GearSetPanel(QWidget):
         if not self.parent_window:
             return
             
-        inventory_items = self.parent_window.inventory_items
+        item_index = self.parent_window.item_index
         slots = eq_set.get("slots", {})
         
-        # ストレージ名のマッピング (parse_equipset -> VanaExport)
-        storage_map = {
-            "Inventory": "Inventory",
-            "Wardrobe 1": "Wardrobe",
-            "Wardrobe 2": "Wardrobe 2",
-            "Wardrobe 3": "Wardrobe 3",
-            "Wardrobe 4": "Wardrobe 4",
-            "Wardrobe 5": "Wardrobe 5",
-            "Wardrobe 6": "Wardrobe 6",
-            "Wardrobe 7": "Wardrobe 7",
-            "Wardrobe 8": "Wardrobe 8",
-            "Safe": "Safe",
-            "Safe 2": "Safe 2",
-            "Storage": "Storage",
-            "Locker": "Locker",
-            "Satchel": "Satchel",
-            "Sack": "Sack",
-            "Case": "Case",
-        }
-        
         for slot_key, slot_data in slots.items():
             if slot_data.get("empty", True):
                 continue
                 
             item_id = slot_data.get("item_id")
             bag_index = slot_data.get("bag_index")
-            storage_name_raw = slot_data.get("storage_name", "")
-            
-            # ( +0x20 ) などを除去
-            storage_name = storage_name_raw.split(" (")[0]
-            mapped_storage = storage_map.get(storage_name, storage_name)
-            
-            # 在庫からマッチするアイテムを探す
-            matched_item = None
+            mapped_storage = item_index.map_storage(slot_data.get("storage_name", ""))
             
             # 1. ID + Storage + Index で厳密にマッチング
-            for item in inventory_items:
-                i_id = item.id if hasattr(item, 'id') else item.get("id")
-                i_storage = item.storage if hasattr(item, 'storage') else item.get("storage")
-                i_slot = item.slot if hasattr(item, 'slot') else item.get("slot")
-                
-                # VanaExportの 'slot' は0ベース（要確認）、parse_equipsetの 'bag_index' は1ベース
-                # 実装を確認したところ、VanaExport側も0ベースか1ベースか環境によって怪しいが、
-                # ここでは bag_index - 1 または bag_index で比較を試みる
-                
-                if i_id == item_id and i_storage == mapped_storage:
-                    # インデックスの不一致は一旦許容する（エクスポート時期によるズレを考慮）
-                    # ただし、同じIDが複数ある場合はインデックスを重視
-                    if i_slot == bag_index or i_slot == (bag_index - 1):
-                        matched_item = item
-                        break
-            
             # 2. 見つからない場合、IDだけでマッチング（予備）
-            if not matched_item:
-                for item in inventory_items:
-                    i_id = item.id if hasattr(item, 'id') else item.get("id")
-                    if i_id == item_id:
-                        matched_item = item
-                        break
+            matched_item = item_index.find(item_id, mapped_storage, bag_index)
             
             if matched_item:
                 # 画面のスロットにセット
@@ -841,7 +772,9 @@ class GearSetBuilderWindow(QMainWindow):
                  parser: 'InventoryParser' = None,
                  live_loader: 'LiveDataLoader' = None,
                  current_job_id: Optional[int] = None,
-                 char_name: str = None):
+                 char_name: str = None,
+                 gearset_store: Optional[GearSetStore] = None,
+                 storage_capacities: Optional[Mapping[str, int]] = None):
         super().__init__()
         self.setWindowTitle("GearSet Builder")
         self.resize(1000, 700)
@@ -849,8 +782,14 @@ class GearSetBuilderWindow(QMainWindow):
         self.parser = parser
         self.live_loader = live_loader
         self.char_name = char_name
+        # 保存済みセットのライブラリ（キャラ名があるときだけ読み書きする）
+        # メインウィンドウの共有ライブラリを使い、渡されなかったときだけ自分で開いて閉じる時に閉じる
+        self._owns_gearset_store = gearset_store is None and bool(char_name)
+        self.gearset_store = gearset_store or (GearSetStore() if char_name else None)
         self.is_live_mode = live_loader is not None and parser is None
         self.current_job_id = current_job_id
+        # ストレージ名 -> 最大枠数（エクスポートの max_slots。モグワ配置案で使う）
+        self.storage_capacities = storage_capacities or {}
         self.active_slot_filter: Optional[str] = None  # スロットクリック由来のフィルタ（コンボとは独立）
         
         # せいとん順でソート
@@ -864,14 +803,30 @@ class GearSetBuilderWindow(QMainWindow):
                 self.inventory_items = inventory_items
         else:
             self.inventory_items = []
+        # ゲーム内装備セット取り込み用のインデックス（開いたときに一度だけ作成）
+        self.item_index = InventoryItemIndex(self.inventory_items)
         
         # キャラ名マッパーの初期化
         db_root = Path(__file__).parent / "data"
         db_root.mkdir(parents=True, exist_ok=True)
         self.name_mapper = CharacterNameMapper(db_root / "names.ini")
         
+        # ゲーム内装備セットの解析結果（キャラフォルダごと）。ゲームがes*.datを
+        # 書き換えたらファイル監視で破棄する
+        self.equipset_cache = parse_equipset.EquipsetCache(db_root / "items.db")
+        self.equipset_watcher = QFileSystemWatcher(self)
+        self.equipset_watcher.fileChanged.connect(self.on_equipset_file_changed)
+        self.equipset_watcher.directoryChanged.connect(self.on_equipset_file_changed)
+        
         self.setup_ui()
     
+    def closeEvent(self, event):
+        """自分で開いたセットのライブラリを閉じる"""
+        if self._owns_gearset_store and self.gearset_store is not None:
+            self.gearset_store.close()
+            self.gearset_store = None
+        super().closeEvent(event)
+    
     def sort_live_items(self, items: List[LiveItem]) -> List[LiveItem]:
         """LiveItemをせいとん順でソート"""
         def get_sort_key(item: LiveItem):
@@ -940,10 +895,16 @@ class GearSetBuilderWindow(QMainWindow):
         self.slot_filter_status = QLabel("表示部位: スロット未選択（すべて）")
         inv_layout.addWidget(self.slot_filter_status)
         
-        # 装備リスト
-        self.equipment_list = QListWidget()
-        self.equipment_list.itemDoubleClicked.connect(self.on_item_double_clicked)
-        self.equipment_list.itemClicked.connect(self.on_item_clicked)
+        # 装備リスト（モデル/ビュー: 描画される行だけを生成）
+        self.equipment_model = EquipmentListModel(self._equipment_label, self)
+        self.equipment_proxy = EquipmentFilterProxyModel(self)
+        self.equipment_proxy.setSourceModel(self.equipment_model)
+        self.equipment_list = QListView()
+        self.equipment_list.setModel(self.equipment_proxy)
+        self.equipment_list.setUniformItemSizes(True)
+        self.equipment_list.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.equipment_list.doubleClicked.connect(self.on_item_double_clicked)
+        self.equipment_list.clicked.connect(self.on_item_clicked)
         # 行数目安：10行程度に調整
         self.equipment_list.setFixedHeight(fm.lineSpacing() * 10 + 10)
         inv_layout.addWidget(self.equipment_list, 2)
@@ -958,12 +919,9 @@ class GearSetBuilderWindow(QMainWindow):
         path_layout = QHBoxLayout()
         self.user_path_edit = QLineEdit()
         # ユーザー指定のデフォルトパス
-        import os
-        default_user_path = r"C:\Program Files (x86)\PlayOnline\SquareEnix\FINAL FANTASY XI\USER"
-        if not Path(default_user_path).exists():
-             default_user_path = os.path.expanduser("~") + r"\Documents\My Games\FINAL FANTASY XI\USER"
+        default_user_path = find_default_user_path() or DEFAULT_USER_PATHS[-1]
         
-        self.user_path_edit.setText(default_user_path)
+        self.user_path_edit.setText(str(default_user_path))
         path_layout.addWidget(QLabel("USERパス:"))
         path_layout.addWidget(self.user_path_edit, 1)
         self.browse_user_btn = QPushButton("...")
@@ -999,6 +957,21 @@ class GearSetBuilderWindow(QMainWindow):
         self.apply_ingame_btn.clicked.connect(self.on_ingame_set_double_clicked)
         ingame_layout.addWidget(self.apply_ingame_btn)
         
+        validate_layout = QHBoxLayout()
+        self.validate_sets_btn = QPushButton("所在チェック")
+        self.validate_sets_btn.setToolTip("選択中のフォルダの全セットについて、装備がセット登録時の場所にあるか確認します")
+        self.validate_sets_btn.clicked.connect(lambda: self.on_validate_ingame_sets(all_characters=False))
+        validate_layout.addWidget(self.validate_sets_btn)
+        self.validate_all_sets_btn = QPushButton("全キャラ所在チェック")
+        self.validate_all_sets_btn.setToolTip("表示名がキャラ名と一致するすべてのフォルダをまとめて確認します")
+        self.validate_all_sets_btn.clicked.connect(lambda: self.on_validate_ingame_sets(all_characters=True))
+        validate_layout.addWidget(self.validate_all_sets_btn)
+        self.ingame_wardrobe_plan_btn = QPushButton("モグワ配置案")
+        self.ingame_wardrobe_plan_btn.setToolTip("選択中のフォルダの全セットに必要な装備をモグワに収める手順を表示")
+        self.ingame_wardrobe_plan_btn.clicked.connect(self.on_ingame_wardrobe_plan)
+        validate_layout.addWidget(self.ingame_wardrobe_plan_btn)
+        ingame_layout.addLayout(validate_layout)
+        
         self.left_tabs.addTab(self.ingame_sets_tab, "ゲーム内セット")
         
         left_main_layout.addWidget(self.left_tabs, 2)
@@ -1024,6 +997,7 @@ class GearSetBuilderWindow(QMainWindow):
         for slot_widget in self.gearset_panel.slots.values():
             slot_widget.clicked_signal = self.on_slot_clicked
         layout.addWidget(self.gearset_panel, 1)
+        self.gearset_panel.load_library()
         
         # 初期化処理
         self.populate_equipment_list()
@@ -1041,37 +1015,39 @@ class GearSetBuilderWindow(QMainWindow):
     
     def populate_equipment_list(self):
         """装備リストを表示（装備品のみ）"""
-        self.equipment_list.clear()
-        # 表示時に改めて「せいとん」順でソート
-        if self.is_live_mode:
-            items = self.sort_live_items(self.inventory_items)
-        elif self.parser:
-            items = self.sort_by_seiton(self.inventory_items)
+        # inventory_items は開いたときに「せいとん」順でソート済み
+        items = [item for item in self.inventory_items if self._is_equipment_item(item)]
+        records = [self._make_filter_record(item) for item in items]
+        self.equipment_model.set_items(items, records)
+    
+    def _equipment_label(self, item: Union[Dict[str, Any], LiveItem]) -> str:
+        """装備リストの表示文字列（アイテム名 + ストレージ名）"""
+        # LiveItemかDictかを判定
+        if isinstance(item, LiveItem):
+            display_name = item.name  # 日本語名
+            storage_name = item.storage
         else:
-            items = self.inventory_items
-
-        for item in items:
-            # 装備品（Weapon/Armor）のみ表示
-            if not self._is_equipment_item(item):
-                continue
-            
-            # LiveItemかDictかを判定
-            storage_name = ""
-            if isinstance(item, LiveItem):
-                display_name = item.name  # 日本語名
-                storage_name = item.storage
-            else:
-                display_name = item.get("name", "Unknown")
-                storage_name = item.get("storage", "")
-            
-            # ストレージ名があれば追加
-            if storage_name:
-                storage_display = self._get_storage_display_name(storage_name)
-                display_name = f"{display_name} ({storage_display})"
-            
-            list_item = QListWidgetItem(display_name)
-            list_item.setData(Qt.ItemDataRole.UserRole, item)
-            self.equipment_list.addItem(list_item)
+            display_name = item.get("name", "Unknown")
+            storage_name = item.get("storage", "")
+        
+        # ストレージ名があれば追加
+        if storage_name:
+            storage_display = self._get_storage_display_name(storage_name)
+            display_name = f"{display_name} ({storage_display})"
+        return display_name
+    
+    def _make_filter_record(self, item: Union[Dict[str, Any], LiveItem]) -> EquipmentFilterRecord:
+        """フィルタ用の情報（検索キー・部位マスク・ジョブマスク）を作成"""
+        item_info = self._get_item_info(item)
+        if isinstance(item, LiveItem):
+            name_key = item.search_key
+        else:
+            name_key = normalize_search_key(item_info["name"])
+        return EquipmentFilterRecord(
+            name_key=name_key,
+            slots=item_info["slots"] or 0,
+            jobs=_jobs_to_filter_mask(self._get_item_jobs(item)),
+        )
     
     def browse_user_path(self):
         """USERフォルダを選択"""
@@ -1120,32 +1096,48 @@ class GearSetBuilderWindow(QMainWindow):
         
         if not char_folder:
             return
-            
-        # アイテムDBのパス
-        db_path = Path(__file__).parent / "data" / "items.db"
-        item_dict = parse_equipset.load_item_dictionary(db_path)
         
-        results = parse_equipset.load_character_equipsets(char_folder, item_dict)
+        # 変更がなければキャッシュから（ディスクを読まない）
+        results = self.equipset_cache.load(char_folder)
+        self._watch_equipset_folder(char_folder)
         
-        for file_result in results:
-            if not file_result.get("exists", True):
-                continue
-                
-            for eq_set in file_result.get("sets", []):
+        for compact in results:
+            for set_idx in range(compact.set_count):
                 # 空のセットはスキップ
-                has_items = any(not s.get("empty", True) for s in eq_set.get("slots", {}).values())
-                if not eq_set.get("name") and not has_items:
+                item_count = compact.item_count(set_idx)
+                set_name = compact.names[set_idx]
+                if not set_name and not item_count:
                     continue
                 
-                display_name = f"#{eq_set.get('global_index')}: {eq_set.get('name') or '(名称未設定)'}"
-                if has_items:
-                    item_count = sum(1 for s in eq_set.get("slots", {}).values() if not s.get("empty", True))
+                display_name = f"#{compact.global_index(set_idx)}: {set_name or '(名称未設定)'}"
+                if item_count:
                     display_name += f" ({item_count}部位)"
                 
+                # 辞書形式のセットは反映するときにだけ作る
                 item = QListWidgetItem(display_name)
-                item.setData(Qt.ItemDataRole.UserRole, eq_set)
+                item.setData(Qt.ItemDataRole.UserRole, (compact, set_idx))
                 self.ingame_set_list.addItem(item)
 
+    def _watch_equipset_folder(self, char_folder: Path):
+        """キャラフォルダとes*.datを監視対象に追加"""
+        watched = set(self.equipset_watcher.files()) | set(self.equipset_watcher.directories())
+        paths = [str(char_folder)] + [str(p) for p in sorted(char_folder.glob("es*.dat"))]
+        new_paths = [p for p in paths if p not in watched]
+        if new_paths:
+            self.equipset_watcher.addPaths(new_paths)
+
+    def on_equipset_file_changed(self, path: str):
+        """es*.dat（またはフォルダ）が変更されたらキャッシュを破棄し、表示中なら再読み込み"""
+        changed = Path(path)
+        self.equipset_cache.invalidate(changed)
+        current = self.char_folder_combo.currentData()
+        if current is not None and (changed == current or changed.parent == current):
+            # 選択中のセットを維持したまま一覧を作り直す
+            row = self.ingame_set_list.currentRow()
+            self.on_char_folder_changed(self.char_folder_combo.currentIndex())
+            if 0 <= row < self.ingame_set_list.count():
+                self.ingame_set_list.setCurrentRow(row)
+
     def on_rename_character(self):
         """キャラフォルダの表示名を変更"""
         idx = self.char_folder_combo.currentIndex()
@@ -1175,6 +1167,126 @@ class GearSetBuilderWindow(QMainWindow):
             if new_idx >= 0:
                 self.char_folder_combo.setCurrentIndex(new_idx)
 
+    def on_validate_ingame_sets(self, all_characters: bool = False):
+        """ゲーム内セットの装備の所在を一括チェック"""
+        current_folder = self.char_folder_combo.currentData()
+        if not current_folder:
+            QMessageBox.warning(self, "警告", "キャラフォルダを選択してください")
+            return
+        
+        own_name = self.char_name or current_folder.name
+        indexes = {own_name: self.item_index}
+        # 他キャラの所持品（別キャラ所持の判定用）
+        if self.live_loader is not None:
+            other_names = [name for name in self.live_loader.get_available_characters() if name != own_name]
+            for snapshot in self.live_loader.load_snapshots(other_names):
+                indexes[snapshot.char_name] = InventoryItemIndex(snapshot.items)
+        
+        # フォルダの持ち主は names.ini から引く。対応付けのない選択中のフォルダだけを
+        # このビルダーのキャラのものとみなす（names.ini で対応付けたフォルダがあればそちらを使う）
+        owners = {}
+        for i in range(self.char_folder_combo.count()):
+            folder = self.char_folder_combo.itemData(i)
+            owners[folder] = self.name_mapper.get_name(folder.name)
+        if owners.get(current_folder) == current_folder.name and own_name not in owners.values():
+            owners[current_folder] = own_name
+        
+        targets = owners if all_characters else {current_folder: owners.get(current_folder, own_name)}
+        folders = {folder: owner for folder, owner in targets.items() if owner in indexes}
+        if not folders:
+            QMessageBox.warning(self, "警告", "選択中のフォルダのキャラクターの所持品データがありません")
+            return
+        
+        self._show_validation_report(validate_all_characters(folders, self.equipset_cache, indexes))
+    
+    def _show_validation_report(self, reports):
+        """所在チェックの結果を表示"""
+        item_names = self.equipset_cache.item_dict
+        lines = []
+        for report in reports:
+            summary = report.summary()
+            counts = ", ".join(
+                f"{SlotStatus.LABELS[status]} {summary.get(status, 0)}"
+                for status in (SlotStatus.IN_PLACE, SlotStatus.MOVED, SlotStatus.OTHER_CHARACTER, SlotStatus.MISSING)
+            )
+            lines.append(f"■ {report.character} ({report.folder})")
+            lines.append(f"  {report.set_count}セット / {len(report.checks)}部位: {counts}")
+            for check in report.problems():
+                slot_name = parse_equipset.SLOT_NAMES_JP.get(check.slot, check.slot)
+                item_name = item_names.get(check.item_id, f"ID:{check.item_id}")
+                where = f"{self._get_storage_display_name(check.storage)} #{check.bag_index}"
+                if check.status == SlotStatus.MOVED:
+                    where += f" → {self._get_storage_display_name(check.found_storage)} #{check.found_slot}"
+                elif check.status == SlotStatus.OTHER_CHARACTER:
+                    where += f" → {check.found_character}: {self._get_storage_display_name(check.found_storage)}"
+                lines.append(
+                    f"  #{check.global_index} {check.set_name or '(名称未設定)'} [{slot_name}] "
+                    f"{item_name}: {SlotStatus.LABELS[check.status]} ({where})"
+                )
+            lines.append("")
+        
+        self._show_text_dialog("ゲーム内セットの所在チェック", "\n".join(lines))
+    
+    def on_ingame_wardrobe_plan(self):
+        """選択中のフォルダのゲーム内セットからモグワ配置案を表示"""
+        current_folder = self.char_folder_combo.currentData()
+        if not current_folder:
+            QMessageBox.warning(self, "警告", "キャラフォルダを選択してください")
+            return
+        groups = ingame_sets_to_groups(self.equipset_cache.load(current_folder), self.item_index,
+                                       group=self.name_mapper.get_name(current_folder.name))
+        self.show_wardrobe_plan(groups)
+    
+    def show_wardrobe_plan(self, sets_by_group: Dict[Any, Dict[str, Dict[str, Any]]]):
+        """モグワ配置案（移動手順）を表示"""
+        plan = plan_wardrobes(self.inventory_items, sets_by_group, self.storage_capacities)
+        
+        lines = [
+            f"必要な装備: {plan.required_count}個 / 移動: {plan.move_count}回",
+            "使用枠: " + ", ".join(
+                f"{self._get_storage_display_name(w)} {plan.usage[w]}" for w in WARDROBE_STORAGES
+            ),
+            "",
+        ]
+        if plan.moves:
+            lines.append("■ 移動手順")
+            for i, move in enumerate(plan.moves, 1):
+                src = self._get_storage_display_name(move.from_storage) if move.from_storage else "?"
+                dst = self._get_storage_display_name(move.to_storage)
+                mark = "出す" if move.reason == "evict" else "入れる"
+                lines.append(f"  {i:3d}. [{mark}] {move.item_name}: {src} → {dst}")
+            lines.append("")
+        if plan.unplaced:
+            lines.append(f"■ 枠が足りず配置できない装備 ({len(plan.unplaced)}個)")
+            for item in plan.unplaced:
+                lines.append(f"  {self._equipment_label(item)}")
+            lines.append("")
+        if plan.missing:
+            lines.append(f"■ 所持品に見つからない装備 ({len(plan.missing)}個)")
+            for set_name, slot_key, item_name in plan.missing:
+                slot_name = dict(EQUIPMENT_SLOTS).get(slot_key, slot_key)
+                lines.append(f"  {set_name} [{slot_name}] {item_name}")
+        if not plan.moves and not plan.unplaced and not plan.missing:
+            lines.append("必要な装備はすべてモグワ/所持品にあります")
+        
+        self._show_text_dialog("モグワ配置案", "\n".join(lines))
+    
+    def _show_text_dialog(self, title: str, text: str):
+        """テキストの結果をダイアログで表示"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle(title)
+        dialog.resize(760, 520)
+        layout = QVBoxLayout(dialog)
+        text_edit = QTextEdit()
+        text_edit.setReadOnly(True)
+        text_edit.setFont(QFont("Consolas", 9))
+        text_edit.setPlainText(text)
+        layout.addWidget(text_edit)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+        dialog.exec()
+    
     def on_ingame_set_double_clicked(self, item=None):
         """ゲーム内セットを反映"""
         if not item:
@@ -1183,9 +1295,10 @@ class GearSetBuilderWindow(QMainWindow):
         if not item:
             return
             
-        eq_set = item.data(Qt.ItemDataRole.UserRole)
-        if eq_set:
-            self.gearset_panel.import_ingame_set(eq_set)
+        set_ref = item.data(Qt.ItemDataRole.UserRole)
+        if set_ref:
+            compact, set_idx = set_ref
+            self.gearset_panel.import_ingame_set(self.equipset_cache.set_view(compact, set_idx))
     
     def _is_equipment_item(self, item: Union[Dict[str, Any], LiveItem]) -> bool:
         """アイテムが装備品かどうか判定"""
@@ -1206,26 +1319,6 @@ class GearSetBuilderWindow(QMainWindow):
                 return item.get("jobs")
         return None
 
-    def _item_supports_job(self, jobs_data, job_id: Optional[int]) -> bool:
-        """指定ジョブで装備可能か判定"""
-        if job_id is None:
-            return True
-        if jobs_data is None:
-            return True  # 情報がなければフィルタしない
-        # リスト形式
-        if isinstance(jobs_data, list):
-            return job_id in jobs_data
-        # ビットフラグ形式
-        if isinstance(jobs_data, int):
-            # job_id は 1始まりのため bit は (job_id-1)
-            return (jobs_data & (1 << (job_id - 1))) != 0
-        # 辞書形式（Windowerのジョブキーなど）
-        if isinstance(jobs_data, dict):
-            values = list(jobs_data.values())
-            keys = list(jobs_data.keys())
-            return job_id in values or job_id in keys
-        return True
-
     def _get_storage_display_name(self, storage_name: str) -> str:
         """ストレージ名を日本語表示に変換"""
         mapping = {
@@ -1321,42 +1414,18 @@ class GearSetBuilderWindow(QMainWindow):
     
     def filter_equipment_list(self):
         """装備リストをフィルタ"""
-        search_text = self.search_edit.text().lower()
-        slot_filter = self.active_slot_filter
+        # 検索語は一度だけ正規化し、LiveItemは取り込み時に生成済みの検索キーと照合する
+        search_keys = query_search_keys(self.search_edit.text())
+        slot_mask = SLOT_TO_DB_VALUE.get(self.active_slot_filter, 0) if self.active_slot_filter else 0
         job_filter = self.job_filter.currentData()
+        job_mask = (1 << job_filter) if job_filter is not None else 0
         
-        for i in range(self.equipment_list.count()):
-            list_item = self.equipment_list.item(i)
-            item_data = list_item.data(Qt.ItemDataRole.UserRole)
-            
-            # 統一インターフェースでアイテム情報を取得
-            item_info = self._get_item_info(item_data)
-            item_jobs = self._get_item_jobs(item_data)
-            
-            # 検索フィルタ
-            name_match = search_text in item_info["name"].lower()
-            
-            # スロットフィルタ
-            slot_match = True
-            if slot_filter:
-                item_slots = item_info["slots"]
-                if item_slots:
-                    # DBのslots値とフィルタのslots値を比較
-                    filter_db_value = SLOT_TO_DB_VALUE.get(slot_filter, 0)
-                    # ビットマスクで判定（アイテムが該当スロットに装備可能か）
-                    slot_match = (item_slots & filter_db_value) != 0
-                else:
-                    slot_match = False
-
-            # ジョブフィルタ
-            job_match = self._item_supports_job(item_jobs, job_filter)
-            
-            list_item.setHidden(not (name_match and slot_match and job_match))
+        self.equipment_proxy.set_filter(search_keys, slot_mask, job_mask)
         self.update_slot_filter_status()
     
-    def on_item_clicked(self, list_item: QListWidgetItem):
+    def on_item_clicked(self, index: QModelIndex):
         """装備リストのアイテムをクリック時に情報を表示"""
-        item_data = list_item.data(Qt.ItemDataRole.UserRole)
+        item_data = index.data(Qt.ItemDataRole.UserRole)
         if item_data:
             self.display_item_info(item_data)
 
@@ -1464,9 +1533,9 @@ class GearSetBuilderWindow(QMainWindow):
         
         self.item_info_text.setHtml("<br>".join(lines))
     
-    def on_item_double_clicked(self, list_item: QListWidgetItem):
+    def on_item_double_clicked(self, index: QModelIndex):
         """装備をダブルクリックで追加"""
-        item_data = list_item.data(Qt.ItemDataRole.UserRole)
+        item_data = index.data(Qt.ItemDataRole.UserRole)
         if not item_data:
             return
         
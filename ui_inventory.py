@@ -1,4 +1,6 @@
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from PyQt6.QtWidgets import (
@@ -28,13 +30,48 @@ from PyQt6.QtWidgets import (
     QFrame,
     QScrollArea,
     QMenu,
+    QTreeView,
 )
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QSize, QTimer, QAbstractItemModel, QModelIndex, QFileSystemWatcher, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 
 from inventory import get_seiton_priority  # get_seiton_priorityのみ必要
-from ui_gearset import GearSetBuilderWindow
-from live_data import LiveDataLoader, LiveItem
+from ui_gearset import JOB_NAMES, CharacterNameMapper, GearSetBuilderWindow
+from equipset_index import EquipsetReverseIndex
+from character_summary import PRIMARY_BAG, CharacterSummary, CharacterSummaryStore, format_age
+from gearset_store import GearSetStore
+from inventory_history import InventoryHistory
+from inventory_warehouse import InventoryWarehouse
+from live_data import CharacterSnapshot, LiveDataLoader, LiveItem
+from search_query import QueryError, compile_query
+from text_normalize import normalize_search_key, query_search_keys
+import tools.parse_equipset as parse_equipset
+
+# テーブルの行に保持する検索キー（正規化済み）のデータロール
+SEARCH_KEY_ROLE = Qt.ItemDataRole.UserRole + 1
+
+# Search Allの入力確定までの待ち時間（ミリ秒）
+SEARCH_DEBOUNCE_MS = 250
+
+# 前回からの変化のツールチップに表示する最大件数
+CHANGE_TOOLTIP_LIMIT = 30
+
+# キャラクター一覧の並び順（表示名, キー）
+CHARACTER_SORT_ORDERS = [
+    ("名前順", "name"),
+    ("エクスポートが新しい順", "fresh"),
+    ("アイテムが多い順", "items"),
+    ("所持品の空きが少ない順", "free"),
+]
+
+# Search Allのクエリ書式（ツールチップ表示用）
+SEARCH_QUERY_HELP = (
+    "アイテム名（部分一致）に加えて以下の条件が使えます:\n"
+    "  id:11697  storage:wardrobe  char:名前  cat:Weapon\n"
+    "  job:COR  slot:ring  aug:\"STR+\"\n"
+    "  ilvl>=119  lv<99  count>1\n"
+    "  A B（かつ） / A OR B / NOT A / -A / ( ... )"
+)
 
 # 武器スキルID
 WEAPON_TYPES = {
@@ -625,12 +662,243 @@ class InventoryListPanel(QFrame):
             item = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
             self.parent_window.detail_panel.set_item(item)
 
+class _ResultNode:
+    """検索結果ツリーのノード（子ノードは source から展開時に生成する）"""
+    __slots__ = ("parent", "row", "depth", "label", "total", "detail",
+                 "item_id", "item_name", "item_name_en", "source", "children")
+
+    def __init__(self, parent: Optional["_ResultNode"], row: int, depth: int, label: str = "",
+                 total: int = 0, detail: str = "", source: Optional[list] = None):
+        self.parent = parent
+        self.row = row
+        self.depth = depth  # 0=ルート, 1=アイテム, 2=キャラクター, 3=保管場所
+        self.label = label
+        self.total = total
+        self.detail = detail
+        self.item_id = parent.item_id if parent is not None else 0
+        self.item_name = parent.item_name if parent is not None else ""
+        self.item_name_en = parent.item_name_en if parent is not None else ""
+        self.source = source
+        self.children: List["_ResultNode"] = []
+
+
+class SearchResultTreeModel(QAbstractItemModel):
+    """Search All の検索結果ツリー（アイテム → キャラクター → 保管場所）
+
+    集計値は結果セットから一度だけ計算しておき、ノードは表示・展開された分だけ
+    canFetchMore / fetchMore で生成する。ヒット件数が多くても描画コストは展開量に比例する。
+    """
+
+    HEADERS = ["アイテム / キャラクター / 保管場所", "個数", "内訳"]
+    FETCH_BATCH = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._root = _ResultNode(None, 0, 0, source=[])
+        self.total_count = 0
+        self.character_count = 0
+
+    def set_results(self, results: List[Dict[str, Any]]):
+        """Search All の結果（キャラクター×保管場所×アイテム単位）からツリーを作り直す"""
+        # アイテム → キャラクター → 保管場所 の順に集計
+        groups: Dict[int, Dict[str, Any]] = {}
+        characters = set()
+        for res in results:
+            item = res['item']
+            group = groups.get(item.id)
+            if group is None:
+                group = groups[item.id] = {'item': item, 'total': 0, 'chars': {}}
+            char_storages = group['chars'].setdefault(res['character'], [])
+            char_storages.append((res['storage'], res['count']))
+            group['total'] += res['count']
+            characters.add(res['character'])
+
+        source = []
+        for group in sorted(groups.values(), key=lambda g: (g['item'].name, g['item'].id)):
+            chars = []
+            for char_name in sorted(group['chars']):
+                storages = sorted(group['chars'][char_name], key=lambda s: (-s[1], s[0]))
+                chars.append((char_name, sum(count for _, count in storages), storages))
+            item = group['item']
+            source.append((item.id, item.name, item.name_en, group['total'], chars))
+
+        self.total_count = sum(entry[3] for entry in source)
+        self.character_count = len(characters)
+        self._reset(source)
+
+    def set_unowned_item(self, item_id: int, name: str, name_en: str):
+        """誰も所持していないアイテムを個数0で表示"""
+        self.total_count = 0
+        self.character_count = 0
+        self._reset([(item_id, name, name_en, 0, [])])
+
+    def clear(self):
+        self.total_count = 0
+        self.character_count = 0
+        self._reset([])
+
+    def _reset(self, source: list):
+        self.beginResetModel()
+        self._root = _ResultNode(None, 0, 0, source=source)
+        self.endResetModel()
+
+    def item_group_count(self) -> int:
+        """アイテム（最上位ノード）の総数"""
+        return len(self._root.source)
+
+    def node(self, index: QModelIndex) -> _ResultNode:
+        if index.isValid():
+            return index.internalPointer()
+        return self._root
+
+    def _make_child(self, parent: _ResultNode, row: int, spec) -> _ResultNode:
+        depth = parent.depth + 1
+        if depth == 1:
+            item_id, name, name_en, total, chars = spec
+            node = _ResultNode(parent, row, depth, f"{name} / {name_en}", total,
+                               f"{len(chars)} キャラ" if chars else "誰も所持していません", chars)
+            node.item_id = item_id
+            node.item_name = name
+            node.item_name_en = name_en
+            return node
+        if depth == 2:
+            char_name, total, storages = spec
+            return _ResultNode(parent, row, depth, char_name, total, f"{len(storages)} か所", storages)
+        storage, count = spec
+        return _ResultNode(parent, row, depth, storage, count)
+
+    # --- QAbstractItemModel ---
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        parent_node = self.node(parent)
+        if row < 0 or row >= len(parent_node.children) or column < 0 or column >= len(self.HEADERS):
+            return QModelIndex()
+        return self.createIndex(row, column, parent_node.children[row])
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        parent_node = index.internalPointer().parent
+        if parent_node is None or parent_node is self._root:
+            return QModelIndex()
+        return self.createIndex(parent_node.row, 0, parent_node)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if parent.column() > 0:
+            return False
+        return bool(self.node(parent).source)
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        node = self.node(parent)
+        return node.source is not None and len(node.children) < len(node.source)
+
+    def fetchMore(self, parent: QModelIndex):
+        node = self.node(parent)
+        start = len(node.children)
+        end = min(start + self.FETCH_BATCH, len(node.source))
+        if start >= end:
+            return
+        self.beginInsertRows(parent, start, end - 1)
+        for row in range(start, end):
+            node.children.append(self._make_child(node, row, node.source[row]))
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return node.label
+            if column == 1:
+                return str(node.total)
+            return node.detail
+        if role == Qt.ItemDataRole.TextAlignmentRole and column == 1:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role == Qt.ItemDataRole.UserRole:
+            return node.item_id
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+
+# 使用中のゲーム内セットの一覧で表示する最大件数
+EQUIPSET_USAGE_MAX_LINES = 40
+
+
+def show_equipset_usage(parent: QWidget, index: EquipsetReverseIndex, item_id: int, item_name: str):
+    """アイテムを使用しているゲーム内装備セットの一覧を表示"""
+    if not index.user_path or not index.user_path.exists():
+        folder = QFileDialog.getExistingDirectory(
+            parent, "FFXIのUSERフォルダを選択してください", str(Path.home())
+        )
+        if not folder:
+            return
+        index.set_user_path(Path(folder))
+
+    # 更新されたes*.datだけを再解析してから逆引き
+    index.refresh()
+    refs = index.lookup(item_id)
+    if not refs:
+        QMessageBox.information(parent, "使用中のゲーム内セット", f"{item_name} を使用しているゲーム内セットはありません")
+        return
+
+    name_mapper = CharacterNameMapper(Path(__file__).parent / "data" / "names.ini")
+    lines = []
+    for ref in refs[:EQUIPSET_USAGE_MAX_LINES]:
+        char_label = name_mapper.get_name(ref.folder_id)
+        set_name = ref.set_name or "(名称未設定)"
+        lines.append(f"{char_label}  #{ref.global_index}: {set_name} [{ref.slot_name_jp}]")
+    if len(refs) > EQUIPSET_USAGE_MAX_LINES:
+        lines.append(f"...他 {len(refs) - EQUIPSET_USAGE_MAX_LINES} 件")
+    QMessageBox.information(
+        parent,
+        "使用中のゲーム内セット",
+        f"{item_name} を使用しているセット ({len(refs)}件):\n\n" + "\n".join(lines)
+    )
+
+
+def show_saved_set_usage(parent: QWidget, store: GearSetStore, item_id: int, item_name: str):
+    """アイテムを使用している GearSet Builder の保存済みセットの一覧を表示"""
+    refs = store.find_sets_using(item_id)
+    if not refs:
+        QMessageBox.information(parent, "使用中の保存済みセット", f"{item_name} を使用している保存済みセットはありません")
+        return
+
+    lines = []
+    for ref in refs[:EQUIPSET_USAGE_MAX_LINES]:
+        job_label = JOB_NAMES.get(ref.job_id, "All") if ref.job_id else "All"
+        lines.append(f"{ref.character}  [{job_label}] {ref.set_name} [{parse_equipset.SLOT_NAMES_JP.get(ref.slot, ref.slot)}]")
+    if len(refs) > EQUIPSET_USAGE_MAX_LINES:
+        lines.append(f"...他 {len(refs) - EQUIPSET_USAGE_MAX_LINES} 件")
+    QMessageBox.information(
+        parent,
+        "使用中の保存済みセット",
+        f"{item_name} を使用しているセット ({len(refs)}件):\n\n" + "\n".join(lines)
+    )
+
+
 class FindAllWindow(QMainWindow):
     """全キャラクター横断検索ウィンドウ"""
 
-    def __init__(self, loader: LiveDataLoader):
+    def __init__(self, loader: LiveDataLoader, equipset_index: Optional[EquipsetReverseIndex] = None,
+                 gearset_store: Optional[GearSetStore] = None):
         super().__init__()
         self.loader = loader
+        self.equipset_index = equipset_index
+        self.gearset_store = gearset_store
         self.setWindowTitle("Search All - 全キャラクター検索")
         self.resize(800, 600)
         self.setup_ui()
@@ -643,10 +911,18 @@ class FindAllWindow(QMainWindow):
         # 検索バー
         search_layout = QHBoxLayout()
         self.search_edit = QLineEdit()
-        self.search_edit.setPlaceholderText("アイテム名を入力...")
+        self.search_edit.setPlaceholderText("アイテム名またはクエリ（例: slot:ring ilvl>=119）...")
+        self.search_edit.setToolTip(SEARCH_QUERY_HELP)
         self.search_edit.returnPressed.connect(self.on_search)
+        self.search_edit.textChanged.connect(self.on_search_text_changed)
         search_layout.addWidget(self.search_edit)
 
+        # 入力中の検索（一定時間入力が止まったら検索する）
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.on_search)
+
         search_btn = QPushButton("検索")
         search_btn.clicked.connect(self.on_search)
         search_btn.setFixedWidth(80)
@@ -654,35 +930,43 @@ class FindAllWindow(QMainWindow):
 
         layout.addLayout(search_layout)
 
-        # 結果テーブル
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["キャラクター", "保管場所", "アイテム名", "個数"])
+        # 結果ツリー（アイテム → キャラクター → 保管場所、展開した分だけ生成）
+        self.result_model = SearchResultTreeModel(self)
+        self.tree = QTreeView()
+        self.tree.setModel(self.result_model)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setSelectionBehavior(QTreeView.SelectionBehavior.SelectRows)
+        self.tree.setSelectionMode(QTreeView.SelectionMode.SingleSelection)
 
-        header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        header = self.tree.header()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive)
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
 
         # アイテム名の列幅を固定
-        self.table.setColumnWidth(2, 300)
-
-        self.table.verticalHeader().setVisible(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.tree.setColumnWidth(0, 450)
 
         # 右クリックメニューを有効化
-        self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.table.customContextMenuRequested.connect(self.show_context_menu)
+        self.tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.tree.customContextMenuRequested.connect(self.show_context_menu)
 
-        layout.addWidget(self.table)
+        layout.addWidget(self.tree)
 
         # ステータス
         self.status_label = QLabel("検索語を入力してください")
         layout.addWidget(self.status_label)
 
+    def on_search_text_changed(self, text: str):
+        """入力のたびにタイマーを再始動し、入力が止まったら検索する"""
+        if not text.strip():
+            self.search_timer.stop()
+            self.result_model.clear()
+            self.status_label.setText("検索語を入力してください")
+            return
+        self.search_timer.start()
+
     def on_search(self):
+        self.search_timer.stop()
         query = self.search_edit.text().strip()
         if not query:
             return
@@ -690,85 +974,47 @@ class FindAllWindow(QMainWindow):
         self.status_label.setText("検索中...")
         QApplication.processEvents()
 
-        results = self.loader.search_all_characters(query)
-
-        self.table.setRowCount(0)
+        try:
+            results = self.loader.search_all_characters(query)
+        except QueryError as e:
+            self.result_model.clear()
+            self.status_label.setText(f"クエリエラー: {e}")
+            return
 
         if results:
             # 所持しているキャラクターがいる場合
-            self.table.setRowCount(len(results))
-
-            total_count = 0
-            for i, res in enumerate(results):
-                char_item = QTableWidgetItem(res['character'])
-                self.table.setItem(i, 0, char_item)
-
-                # 保管場所
-                storage_item = QTableWidgetItem(res.get('storage', ''))
-                self.table.setItem(i, 1, storage_item)
-
-                # アイテム名（日本語 / 英語）
-                item_obj = res['item']
-                name_str = f"{item_obj.name} / {item_obj.name_en}"
-                name_item = QTableWidgetItem(name_str)
-                # アイテムIDをUserRoleに保存
-                name_item.setData(Qt.ItemDataRole.UserRole, item_obj.id)
-                self.table.setItem(i, 2, name_item)
-
-                count = res['count']
-                total_count += count
-                count_item = QTableWidgetItem(str(count))
-                count_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(i, 3, count_item)
-
-            chars_with_item = len(set(r['character'] for r in results))
+            self.result_model.set_results(results)
+            if self.result_model.item_group_count() == 1:
+                self.tree.expandRecursively(self.result_model.index(0, 0))
+
             self.status_label.setText(
-                f"'{query}' - {chars_with_item} キャラクターが所持、合計 {total_count} 個"
+                f"'{query}' - {self.result_model.item_group_count()} 種類、"
+                f"{self.result_model.character_count} キャラクターが所持、合計 {self.result_model.total_count} 個"
             )
         else:
-            # 誰も所持していない場合、DBからアイテム情報を検索して表示
-            db_item = self.loader.search_item_in_db(query)
+            # 誰も所持していない場合、DBからアイテム情報を検索して表示（名前検索のみ）
+            db_item = None
+            compiled = compile_query(query)
+            if compiled.is_plain:
+                db_item = self.loader.search_item_in_db(compiled.name_text)
             if db_item:
-                self.table.setRowCount(1)
-
-                # キャラクター欄は「-」
-                char_item = QTableWidgetItem("-")
-                self.table.setItem(0, 0, char_item)
-
-                # 保管場所も「-」
-                storage_item = QTableWidgetItem("-")
-                self.table.setItem(0, 1, storage_item)
-
-                # アイテム名（日本語 / 英語）
-                name_str = f"{db_item['name']} / {db_item['name_en']}"
-                name_item = QTableWidgetItem(name_str)
-                name_item.setData(Qt.ItemDataRole.UserRole, db_item['id'])
-                self.table.setItem(0, 2, name_item)
-
-                # 個数は0
-                count_item = QTableWidgetItem("0")
-                count_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(0, 3, count_item)
-
+                self.result_model.set_unowned_item(db_item['id'], db_item['name'], db_item['name_en'])
                 self.status_label.setText(f"'{query}' - 誰も所持していません")
             else:
+                self.result_model.clear()
                 self.status_label.setText(f"'{query}' - アイテムが見つかりません")
 
     def show_context_menu(self, pos):
         """右クリックメニューを表示"""
-        item = self.table.itemAt(pos)
-        if not item:
-            return
-
-        row = item.row()
-        name_item = self.table.item(row, 2)  # アイテム名列
-        if not name_item:
+        index = self.tree.indexAt(pos)
+        if not index.isValid():
             return
 
-        # アイテム名（日本語名部分を抽出）
-        full_name = name_item.text()
-        item_name = full_name.split(" / ")[0] if " / " in full_name else full_name
-        item_id = name_item.data(Qt.ItemDataRole.UserRole)
+        # どの階層のノードでも、そのノードが属するアイテムを対象にする
+        node = self.result_model.node(index)
+        item_name = node.item_name
+        en_name = node.item_name_en or item_name
+        item_id = node.item_id
 
         menu = QMenu(self)
 
@@ -785,6 +1031,20 @@ class FindAllWindow(QMainWindow):
                 lambda: QApplication.clipboard().setText(str(item_id))
             )
 
+        # 使用中のゲーム内セット
+        if item_id and self.equipset_index is not None:
+            usage_action = menu.addAction("🧩 使用中のゲーム内セット")
+            usage_action.triggered.connect(
+                lambda: show_equipset_usage(self, self.equipset_index, item_id, item_name)
+            )
+
+        # 使用中の保存済みセット
+        if item_id and self.gearset_store is not None:
+            saved_action = menu.addAction("📚 使用中の保存済みセット")
+            saved_action.triggered.connect(
+                lambda: show_saved_set_usage(self, self.gearset_store, item_id, item_name)
+            )
+
         menu.addSeparator()
 
         # Open in FFXIAH
@@ -796,7 +1056,6 @@ class FindAllWindow(QMainWindow):
 
             bgwiki_action = menu.addAction("📖 BG-Wiki")
             # 英語名を使用
-            en_name = full_name.split(" / ")[1] if " / " in full_name else item_name
             bgwiki_action.triggered.connect(
                 lambda: __import__('webbrowser').open(
                     f"https://www.bg-wiki.com/ffxi/{en_name.replace(' ', '_')}"
@@ -810,19 +1069,42 @@ class FindAllWindow(QMainWindow):
                 )
             )
 
-        menu.exec(self.table.viewport().mapToGlobal(pos))
+        menu.exec(self.tree.viewport().mapToGlobal(pos))
 
 
 
 
 class InventoryWindow(QMainWindow):
+    # 所持品データベースの取り込みが終わった（取り込み直したキャラクター名、別スレッドから通知）
+    warehouse_synced = pyqtSignal(list, list)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("VanaInventory Viewer")
         self.resize(1200, 800)
         
         self.loader = LiveDataLoader()
+        # アイテムID -> ゲーム内装備セットの逆引き（右クリックメニューで使用）
+        self.equipset_index = EquipsetReverseIndex()
+        # GearSet Builder の保存済みセットのライブラリ
+        self.gearset_store = GearSetStore()
+        # 全キャラクターの所持品データベース（再読込のたびに更新されたJSONだけ取り込み、履歴にも追記）
+        # 取り込みは別スレッドで行い、Search All の名前検索はこのデータベースを使う
+        self.warehouse = InventoryWarehouse(history=InventoryHistory())
+        self.loader.warehouse = self.warehouse
+        self._warehouse_executor = ThreadPoolExecutor(max_workers=1)
+        self._warehouse_sync: Optional[Future] = None
+        self.warehouse_synced.connect(self.on_warehouse_synced)
+        # キャラクター一覧の要約（エクスポートを読み込むたびに書き出し、起動時はJSON本体を読まない）
+        self.summary_store = CharacterSummaryStore()
+        self.loader.snapshot_listeners.append(self.summary_store.update)
+        # エクスポート・.dat の変更を監視する。Search All は変更があるまで読み込み元を見直さない
+        self.source_watcher = QFileSystemWatcher(self)
+        self.source_watcher.fileChanged.connect(self.on_source_file_changed)
+        self.source_watcher.directoryChanged.connect(self.on_source_file_changed)
         self.current_char_name: Optional[str] = None
+        # 表示中キャラクターのスナップショット（読み込みのたびに差し替える）
+        self.current_snapshot: Optional[CharacterSnapshot] = None
         
         # ストレージ名のマッピング（Windowerアドオン名 -> UI表示名）
         # スクリーンショットの順序に合わせて短縮形を使用
@@ -884,6 +1166,12 @@ class InventoryWindow(QMainWindow):
         left_panel = QWidget()
         left_layout = QVBoxLayout(left_panel)
         left_layout.addWidget(QLabel("Characters"))
+
+        self.char_sort_combo = QComboBox()
+        for label, key in CHARACTER_SORT_ORDERS:
+            self.char_sort_combo.addItem(label, key)
+        self.char_sort_combo.currentIndexChanged.connect(lambda _: self.load_characters())
+        left_layout.addWidget(self.char_sort_combo)
         
         self.char_list = QListWidget()
         self.char_list.currentItemChanged.connect(self.on_character_selected)
@@ -900,6 +1188,10 @@ class InventoryWindow(QMainWindow):
         self.char_info_label = QLabel("Select a character")
         self.char_info_label.setFont(QFont("Arial", 14, QFont.Weight.Bold))
         header_layout.addWidget(self.char_info_label)
+        # 前回の読み込みからの変化（change_feed の差分の要約、詳細はツールチップ）
+        self.change_label = QLabel("")
+        self.change_label.setStyleSheet("color: #888;")
+        header_layout.addWidget(self.change_label)
         
         header_layout.addStretch()
 
@@ -938,6 +1230,7 @@ class InventoryWindow(QMainWindow):
         header_layout.addWidget(QLabel("Search All:"))
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("全キャラ検索...")
+        self.search_box.setToolTip(SEARCH_QUERY_HELP)
         self.search_box.returnPressed.connect(self.on_search_all)
         header_layout.addWidget(self.search_box)
         
@@ -1075,22 +1368,154 @@ class InventoryWindow(QMainWindow):
 
     def reload_data(self):
         """データを再読み込み"""
+        self.load_characters()
         if self.current_char_name:
-            self.load_inventory(self.current_char_name)
+            # エクスポートが更新されていなければ表示を作り直さない
+            snapshot = self.loader.load_snapshot(self.current_char_name)
+            if snapshot is None or snapshot is not self.current_snapshot:
+                self.load_inventory(self.current_char_name)
+        self.sync_warehouse()
+
+    def sync_warehouse(self):
+        """更新されたキャラクターを所持品データベースに別スレッドで取り込む（取り込み中なら何もしない）"""
+        if self._warehouse_sync is not None and not self._warehouse_sync.done():
+            return
+        self._warehouse_sync = self._warehouse_executor.submit(self._run_warehouse_sync)
+
+    def _run_warehouse_sync(self):
+        # ローダーのキャッシュ・差分通知・要約の書き出しはメインスレッドで行うため、
+        # 取り込んだスナップショットはシグナルで渡す
+        snapshots: List[CharacterSnapshot] = []
+        try:
+            updated = self.warehouse.sync(self.loader, listener=snapshots.append)
+        except Exception as e:
+            print(f"Warning: Failed to sync warehouse: {e}")
+            return
+        self.warehouse_synced.emit(updated, snapshots)
+
+    def on_warehouse_synced(self, updated: List[str], snapshots: List[CharacterSnapshot]):
+        """取り込んだスナップショットをローダーに反映し、書き出された要約をキャラクター一覧に反映"""
+        for snapshot in snapshots:
+            self.loader.adopt_snapshot(snapshot)
+        for char_name in updated:
+            self.update_character_item(char_name)
 
     def load_characters(self):
-        """キャラクターリストを読み込み"""
+        """キャラクターリストを読み込み
+
+        各キャラクターの情報は要約ファイル（character_summary）から表示し、エクスポートのJSONは読まない。
+        """
+        selected = self.current_char_name
+        self.char_list.blockSignals(True)
         self.char_list.clear()
-        
-        if not self.loader.data_path or not self.loader.data_path.exists():
-            return
 
-        characters = self.loader.get_available_characters()
-        
-        for char_name in sorted(characters):
-            item = QListWidgetItem(char_name)
+        # エクスポートのないキャラクターはクライアントの .dat から表示する
+        sources = self.loader.get_character_sources()
+        summaries = self.summary_store.load_all()
+        now = datetime.now()
+
+        entries = []
+        for char_name, kind in sources.items():
+            summary = summaries.get(char_name) if kind == "export" else None
+            current = summary is not None and self.summary_store.is_current(
+                summary, self.loader.export_source.stat(char_name)
+            )
+            entries.append((char_name, kind, summary, current))
+        self._sort_character_entries(entries, now)
+
+        for char_name, kind, summary, current in entries:
+            item = QListWidgetItem(self._character_label(char_name, kind, summary, current, now))
             item.setData(Qt.ItemDataRole.UserRole, char_name)
+            if kind != "export":
+                if self.loader.export_source.stat(char_name) is not None:
+                    item.setToolTip("VanaExportのデータより .dat が新しいため、クライアントの .dat から読み込みます（個数・オーグメントなし）")
+                else:
+                    item.setToolTip("VanaExportのデータがないため、クライアントの .dat から読み込みます（個数・オーグメントなし）")
+            elif summary is not None:
+                item.setToolTip(self._character_tooltip(summary, current))
+                if summary.is_stale(now):
+                    item.setForeground(QColor("#888888"))
             self.char_list.addItem(item)
+            if char_name == selected:
+                self.char_list.setCurrentItem(item)
+        self.char_list.blockSignals(False)
+        self._watch_sources()
+
+    def _watch_sources(self):
+        """読み込み元のフォルダ・ファイルを監視対象に追加"""
+        watched = set(self.source_watcher.files()) | set(self.source_watcher.directories())
+        new_paths = [str(path) for path in self.loader.watch_paths() if str(path) not in watched]
+        if new_paths:
+            self.source_watcher.addPaths(new_paths)
+
+    def on_source_file_changed(self, path: str):
+        """エクスポート・.dat（またはフォルダ）が変更されたら、次の Search All で読み込み元を見直す"""
+        self.loader.invalidate_sources()
+        # 置き換えで書き出されたファイルは監視から外れるため、監視し直す
+        watched = set(self.source_watcher.files()) | set(self.source_watcher.directories())
+        if path not in watched and Path(path).exists():
+            self.source_watcher.addPath(path)
+
+    def update_character_item(self, char_name: str):
+        """一覧の1キャラクター分の表示を要約ファイルから更新（並び順はそのまま）"""
+        summary = self.summary_store.load(char_name)
+        if summary is None:
+            return
+        now = datetime.now()
+        current = self.summary_store.is_current(summary, self.loader.export_source.stat(char_name))
+        for row in range(self.char_list.count()):
+            item = self.char_list.item(row)
+            if item.data(Qt.ItemDataRole.UserRole) == char_name:
+                if item.text().endswith("(.dat)"):
+                    return
+                item.setText(self._character_label(char_name, "export", summary, current, now))
+                item.setToolTip(self._character_tooltip(summary, current))
+                item.setForeground(QColor("#888888") if summary.is_stale(now) else self.char_list.palette().text().color())
+                return
+
+    def _sort_character_entries(self, entries: list, now: datetime):
+        """キャラクター一覧の並べ替え（要約のないキャラクターは後ろ）"""
+        order = self.char_sort_combo.currentData()
+        entries.sort(key=lambda e: e[0])
+        if order == "fresh":
+            entries.sort(key=lambda e: (e[2] is None, e[2].age(now) if e[2] else None))
+        elif order == "items":
+            entries.sort(key=lambda e: (e[2] is None, -(e[2].total_items if e[2] else 0)))
+        elif order == "free":
+            entries.sort(key=lambda e: (
+                e[2] is None or PRIMARY_BAG not in e[2].free_slots,
+                e[2].free_slots.get(PRIMARY_BAG, 0) if e[2] else 0,
+            ))
+
+    def _character_label(self, char_name: str, kind: str, summary: Optional[CharacterSummary],
+                         current: bool, now: datetime) -> str:
+        """一覧の表示（2行目にジョブ・アイテム数・所持品の空き・エクスポートからの経過時間）"""
+        if kind != "export":
+            return f"{char_name} (.dat)"
+        if summary is None:
+            return char_name
+        badges = []
+        if summary.job_label:
+            badges.append(summary.job_label)
+        badges.append(f"{summary.total_items}枠")
+        if PRIMARY_BAG in summary.free_slots:
+            badges.append(f"空き{summary.free_slots[PRIMARY_BAG]}")
+        badges.append(format_age(summary.age(now)))
+        mark = "" if current else " ●"
+        return f"{char_name}{mark}\n  " + " · ".join(badges)
+
+    def _character_tooltip(self, summary: CharacterSummary, current: bool) -> str:
+        lines = [f"エクスポート: {summary.exported_at:%Y-%m-%d %H:%M}"]
+        if summary.job_label:
+            lines.append(f"ジョブ: {summary.job_label}")
+        lines.append(f"アイテム: {summary.total_items}枠（合計 {summary.total_count}個）")
+        for bag, free in summary.free_slots.items():
+            lines.append(f"  {bag}: 空き {free}")
+        if summary.is_stale():
+            lines.append("※ エクスポートから時間が経っています（//vex all で更新）")
+        if not current:
+            lines.append("● 新しいエクスポートがあります（選択すると読み込みます）")
+        return "\n".join(lines)
 
     def on_character_selected(self, current: QListWidgetItem, previous: QListWidgetItem):
         if not current:
@@ -1146,6 +1571,7 @@ class InventoryWindow(QMainWindow):
             "slots": live_item.slots,
             "count": live_item.count,
             "description": description,
+            "search_key": live_item.search_key,
         }
 
     def _group_items_by_storage(self, items: List[LiveItem]) -> Dict[str, Dict[str, Any]]:
@@ -1189,8 +1615,8 @@ class InventoryWindow(QMainWindow):
         self.tab_content_mapping.clear()
         
         # LiveDataLoaderでデータを読み込み
-        data = self.loader.load_character_data(char_name)
-        if not data:
+        snapshot = self.loader.load_snapshot(char_name)
+        if not snapshot:
             QMessageBox.warning(
                 self,
                 "データ読み込みエラー",
@@ -1198,10 +1624,12 @@ class InventoryWindow(QMainWindow):
                 f"ゲーム内で //vex all を実行してください。"
             )
             return
+        self.current_snapshot = snapshot
+        self.update_change_summary(snapshot)
+        self.update_character_item(char_name)
         
         # 全アイテムを取得してストレージ別にグループ化
-        all_items = self.loader.get_all_items()
-        storages = self._group_items_by_storage(all_items)
+        storages = self._group_items_by_storage(snapshot.items)
 
         # 定義順にタブを追加（STORAGE_DISPLAY_ORDERの順序を維持）
         active_storages = []
@@ -1248,6 +1676,34 @@ class InventoryWindow(QMainWindow):
         # フィルタや検索を反映
         self.on_search_changed(self.search_box.text())
 
+    def update_change_summary(self, snapshot: CharacterSnapshot):
+        """表示中のスナップショットで届いた差分（前回の読み込みからの変化）を表示"""
+        diff = self.loader.change_feed.latest(snapshot.char_name)
+        if diff is None or diff.created_at < snapshot.loaded_at:
+            self.change_label.setText("")
+            self.change_label.setToolTip("")
+            return
+        if not diff:
+            self.change_label.setText("前回から変化なし")
+            self.change_label.setToolTip("")
+            return
+        self.change_label.setText(f"前回から {diff.summary()}")
+        kind_labels = {"added": "追加", "removed": "削除", "moved": "移動", "count": "個数"}
+        lines = []
+        for change in diff.changes[:CHANGE_TOOLTIP_LIMIT]:
+            if change.kind == "moved":
+                detail = f"{change.from_storage} → {change.to_storage} ×{change.amount}"
+            elif change.kind == "count":
+                detail = f"{change.to_storage} {change.old_count} → {change.new_count}"
+            elif change.kind == "added":
+                detail = f"{change.to_storage} ×{change.new_count}"
+            else:
+                detail = f"{change.from_storage} ×{change.old_count}"
+            lines.append(f"[{kind_labels[change.kind]}] {change.name or change.item_id}  {detail}")
+        if len(diff.changes) > CHANGE_TOOLTIP_LIMIT:
+            lines.append(f"...ほか {len(diff.changes) - CHANGE_TOOLTIP_LIMIT} 件")
+        self.change_label.setToolTip("\n".join(lines))
+
     def filter_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """フィルタオプションを適用"""
         result = items
@@ -1396,6 +1852,14 @@ class InventoryWindow(QMainWindow):
             item_name = QTableWidgetItem(item['name'])
             # ID検索用にUserRoleとしてIDを保存
             item_name.setData(Qt.ItemDataRole.UserRole, item.get('id', 0))
+            # 絞り込み用の検索キー（名前・ID・カテゴリ・個数・説明を正規化して連結）
+            item_name.setData(SEARCH_KEY_ROLE, "\n".join((
+                item.get('search_key') or normalize_search_key(item['name']),
+                str(item.get('id', 0)),
+                normalize_search_key(category),
+                str(count),
+                normalize_search_key(description),
+            )))
             
             item_category = QTableWidgetItem(category)
             item_category.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -1448,32 +1912,16 @@ class InventoryWindow(QMainWindow):
         if not table:
             return
             
-        search_term = text.lower()
+        # 検索語は一度だけ正規化し、各行は作成時に保持した検索キーと照合する
+        keys = query_search_keys(text)
         
         for row in range(table.rowCount()):
-            should_show = False
-            # Name (col 1), Category (col 2), Count (col 3), Description (col 4), or ID match
+            # Name / ID / Category / Count / Description のいずれかに一致すれば表示
             name_item = table.item(row, 1)
-            category_item = table.item(row, 2)
-            count_item = table.item(row, 3)
-            description_item = table.item(row, 4)
-            
-            if name_item:
-                # 名前で検索
-                if search_term in name_item.text().lower():
-                    should_show = True
-                # IDで検索（UserRoleから取得）
-                elif search_term and name_item.data(Qt.ItemDataRole.UserRole):
-                    item_id = str(name_item.data(Qt.ItemDataRole.UserRole))
-                    if search_term in item_id:
-                        should_show = True
-            if category_item and search_term in category_item.text().lower():
-                should_show = True
-            if count_item and search_term in count_item.text():
-                should_show = True
-            if description_item and search_term in description_item.text().lower():
-                should_show = True
-                
+            should_show = not keys
+            if keys and name_item:
+                row_key = name_item.data(SEARCH_KEY_ROLE) or ""
+                should_show = any(key in row_key for key in keys)
             table.setRowHidden(row, not should_show)
 
     def on_filter_toggled(self):
@@ -1508,21 +1956,26 @@ class InventoryWindow(QMainWindow):
             self.gearset_window.activateWindow()
             return
         
-        # LiveDataLoaderから装備可能アイテムを取得
-        equipment_items = self.loader.get_equipment_items()
+        # LiveDataLoaderから装備可能アイテムを取得（ファイルが更新されていなければ表示中と同じスナップショット）
+        snapshot = self.loader.load_snapshot(self.current_char_name)
+        if not snapshot:
+            QMessageBox.warning(self, "警告", "キャラクターのデータを読み込めませんでした")
+            return
+        equipment_items = list(snapshot.items)
         
         # GearSetBuilderを開く（ライブモード）
         self.gearset_window = GearSetBuilderWindow(
             equipment_items,
             parser=None,
             live_loader=self.loader,
-            char_name=self.current_char_name
+            char_name=self.current_char_name,
+            gearset_store=self.gearset_store,
+            storage_capacities=snapshot.capacities
         )
         self.gearset_window.setWindowTitle(f"GearSet Builder - {self.current_char_name}")
         
         # 現在の装備をセット
-        current_equipment = self.loader.get_current_equipment()
-        for slot_name, item in current_equipment.items():
+        for slot_name, item in snapshot.equipment.items():
             self.gearset_window.gearset_panel.set_equipment(slot_name, item)
         
         self.gearset_window.show()
@@ -1539,7 +1992,7 @@ class InventoryWindow(QMainWindow):
                 self.findall_window.on_search()
             return
         
-        self.findall_window = FindAllWindow(self.loader)
+        self.findall_window = FindAllWindow(self.loader, self.equipset_index, self.gearset_store)
         if initial_query:
             self.findall_window.search_edit.setText(initial_query)
             self.findall_window.on_search()
@@ -1585,6 +2038,18 @@ class InventoryWindow(QMainWindow):
             copy_id_action.triggered.connect(
                 lambda: QApplication.clipboard().setText(str(item_id))
             )
+            
+            # 使用中のゲーム内セット
+            usage_action = menu.addAction("🧩 使用中のゲーム内セット")
+            usage_action.triggered.connect(
+                lambda: show_equipset_usage(self, self.equipset_index, item_id, item_name)
+            )
+            
+            # 使用中の保存済みセット
+            saved_action = menu.addAction("📚 使用中の保存済みセット")
+            saved_action.triggered.connect(
+                lambda: show_saved_set_usage(self, self.gearset_store, item_id, item_name)
+            )
         
         menu.addSeparator()
         
@@ -0,0 +1,247 @@
+"""
+Wardrobe Planner - 装備セットに必要な装備のモグワ配置案
+
+GearSwap が着替えられるのはモグワードローブ（8個 × 80枠）と所持品にある装備だけなので、
+保存した装備セット（GearSet Builder の gear_sets_by_job やゲーム内セット）から必要な装備の和集合を求め、
+移動回数が最少になる配置と移動手順を作る。
+
+- すでにモグワ/所持品にある必要装備は動かさない（移動0回）
+- それ以外の必要装備は空き枠のあるモグワへ入れる（1回ずつ）
+- 空き枠が足りない場合だけ、どのセットにも使われていない装備をモグワから金庫などへ出す
+
+必要装備をモグワに入れる回数は減らせず、追い出しは不足分だけなので移動回数は最少になる。
+同じ移動回数の中では、同じジョブの装備がなるべく同じモグワにまとまるように割り当てる。
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from live_data import LiveItem
+
+# GearSwapが着替えに使えるストレージ
+WARDROBE_STORAGES = [
+    "Wardrobe", "Wardrobe 2", "Wardrobe 3", "Wardrobe 4",
+    "Wardrobe 5", "Wardrobe 6", "Wardrobe 7", "Wardrobe 8",
+]
+INVENTORY_STORAGE = "Inventory"
+
+# 追い出した装備の移動先候補（GearSwapからは使えないストレージ）
+OVERFLOW_STORAGES = ["Safe", "Safe 2", "Storage", "Locker", "Satchel", "Sack", "Case"]
+
+# 各ストレージの枠数（既定値）
+DEFAULT_CAPACITY = 80
+
+# 物理的な1個の装備を表すキー: (ストレージ, バッグ内スロット, アイテムID)
+ItemKey = Tuple[Optional[str], Optional[int], int]
+Item = Union[Dict[str, Any], LiveItem]
+
+
+def _value(item: Item, key: str) -> Any:
+    if isinstance(item, dict):
+        return item.get(key)
+    return getattr(item, key, None)
+
+
+def item_key(item: Item) -> ItemKey:
+    """装備1個を識別するキー（同じIDでもオーグメント違いは別の装備として扱う）"""
+    return (_value(item, "storage"), _value(item, "slot"), _value(item, "id") or 0)
+
+
+@dataclass(frozen=True)
+class Move:
+    """1回の移動"""
+    item_id: int
+    item_name: str
+    from_storage: Optional[str]
+    to_storage: str
+    reason: str   # "required"（セットで使う装備を入れる）/ "evict"（空きを作るために出す）
+
+
+@dataclass
+class WardrobePlan:
+    """モグワ配置案"""
+    # 必要装備のキー -> 配置先（モグワ / 所持品）
+    assignment: Dict[ItemKey, str] = field(default_factory=dict)
+    # 実行順の移動手順（追い出しは、そのモグワへ入れる直前に並ぶ）
+    moves: List[Move] = field(default_factory=list)
+    # 必要だが所持品に見つからなかった装備（セット名, スロット, 名前）
+    missing: List[Tuple[str, str, str]] = field(default_factory=list)
+    # 枠が足りず配置できなかった必要装備
+    unplaced: List[Item] = field(default_factory=list)
+    required_count: int = 0
+    # 配置後の各モグワの使用枠数
+    usage: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def move_count(self) -> int:
+        return len(self.moves)
+
+
+def plan_wardrobes(inventory_items: Iterable[Item],
+                   sets_by_group: Mapping[Any, Mapping[str, Mapping[str, Item]]],
+                   capacities: Optional[Mapping[str, int]] = None,
+                   include_inventory: bool = True) -> WardrobePlan:
+    """保存済みのセットから必要装備の和集合を求め、モグワ配置案を作る
+
+    Args:
+        inventory_items: キャラの全所持品（LiveItem または辞書）
+        sets_by_group: グループ（ジョブなど） -> セット名 -> {スロット: 装備}
+            GearSetPanel.gear_sets_by_job をそのまま渡せる
+        capacities: ストレージ名 -> 枠数（CharacterSnapshot.capacities。含まれないストレージは
+            DEFAULT_CAPACITY、未開放のモグワは0）
+        include_inventory: 所持品にある装備もそのまま使えるものとして扱う
+    """
+    capacities = capacities or {}
+    plan = WardrobePlan()
+
+    # 所持品の位置インデックス（キー -> 装備、ID -> 同じIDの装備のキー）
+    by_key: Dict[ItemKey, Item] = {}
+    by_id: Dict[int, List[ItemKey]] = {}
+    occupants: Dict[str, List[ItemKey]] = {}
+    for item in inventory_items:
+        key = item_key(item)
+        if key not in by_key:
+            by_key[key] = item
+            by_id.setdefault(key[2], []).append(key)
+        occupants.setdefault(key[0], []).append(key)
+
+    # 必要装備の和集合（最初に使うグループを記録してまとめ配置に使う）
+    required: Dict[ItemKey, Any] = {}
+    moved: List[Tuple[Any, str, str, Item, ItemKey]] = []
+    for group, sets in sets_by_group.items():
+        for set_name, slots in sets.items():
+            for slot_key, item in slots.items():
+                key = item_key(item)
+                if key in by_key:
+                    required.setdefault(key, group)
+                else:
+                    moved.append((group, set_name, slot_key, item, key))
+
+    # 保存後に移動された装備はIDで探す。同じIDの装備が複数あれば、まだ使っていないものを
+    # 1個ずつ割り当てる（オーグメントの一致するものを優先。保存時の位置が同じなら同じ装備）
+    relocated: Dict[ItemKey, Optional[ItemKey]] = {}
+    for group, set_name, slot_key, item, key in moved:
+        if key not in relocated:
+            candidates = [k for k in by_id.get(key[2], ()) if k not in required]
+            augments = _value(item, "augments") or None
+            relocated[key] = next(
+                (k for k in candidates if (_value(by_key[k], "augments") or None) == augments),
+                candidates[0] if candidates else None,
+            )
+        found = relocated[key]
+        if found is None:
+            plan.missing.append((set_name, slot_key, _value(item, "name") or f"ID:{key[2]}"))
+            continue
+        required.setdefault(found, group)
+    plan.required_count = len(required)
+
+    accessible = set(WARDROBE_STORAGES)
+    if include_inventory:
+        accessible.add(INVENTORY_STORAGE)
+
+    # 各ストレージの空き枠
+    free: Dict[str, int] = {}
+    for storage in WARDROBE_STORAGES + OVERFLOW_STORAGES:
+        free[storage] = capacities.get(storage, DEFAULT_CAPACITY) - len(occupants.get(storage, ()))
+    # モグワから出してよい装備（どのセットにも使われていないもの）
+    evictable: Dict[str, List[ItemKey]] = {
+        storage: [key for key in occupants.get(storage, ()) if key not in required]
+        for storage in WARDROBE_STORAGES
+    }
+
+    incoming: List[ItemKey] = []
+    for key, group in required.items():
+        if key[0] in accessible:
+            plan.assignment[key] = key[0]
+        else:
+            incoming.append(key)
+
+    # 同じグループの装備を続けて割り当て、同じモグワにまとめる
+    group_order = {group: i for i, group in enumerate(sets_by_group)}
+    incoming.sort(key=lambda k: (group_order.get(required[k], 0), k[2]))
+
+    def pick_wardrobe(preferred: Optional[str]) -> Optional[str]:
+        if preferred is not None and free[preferred] > 0:
+            return preferred
+        with_space = [w for w in WARDROBE_STORAGES if free[w] > 0]
+        if with_space:
+            return max(with_space, key=lambda w: free[w])
+        with_evictable = [w for w in WARDROBE_STORAGES if evictable[w]]
+        if preferred is not None and preferred in with_evictable:
+            return preferred
+        if with_evictable:
+            return max(with_evictable, key=lambda w: len(evictable[w]))
+        return None
+
+    def overflow_destination() -> Optional[str]:
+        candidates = [s for s in OVERFLOW_STORAGES if free[s] > 0]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda s: free[s])
+
+    current_group = object()
+    preferred: Optional[str] = None
+    for key in incoming:
+        group = required[key]
+        if group != current_group:
+            current_group = group
+            preferred = None
+        wardrobe = pick_wardrobe(preferred)
+        if wardrobe is None:
+            plan.unplaced.append(by_key[key])
+            continue
+
+        if free[wardrobe] <= 0:
+            # 空きを作るため、使われていない装備を金庫などへ出す
+            destination = overflow_destination()
+            if destination is None:
+                plan.unplaced.append(by_key[key])
+                continue
+            evicted = evictable[wardrobe].pop()
+            evicted_item = by_key[evicted]
+            plan.moves.append(Move(evicted[2], _value(evicted_item, "name") or "", wardrobe, destination, "evict"))
+            free[destination] -= 1
+            free[wardrobe] += 1
+
+        item = by_key[key]
+        plan.moves.append(Move(key[2], _value(item, "name") or "", key[0], wardrobe, "required"))
+        plan.assignment[key] = wardrobe
+        free[wardrobe] -= 1
+        if key[0] in free:
+            free[key[0]] += 1
+        preferred = wardrobe
+
+    plan.usage = {w: capacities.get(w, DEFAULT_CAPACITY) - free[w] for w in WARDROBE_STORAGES}
+    return plan
+
+
+def ingame_sets_to_groups(compact_files: Iterable[Any], item_index: Any,
+                          group: Any = None) -> Dict[Any, Dict[str, Dict[str, Item]]]:
+    """ゲーム内セット（CompactEquipsetFile）を plan_wardrobes() の入力形式に変換
+
+    各スロットは InventoryItemIndex で所持品に対応付ける（見つからないスロットは除く）。
+    """
+    import tools.parse_equipset as parse_equipset
+
+    sets: Dict[str, Dict[str, Item]] = {}
+    storage_names: Dict[int, str] = {}
+    for compact in compact_files:
+        for set_idx in range(compact.set_count):
+            base = set_idx * parse_equipset.SLOT_COUNT
+            slots = {}
+            for slot_no, slot_key in enumerate(parse_equipset.EQUIPMENT_SLOTS):
+                item_id = compact.item_ids[base + slot_no]
+                if not item_id:
+                    continue
+                storage_id = compact.storage_ids[base + slot_no]
+                storage = storage_names.get(storage_id)
+                if storage is None:
+                    storage = item_index.map_storage(parse_equipset.get_storage_name(storage_id))
+                    storage_names[storage_id] = storage
+                item = item_index.find(item_id, storage, compact.bag_indexes[base + slot_no])
+                if item is not None:
+                    slots[slot_key] = item
+            if slots:
+                label = f"#{compact.global_index(set_idx)} {compact.names[set_idx]}".rstrip()
+                sets[label] = slots
+    return {group: sets}